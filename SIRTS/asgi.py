@@ -3,6 +3,10 @@ ASGI config for SIRTS project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it (e.g. ``uvicorn SIRTS.asgi:application``) to enable the live event
+stream at /events/; under WSGI that endpoint answers 204 and pages fall back
+to manual refresh.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
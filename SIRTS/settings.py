@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -42,6 +45,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Outermost after security, so session and message writes also pin reads to the primary
+    'incidents.replicas.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -71,16 +76,97 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'SIRTS.wsgi.application'
 
+# Database sessions that also index each session key under its user, so
+# quarantine can log a user out without decoding every session
+SESSION_ENGINE = 'incidents.user_sessions'
+
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+# Chosen by environment variables (DB_ENGINE=sqlite, the default, or postgresql).
+#
+# SQLite (local/dev): IMMEDIATE transactions take the write lock up front, so
+# concurrent writers wait up to DB_BUSY_TIMEOUT seconds for it instead of
+# failing mid-transaction with "database is locked". DB_SQLITE_WAL=1 also
+# switches to WAL, which lets readers run alongside the single writer, with
+# synchronous=NORMAL (safe with WAL, and skips an fsync per commit). WAL is
+# stored in the database file itself and stays on once set, so it is opt-in:
+# running manage.py against the tracked db.sqlite3 must not rewrite it.
+#
+# PostgreSQL (production): DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT.
+# DB_POOL=1 uses psycopg's built-in pool (pip install "psycopg[pool]") with
+# DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE connections per process; otherwise each
+# thread keeps its connection for DB_CONN_MAX_AGE seconds. Either way
+# connections are health-checked before reuse.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'sirts'),
+            'USER': os.environ.get('DB_USER', 'sirts'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    if os.environ.get('DB_POOL', '0') == '1':
+        # The pool replaces persistent connections (Django rejects both at once)
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', '10')),
+        }
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', '60'))
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': int(os.environ.get('DB_BUSY_TIMEOUT', '20')),
+            },
+        }
+    }
+    if os.environ.get('DB_SQLITE_WAL', '0') == '1':
+        DATABASES['default']['OPTIONS']['init_command'] = 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;'
+else:
+    raise ImproperlyConfigured(f"DB_ENGINE must be 'sqlite' or 'postgresql', not {DB_ENGINE!r}")
+
+# Optional read replica for the dashboard/reporting reads (see incidents/replicas.py):
+# DB_REPLICA_HOST (and DB_REPLICA_PORT) for a PostgreSQL streaming replica, or
+# DB_REPLICA_NAME for a SQLite copy kept up to date with `sync_sqlite_replica`
+# (local testing only). The replica connection is read-only.
+if DB_ENGINE == 'postgresql' and os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['DB_REPLICA_HOST'],
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'OPTIONS': {**DATABASES['default']['OPTIONS'], 'options': '-c default_transaction_read_only=on'},
+        'TEST': {'MIRROR': 'default'},
+    }
+elif DB_ENGINE == 'sqlite' and os.environ.get('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ['DB_REPLICA_NAME'],
+        'OPTIONS': {
+            'init_command': 'PRAGMA query_only=1;',
+            'timeout': DATABASES['default']['OPTIONS']['timeout'],
+        },
+        'TEST': {'MIRROR': 'default'},
     }
-}
+
+DATABASE_ROUTERS = ['incidents.replicas.ReplicaRouter']
+REPLICA_DATABASE = 'replica'
+# Seconds a client reads from the primary after one of its requests wrote
+REPLICA_PIN_SECONDS = 5
 
 
 # Password validation
@@ -131,6 +217,11 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Stream uploads to a temporary file and hash them in the same pass (see incidents/upload_handlers.py)
+FILE_UPLOAD_HANDLERS = [
+    'incidents.upload_handlers.HashingTemporaryFileUploadHandler',
+]
+
 # Base URL for external access (for n8n webhooks and file downloads)
 # Set this to your ngrok URL or public URL when deploying
 # Leave empty to use request-based URLs (may not work for n8n in Docker)
@@ -140,5 +231,53 @@ EXTERNAL_BASE_URL = 'https://backmost-blowiest-arnold.ngrok-free.dev'  # Update
 # This is the URL Django will use to send webhook requests to n8n
 N8N_BASE_URL = 'https://backmost-blowiest-arnold.ngrok-free.dev'  # Update this when ngrok URL changes
 
+# Shared secret n8n sends in the X-N8N-Secret header; required by bulk
+# account actions such as /api/quarantine-users/ when set
+N8N_API_SECRET = os.environ.get('N8N_API_SECRET', '')
+
+# Seconds to cache the dashboard status bar counts (0 disables the cache)
+STATUS_SUMMARY_CACHE_TTL = 10
+
+# Load the ticket classifier artifact at WSGI worker start (see SIRTS/wsgi.py)
+CLASSIFIER_PRELOAD = True
+
+# Classifier prediction cache: entries kept per process, and an optional
+# CACHES alias shared between workers (None keeps the cache in-process only)
+CLASSIFIER_CACHE_SIZE = 4096
+CLASSIFIER_SHARED_CACHE = None
+CLASSIFIER_SHARED_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Maximum tickets accepted by /api/classify-tickets/ in one request
+CLASSIFY_MAX_BATCH_SIZE = 500
+
+# Maximum incidents accepted by /webhook-test/new-incidents/ in one request
+INCIDENT_INGEST_MAX_BATCH_SIZE = 5000
+
+# n8n/Telegram callbacks replay their stored response for repeated requests
+# (see incidents/idempotency.py): seconds to keep responses keyed by an
+# Idempotency-Key header, and by a hash of the request body when there is none
+# (comment endpoints only), and how long an unfinished request holds its key
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+IDEMPOTENCY_PAYLOAD_TTL = 10 * 60
+IDEMPOTENCY_LEASE_SECONDS = 60
+
+# Largest ?limit= accepted by /api/incidents/
+INCIDENT_API_MAX_PAGE_SIZE = 200
+
+# Live updates over /events/ (served by SIRTS/asgi.py only). With several ASGI
+# workers, run `python manage.py run_event_broker` and set this to its
+# host:port so every worker sees every event; None keeps events in-process.
+EVENT_BROKER_ADDRESS = None
+# Seconds between keep-alive comments on an idle event stream
+EVENT_STREAM_HEARTBEAT = 15
+
+# Cached role lookups (Manager group, view_all_global_tickets) for the views:
+# the CACHES alias and how long an entry lives. Group/permission changes
+# invalidate it immediately in a shared cache; a per-process cache (the
+# default LocMemCache) only catches up in other workers after the TTL, so
+# the TTL stays short; raise it only once ROLE_CACHE is shared.
+ROLE_CACHE = 'default'
+ROLE_CACHE_TTL = 5
+
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'report_incident'
@@ -8,9 +8,24 @@ https://docs.djangoproject.com/en/6.0/howto/deployment/wsgi/
 """
 
 import os
+import sys
 
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SIRTS.settings')
 
 application = get_wsgi_application()
+
+# Load the ticket classifier when the worker starts (or once in the master with
+# gunicorn --preload) so the first classified ticket doesn't pay for it.
+from django.conf import settings  # noqa: E402
+
+if getattr(settings, 'CLASSIFIER_PRELOAD', False):
+    try:
+        if str(settings.BASE_DIR) not in sys.path:
+            sys.path.insert(0, str(settings.BASE_DIR))
+        import ticket_classifier
+        ticket_classifier.get_model()
+    except Exception as e:
+        # Classification is non-critical; views fall back to loading on first use
+        print(f"Classifier preload failed: {e}", file=sys.stderr)
@@ -0,0 +1,183 @@
+"""
+Benchmark for streaming attachment ingestion in report_incident.
+
+Starts the project on a local threaded WSGI server backed by a throwaway SQLite
+database and MEDIA_ROOT, then uploads several large files concurrently through
+/report/. Prints per-upload latency, aggregate throughput and the process's peak
+memory, and checks that each stored file and its SHA256 match what was sent.
+The project database and media folder are never touched.
+
+Usage:
+    python benchmark_attachment_upload.py [--size-mb N] [--concurrency N]
+
+Example:
+    python benchmark_attachment_upload.py --size-mb 100 --concurrency 4
+"""
+
+import argparse
+import hashlib
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+# Setup Django against a separate benchmark database and media folder
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SIRTS.settings')
+
+parser = argparse.ArgumentParser(description='Benchmark concurrent attachment uploads')
+parser.add_argument('--size-mb', type=int, default=100, help='Size of each uploaded file in MB (default: 100)')
+parser.add_argument('--concurrency', type=int, default=4, help='Number of simultaneous uploads (default: 4)')
+args = parser.parse_args()
+
+work_dir = tempfile.mkdtemp(prefix='sirts_upload_benchmark_')
+
+from django.conf import settings  # noqa: E402
+
+settings.DATABASES['default'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.path.join(work_dir, 'db.sqlite3'),
+    'OPTIONS': {'timeout': 60},
+}
+settings.MEDIA_ROOT = os.path.join(work_dir, 'media')
+settings.FILE_UPLOAD_TEMP_DIR = work_dir
+settings.ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
+settings.N8N_BASE_URL = 'http://127.0.0.1:9'  # Nothing listens here, so the webhook fails fast
+settings.DEBUG = False
+
+import django  # noqa: E402
+
+django.setup()
+
+import requests  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+from incidents.models import Incident  # noqa: E402
+
+CHUNK = 1024 * 1024
+BOUNDARY = 'sirtsbenchmarkboundary'
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class MultipartUpload:
+    """File-like multipart body that generates its payload on the fly (never fully in memory)"""
+
+    def __init__(self, fields, filename, size, seed):
+        self.head = b''.join(
+            f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+            for name, value in fields.items()
+        ) + (
+            f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="attachment"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'
+        ).encode()
+        self.tail = f'\r\n--{BOUNDARY}--\r\n'.encode()
+        self.size = size
+        self.block = hashlib.sha256(seed.encode()).digest() * (CHUNK // 32)
+        self.sha256 = hashlib.sha256()
+        self.sent = 0
+        self.stage = 0
+
+    def __len__(self):
+        return len(self.head) + self.size + len(self.tail)
+
+    def read(self, amount=-1):
+        if self.stage == 0:
+            self.stage = 1
+            return self.head
+        if self.stage == 1:
+            remaining = self.size - self.sent
+            if remaining > 0:
+                data = self.block[:min(CHUNK, remaining)]
+                self.sent += len(data)
+                self.sha256.update(data)
+                return data
+            self.stage = 2
+            return self.tail
+        return b''
+
+
+def upload(base_url, index):
+    session = requests.Session()
+    username = f'bench_uploader_{index}'
+    user = User.objects.create_user(username, password='benchmark-pass-123')
+    session.post(f'{base_url}/login/', data={'username': username, 'password': 'benchmark-pass-123'},
+                 headers={'X-CSRFToken': session.get(f'{base_url}/login/').cookies.get('csrftoken', '')})
+    body = MultipartUpload(
+        {
+            'csrfmiddlewaretoken': session.cookies.get('csrftoken', ''),
+            'title': f'Benchmark upload {index}',
+            'description': 'Large attachment benchmark',
+            'action_type': 'submit',
+        },
+        f'benchmark_{index}.bin',
+        args.size_mb * 1024 * 1024,
+        seed=str(index),
+    )
+    start = time.perf_counter()
+    response = session.post(
+        f'{base_url}/report/',
+        data=body,
+        headers={'Content-Type': f'multipart/form-data; boundary={BOUNDARY}'},
+        allow_redirects=False,
+    )
+    elapsed = time.perf_counter() - start
+    incident = Incident.objects.filter(user=user).order_by('-id').first()
+    ok = (
+        response.status_code == 302
+        and incident is not None
+        and incident.file_hash == body.sha256.hexdigest()
+        and incident.attachment.size == args.size_mb * 1024 * 1024
+    )
+    return index, elapsed, ok
+
+
+def main():
+    call_command('migrate', verbosity=0)
+
+    # Warm up the ticket classifier so its one-off training doesn't count towards upload memory
+    from ticket_classifier import get_model
+    get_model()
+
+    server = make_server('127.0.0.1', 0, get_wsgi_application(),
+                         server_class=ThreadingWSGIServer, handler_class=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+
+    print(f"Uploading {args.concurrency} x {args.size_mb} MB files concurrently to {base_url}/report/ ...")
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda i: upload(base_url, i), range(args.concurrency)))
+    total = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    for index, elapsed, ok in results:
+        print(f"  upload {index}: {elapsed:.2f}s  ({args.size_mb / elapsed:.0f} MB/s)  {'OK' if ok else 'MISMATCH'}")
+    total_mb = args.size_mb * args.concurrency
+    print(f"\nTotal: {total_mb} MB in {total:.2f}s ({total_mb / total:.0f} MB/s)")
+    # ru_maxrss is KB on Linux
+    print(f"Peak RSS: {rss_after / 1024:.0f} MB (grew {(rss_after - rss_before) / 1024:.0f} MB during uploads)")
+
+    server.shutdown()
+    shutil.rmtree(work_dir, ignore_errors=True)
+    if not all(ok for _index, _elapsed, ok in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Load test for concurrent writes against the configured database profile
+(SIRTS/settings.py, DB_ENGINE).
+
+Several worker processes, like several gunicorn workers, submit tickets and
+post comments through the ORM (signals included) as fast as they can for a
+fixed time. The script reports writes/sec, latency, and how many writes failed
+with "database is locked" or similar errors.
+
+The test runs in a throwaway database created the way the test runner does
+(test_<NAME> on PostgreSQL, a temporary file on SQLite) and dropped at the
+end (on PostgreSQL the DB_USER needs CREATEDB). The project database is
+never touched.
+
+Usage:
+    python benchmark_concurrent_writes.py [--workers N] [--seconds N] [--compare]
+
+Examples:
+    DB_SQLITE_WAL=1 python benchmark_concurrent_writes.py --compare
+    DB_ENGINE=postgresql DB_HOST=... DB_POOL=1 python benchmark_concurrent_writes.py
+
+--compare (SQLite only) also runs the plain SQLite settings the project used
+before (rollback journal, deferred transactions, 5s timeout) for reference.
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+# Setup Django
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SIRTS.settings')
+
+parser = argparse.ArgumentParser(description='Concurrent ticket/comment write load test')
+parser.add_argument('--workers', type=int, default=8, help='Writer processes (default: 8)')
+parser.add_argument('--seconds', type=float, default=10, help='How long each run lasts (default: 10)')
+parser.add_argument('--compare', action='store_true', help='SQLite: also run the old plain SQLite settings')
+args = parser.parse_args()
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import OperationalError, connection, connections, transaction  # noqa: E402
+from incidents.models import Comment, Incident  # noqa: E402
+
+LEGACY_SQLITE_OPTIONS = {}
+
+
+def writer(worker, deadline, results):
+    """One worker process: new tickets and comment + status updates until the deadline"""
+    # Never share the parent's connection across the fork
+    connections.close_all()
+    rng = random.Random(worker)
+    user = User.objects.get(username=f'writer_{worker}')
+    latencies = []
+    errors = 0
+    incident_ids = []
+    while time.time() < deadline:
+        start = time.perf_counter()
+        try:
+            if not incident_ids or rng.random() < 0.5:
+                with transaction.atomic():
+                    incident = Incident.objects.create(
+                        user=user, title=f'Load test ticket from worker {worker}',
+                        description='Submitted by benchmark_concurrent_writes.py', status='Open',
+                    )
+                incident_ids.append(incident.pk)
+            else:
+                # Like manage_ticket: read the ticket, then comment and update it in one transaction
+                with transaction.atomic():
+                    incident = Incident.objects.get(pk=rng.choice(incident_ids))
+                    Comment.objects.create(incident=incident, user=user, message='Load test comment')
+                    incident.status = 'In Progress' if incident.status == 'Open' else 'Open'
+                    incident.save(update_fields=['status'])
+        except OperationalError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+    connections.close_all()
+    results.put((latencies, errors))
+
+
+def run(label):
+    for worker in range(args.workers):
+        User.objects.get_or_create(username=f'writer_{worker}')
+    # Children must open their own connections
+    connections.close_all()
+
+    results = multiprocessing.get_context('fork').Queue()
+    deadline = time.time() + args.seconds
+    processes = [
+        multiprocessing.get_context('fork').Process(target=writer, args=(worker, deadline, results))
+        for worker in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    latencies = sorted(latency for worker_latencies, _errors in outcomes for latency in worker_latencies)
+    errors = sum(worker_errors for _latencies, worker_errors in outcomes)
+    writes = len(latencies)
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0
+    median = statistics.median(latencies) * 1000 if latencies else 0
+    print(f"  {label:<28} {writes / args.seconds:>9.0f} {median:>9.1f} ms {p95:>9.1f} ms {errors:>8}")
+    return errors
+
+
+def with_test_database(options, label, work_dir=None):
+    """Create a throwaway database with these OPTIONS, run the load, drop it"""
+    settings_dict = connection.settings_dict
+    original = settings_dict.get('OPTIONS', {})
+    settings_dict['OPTIONS'] = options
+    if connection.vendor == 'sqlite':
+        settings_dict['TEST']['NAME'] = os.path.join(work_dir, f'{len(os.listdir(work_dir))}.sqlite3')
+    connection.close()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        return run(label)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        settings_dict['OPTIONS'] = original
+
+
+def main():
+    print(f"{args.workers} writer processes for {args.seconds:.0f}s each, "
+          f"{connection.vendor} ({connection.settings_dict['ENGINE']}):")
+    print(f"  {'settings':<28} {'writes/s':>9} {'median':>12} {'p95':>12} {'failed':>8}")
+    work_dir = tempfile.mkdtemp(prefix='sirts_write_benchmark_') if connection.vendor == 'sqlite' else None
+    try:
+        failed = with_test_database(dict(connection.settings_dict.get('OPTIONS', {})), 'profile', work_dir)
+        if args.compare and connection.vendor == 'sqlite':
+            with_test_database(LEGACY_SQLITE_OPTIONS, 'plain SQLite (before)', work_dir)
+    finally:
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    if failed:
+        print("FAILED: writes failed under the configured profile")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Benchmark for the composite Incident indexes (migration 0017).
+
+Seeds a throwaway SQLite database with fake incidents, then runs the queries
+used by home, admin_dashboard, incident_calendar_data and incident_monitor
+with and without the indexes. Prints the SQLite query plan and timing for each.
+The project database (db.sqlite3) is never touched.
+
+Usage:
+    python benchmark_incident_indexes.py [--rows N] [--db PATH] [--repeat N]
+
+Example:
+    python benchmark_incident_indexes.py --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+# Setup Django against a separate benchmark database
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SIRTS.settings')
+
+parser = argparse.ArgumentParser(description='Benchmark Incident composite indexes on SQLite')
+parser.add_argument('--rows', type=int, default=1_000_000, help='Number of incidents to seed (default: 1,000,000)')
+parser.add_argument('--db', default=os.path.join(tempfile.gettempdir(), 'sirts_index_benchmark.sqlite3'),
+                    help='Path of the throwaway benchmark database')
+parser.add_argument('--repeat', type=int, default=20, help='Runs per query when timing (default: 20)')
+args = parser.parse_args()
+
+from django.conf import settings  # noqa: E402
+
+settings.DATABASES['default'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': args.db,
+}
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from incidents.models import Incident  # noqa: E402
+
+STATUSES = ['Open', 'In Progress', 'Resolved', 'Closed']
+CATEGORIES = ['Hardware', 'Software', 'Network', 'Account', 'Other', None]
+USER_COUNT = 500
+STAFF_COUNT = 20
+
+
+def seed(rows):
+    """Create users and bulk insert incidents with raw SQL (much faster than the ORM)"""
+    print(f"Seeding {rows:,} incidents into {args.db} ...")
+    start = time.perf_counter()
+    users = [User(username=f'bench_user_{i}') for i in range(USER_COUNT)]
+    users += [User(username=f'bench_staff_{i}', is_staff=True) for i in range(STAFF_COUNT)]
+    User.objects.bulk_create(users)
+    user_ids = list(User.objects.filter(is_staff=False).values_list('id', flat=True))
+    staff_ids = list(User.objects.filter(is_staff=True).values_list('id', flat=True))
+
+    table = Incident._meta.db_table
+    sql = (
+        f'INSERT INTO {table} (user_id, title, description, status, created_at, '
+        f'it_acknowledged, it_acknowledged_by_id, laptop_serial, category) '
+        f'VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)'
+    )
+    rng = random.Random(42)
+    now = datetime.now(dt_timezone.utc)
+    batch = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for i in range(rows):
+            status = rng.choice(STATUSES)
+            acknowledged = status != 'Open' or rng.random() < 0.1
+            batch.append((
+                rng.choice(user_ids),
+                f'Benchmark incident {i}',
+                'Seeded by benchmark_incident_indexes.py',
+                status,
+                (now - timedelta(minutes=rng.randrange(5 * 365 * 24 * 60))).isoformat(),
+                acknowledged,
+                rng.choice(staff_ids) if acknowledged else None,
+                f'SN{rng.randrange(rows // 20 or 1):07d}',
+                rng.choice(CATEGORIES),
+            ))
+            if len(batch) == 10_000:
+                cursor.executemany(sql, batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+    print(f"  done in {time.perf_counter() - start:.1f}s")
+    return user_ids, staff_ids
+
+
+def build_queries(user_id, staff_id, serial):
+    """The ORM querysets issued by the hot views"""
+    recent = datetime.now(dt_timezone.utc) - timedelta(days=7)
+    return [
+        ('home: own tickets, newest first',
+         Incident.objects.filter(user_id=user_id).order_by('-created_at', '-id')[:10]),
+        ('incident_monitor: own open tickets',
+         Incident.objects.filter(user_id=user_id, status='Open').values('id')),
+        ('admin_dashboard: unassigned open tickets',
+         Incident.objects.filter(status='Open', it_acknowledged=False).order_by('-created_at')[:10]),
+        ('admin_dashboard: my active tickets',
+         Incident.objects.filter(it_acknowledged_by_id=staff_id, status='In Progress').order_by('-created_at')[:10]),
+        ('admin_dashboard: serial history',
+         Incident.objects.filter(laptop_serial=serial).order_by('-created_at')[:10]),
+        ('admin_dashboard: medium priority',
+         Incident.objects.filter(category='Software').order_by('-created_at')[:10]),
+        ('admin_dashboard: global view, newest first',
+         Incident.objects.order_by('-created_at')[:10]),
+        ('incident_calendar_data: staff scope',
+         Incident.objects.filter(it_acknowledged_by_id=staff_id).values('id', 'status', 'created_at')),
+        ('created_at range (last 7 days)',
+         Incident.objects.filter(created_at__gte=recent).values('id')),
+    ]
+
+
+def explain(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return ' | '.join(row[-1] for row in cursor.fetchall())
+
+
+def timed(queryset, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        list(queryset._chain())
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(label, queries):
+    print(f"\n{'=' * 70}\n{label}\n{'=' * 70}")
+    results = {}
+    for name, queryset in queries:
+        plan = explain(queryset)
+        ms = timed(queryset, args.repeat)
+        results[name] = ms
+        print(f"\n{name}\n  plan: {plan}\n  time: {ms:.2f} ms")
+    return results
+
+
+def main():
+    if os.path.exists(args.db):
+        os.remove(args.db)
+
+    # Build the schema, then step back to the migration before the composite indexes
+    call_command('migrate', verbosity=0)
+    call_command('migrate', 'incidents', '0016', verbosity=0)
+
+    user_ids, staff_ids = seed(args.rows)
+    serial = Incident.objects.values_list('laptop_serial', flat=True).first()
+    queries = build_queries(user_ids[0], staff_ids[0], serial)
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    before = run('WITHOUT composite indexes (migration 0016)', queries)
+
+    start = time.perf_counter()
+    call_command('migrate', 'incidents', '0017', verbosity=0)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    print(f"\nApplied 0017_incident_composite_indexes in {time.perf_counter() - start:.1f}s")
+    after = run('WITH composite indexes (migration 0017)', queries)
+
+    print(f"\n{'=' * 70}\nSummary ({args.rows:,} rows, mean of {args.repeat} runs)\n{'=' * 70}")
+    for name, _queryset in queries:
+        speedup = before[name] / after[name] if after[name] else float('inf')
+        print(f"  {name:<45} {before[name]:>9.2f} ms -> {after[name]:>8.2f} ms  ({speedup:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark for bulk n8n incident ingestion (incidents/ingest.py).
+
+Replays a queue of new incidents the way n8n would after an outage, through
+the Django test client: once with one POST per incident to
+/webhook-test/new-incident/, once in batches to /webhook-test/new-incidents/.
+Reporters are a mix of user_id, username, email and unknown users, with
+EmployeeProfiles to snapshot.
+
+Runs against the configured database profile (DB_ENGINE, see
+SIRTS/settings.py) in a throwaway database created the way the test runner
+does (test_<NAME> on PostgreSQL, a temporary file on SQLite) and dropped at
+the end. The project database is never touched.
+
+Usage:
+    python benchmark_incident_ingest.py [--incidents N] [--batch-size N] [--single N]
+
+Example:
+    DB_ENGINE=postgresql DB_HOST=localhost python benchmark_incident_ingest.py --incidents 50000
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+# Setup Django
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SIRTS.settings')
+
+parser = argparse.ArgumentParser(description='Benchmark one-by-one vs bulk n8n incident ingestion')
+parser.add_argument('--incidents', type=int, default=10_000, help='Incidents to ingest in bulk (default: 10,000)')
+parser.add_argument('--batch-size', type=int, default=1000, help='Incidents per bulk request (default: 1000)')
+parser.add_argument('--single', type=int, default=1000,
+                    help='Incidents to send one request at a time, for comparison (default: 1000)')
+args = parser.parse_args()
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from incidents.models import EmployeeProfile, Incident  # noqa: E402
+
+settings.ALLOWED_HOSTS = ['testserver']
+USERS = 200
+
+
+def seed_users():
+    users = User.objects.bulk_create(
+        [User(username=f'ingest_user_{i}', email=f'ingest_user_{i}@example.com') for i in range(USERS)]
+    )
+    users = list(User.objects.filter(username__startswith='ingest_user_'))
+    EmployeeProfile.objects.bulk_create([
+        EmployeeProfile(user=user, department='IT', laptop_model='ThinkPad T14', laptop_serial=f'SN{user.pk:06d}')
+        for user in users
+    ])
+    return users
+
+
+def payloads(count, users, rng):
+    items = []
+    for i in range(count):
+        user = rng.choice(users)
+        reporter = rng.choice([
+            {'user_id': user.pk}, {'username': user.username}, {'email': user.email}, {'username': 'unknown_reporter'},
+        ])
+        items.append({
+            'title': f'Queued incident {i}',
+            'description': 'Replayed from the n8n queue after an outage',
+            'status': 'Resolved' if i % 10 == 0 else 'Open',
+            **reporter,
+        })
+    return items
+
+
+def timed(label, count, send):
+    before = Incident.objects.count()
+    start = time.perf_counter()
+    send()
+    elapsed = time.perf_counter() - start
+    created = Incident.objects.count() - before
+    print(f"  {label:<34} {created:>8,} {elapsed:>9.2f} s {created / elapsed:>12,.0f}/s")
+    return created == count
+
+
+def main():
+    work_dir = None
+    if connection.vendor == 'sqlite':
+        work_dir = tempfile.mkdtemp(prefix='sirts_ingest_benchmark_')
+        connection.settings_dict['TEST']['NAME'] = os.path.join(work_dir, 'db.sqlite3')
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    ok = True
+    try:
+        rng = random.Random(42)
+        users = seed_users()
+        client = Client()
+        print(f"Ingesting incidents on {connection.vendor}:")
+        print(f"  {'endpoint':<34} {'created':>8} {'time':>11} {'incidents/sec':>14}")
+
+        single = payloads(args.single, users, rng)
+
+        def one_by_one():
+            for item in single:
+                client.post('/webhook-test/new-incident/', json.dumps(item), content_type='application/json')
+
+        ok &= timed('new-incident/ (one per request)', len(single), one_by_one)
+
+        bulk = payloads(args.incidents, users, rng)
+
+        def batched():
+            for start in range(0, len(bulk), args.batch_size):
+                response = client.post(
+                    '/webhook-test/new-incidents/',
+                    json.dumps({'incidents': bulk[start:start + args.batch_size]}),
+                    content_type='application/json',
+                )
+                if response.status_code != 201:
+                    raise SystemExit(f'Bulk request failed: {response.status_code} {response.content[:200]!r}')
+
+        ok &= timed(f'new-incidents/ ({args.batch_size} per request)', len(bulk), batched)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    if not ok:
+        print("MISMATCH: not every incident was created")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark for keyset pagination of the incident list (incidents/keyset.py).
+
+Seeds a throwaway SQLite database with fake incidents, then times fetching
+page 1, 100, 1,000 and 10,000 of the global newest-first list the way the
+dashboard's Paginator does it (COUNT + OFFSET/LIMIT) and the way
+/api/incidents/ does it (WHERE on the (created_at, id) cursor + LIMIT).
+The project database (db.sqlite3) is never touched.
+
+Usage:
+    python benchmark_incident_pagination.py [--rows N] [--page-size N] [--repeat N]
+
+Example:
+    python benchmark_incident_pagination.py --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+# Setup Django against a separate benchmark database
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SIRTS.settings')
+
+parser = argparse.ArgumentParser(description='Benchmark OFFSET vs keyset pagination of incidents')
+parser.add_argument('--rows', type=int, default=1_000_000, help='Number of incidents to seed (default: 1,000,000)')
+parser.add_argument('--page-size', type=int, default=50, help='Incidents per page (default: 50)')
+parser.add_argument('--repeat', type=int, default=10, help='Runs per page when timing (default: 10)')
+args = parser.parse_args()
+
+work_dir = tempfile.mkdtemp(prefix='sirts_pagination_benchmark_')
+
+from django.conf import settings  # noqa: E402
+
+settings.DATABASES['default'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.path.join(work_dir, 'db.sqlite3'),
+}
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.core.paginator import Paginator  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from incidents import keyset  # noqa: E402
+from incidents.models import Incident  # noqa: E402
+
+PAGES = [1, 100, 1_000, 10_000]
+
+
+def seed(rows):
+    """Bulk insert incidents with raw SQL (much faster than the ORM)"""
+    print(f"Seeding {rows:,} incidents ...")
+    start = time.perf_counter()
+    user = User.objects.create(username='bench_user')
+    table = Incident._meta.db_table
+    sql = (
+        f'INSERT INTO {table} (user_id, title, description, status, created_at, it_acknowledged) '
+        f'VALUES (%s, %s, %s, %s, %s, %s)'
+    )
+    rng = random.Random(42)
+    now = datetime.now(dt_timezone.utc)
+    batch = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for i in range(rows):
+            # Whole minutes, so plenty of incidents share a created_at and the id tiebreak matters;
+            # written the way Django stores datetimes in SQLite (naive UTC)
+            created_at = now.replace(second=0, microsecond=0) - timedelta(minutes=rng.randrange(rows // 4 or 1))
+            batch.append((user.id, f'Benchmark incident {i}', '', 'Open', created_at.strftime('%Y-%m-%d %H:%M:%S'), False))
+            if len(batch) == 10_000:
+                cursor.executemany(sql, batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+        cursor.execute('ANALYZE')
+    print(f"  done in {time.perf_counter() - start:.1f}s")
+
+
+def offset_page(number):
+    """What admin_dashboard does: Paginator runs a COUNT, then OFFSET/LIMIT"""
+    paginator = Paginator(Incident.objects.order_by(*keyset.ORDERING), args.page_size)
+    return [incident.id for incident in paginator.get_page(number).object_list]
+
+
+def timed(fn, *fn_args):
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        result = fn(*fn_args)
+    return (time.perf_counter() - start) / args.repeat * 1000, result
+
+
+def main():
+    call_command('migrate', verbosity=0)
+    seed(args.rows)
+    last_page = -(-args.rows // args.page_size)
+
+    print(f"\nPage of {args.page_size} from {args.rows:,} incidents, newest first (mean of {args.repeat} runs):")
+    print(f"  {'page':>8}  {'COUNT + OFFSET':>15}  {'keyset cursor':>14}")
+    mismatches = 0
+    for number in [page for page in PAGES if page <= last_page]:
+        # The cursor a client would hold after reading the previous page
+        cursor = None
+        if number > 1:
+            previous = Incident.objects.order_by(*keyset.ORDERING)[(number - 1) * args.page_size - 1]
+            cursor = keyset.encode_cursor(previous.created_at, previous.pk)
+
+        offset_ms, offset_ids = timed(offset_page, number)
+        keyset_ms, (rows, _next) = timed(keyset.paginate, Incident.objects.all(), cursor, args.page_size)
+        if offset_ids != [incident.id for incident in rows]:
+            mismatches += 1
+        print(f"  {number:>8,}  {offset_ms:>12.2f} ms  {keyset_ms:>11.2f} ms")
+
+    shutil.rmtree(work_dir, ignore_errors=True)
+    if mismatches:
+        print("MISMATCH: keyset pages differ from OFFSET pages")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark for the full-text incident search (incidents/search.py, migration 0024).
+
+Seeds a throwaway SQLite database with fake incidents and comments, builds the
+FTS5 index, then times a dashboard search (match count + best 10 by rank) and
+compares it with the icontains filters the dashboard and admin used before.
+The project database (db.sqlite3) is never touched.
+
+Usage:
+    python benchmark_incident_search.py [--rows N] [--repeat N]
+
+Example:
+    python benchmark_incident_search.py --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+# Setup Django against a separate benchmark database
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SIRTS.settings')
+
+parser = argparse.ArgumentParser(description='Benchmark full-text vs icontains incident search')
+parser.add_argument('--rows', type=int, default=1_000_000, help='Number of incidents to seed (default: 1,000,000)')
+parser.add_argument('--repeat', type=int, default=5, help='Runs per query when timing (default: 5)')
+args = parser.parse_args()
+
+work_dir = tempfile.mkdtemp(prefix='sirts_search_benchmark_')
+
+from django.conf import settings  # noqa: E402
+
+settings.DATABASES['default'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.path.join(work_dir, 'db.sqlite3'),
+}
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.db.models import Q  # noqa: E402
+from incidents import search  # noqa: E402
+from incidents.models import Comment, Incident  # noqa: E402
+
+SUBJECTS = ['printer', 'laptop', 'monitor', 'keyboard', 'vpn', 'wifi', 'outlook', 'teams', 'password',
+            'docking station', 'badge reader', 'scanner', 'projector', 'headset', 'excel', 'sharepoint']
+PROBLEMS = ['not working', 'very slow', 'keeps crashing', 'jammed', 'no signal', 'cannot connect',
+            'shows an error', 'flickering', 'locked out', 'overheating', 'freezes on startup']
+FILLER = ('since this morning after the update please help the team is blocked and we tried '
+          'restarting twice already it happened last week too on another floor').split()
+QUERIES = ['printer jammed', 'vpn', 'sharepoint error', 'overheat', 'zebra']
+
+
+def seed(rows):
+    """Bulk insert incidents and comments with raw SQL (much faster than the ORM)"""
+    print(f"Seeding {rows:,} incidents ...")
+    start = time.perf_counter()
+    user = User.objects.create(username='bench_user')
+    rng = random.Random(42)
+    now = datetime.now(dt_timezone.utc)
+    incident_sql = (
+        f'INSERT INTO {Incident._meta.db_table} (user_id, title, description, status, created_at, '
+        f'it_acknowledged, laptop_serial) VALUES (%s, %s, %s, %s, %s, %s, %s)'
+    )
+    comment_sql = (
+        f'INSERT INTO {Comment._meta.db_table} (incident_id, user_id, message, created_at) '
+        f'VALUES (%s, %s, %s, %s)'
+    )
+    incidents = []
+    comments = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for i in range(1, rows + 1):
+            subject, problem = rng.choice(SUBJECTS), rng.choice(PROBLEMS)
+            created_at = (now - timedelta(minutes=rng.randrange(5 * 365 * 24 * 60))).strftime('%Y-%m-%d %H:%M:%S')
+            incidents.append((
+                user.id, f'{subject} {problem}'.capitalize(),
+                ' '.join([subject, problem] + rng.sample(FILLER, 12)),
+                'Open', created_at, False, f'SN{i:08d}',
+            ))
+            if i % 5 == 0:
+                comments.append((i, user.id, f'{rng.choice(SUBJECTS)} replaced, {" ".join(rng.sample(FILLER, 6))}', created_at))
+            if len(incidents) == 10_000:
+                cursor.executemany(incident_sql, incidents)
+                cursor.executemany(comment_sql, comments)
+                incidents, comments = [], []
+        cursor.executemany(incident_sql, incidents)
+        cursor.executemany(comment_sql, comments)
+    print(f"  done in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    with transaction.atomic():
+        search.rebuild_index()
+    print(f"  full-text index built in {time.perf_counter() - start:.1f}s")
+
+
+def icontains(query):
+    """What the dashboard/admin did before: LIKE '%word%' over every searched column"""
+    queryset = Incident.objects.all()
+    for term in search.query_terms(query):
+        queryset = queryset.filter(
+            Q(title__icontains=term) | Q(description__icontains=term) |
+            Q(admin_response__icontains=term) | Q(it_status_message__icontains=term) |
+            Q(laptop_serial__icontains=term) |
+            Q(pk__in=Comment.objects.filter(message__icontains=term).values('incident_id'))
+        )
+    return queryset.order_by('-created_at', '-id')
+
+
+def full_text(query):
+    return search.search_incidents(Incident.objects.all(), query).order_by('-search_rank', '-created_at', '-id')
+
+
+def timed(build, query):
+    """Like one dashboard page: COUNT of the matches, then the first 10 rows"""
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        queryset = build(query)
+        count = queryset.count()
+        page = list(queryset.values_list('id', flat=True)[:10])
+    return (time.perf_counter() - start) / args.repeat * 1000, count, page
+
+
+def main():
+    call_command('migrate', verbosity=0)
+    seed(args.rows)
+
+    print(f"\nSearch {args.rows:,} incidents: match count + top 10 (mean of {args.repeat} runs):")
+    print(f"  {'query':<18} {'matches':>9}  {'icontains':>12}  {'full-text':>10}")
+    for query in QUERIES:
+        like_ms, like_count, _page = timed(icontains, query)
+        fts_ms, fts_count, _page = timed(full_text, query)
+        print(f"  {query!r:<18} {fts_count:>9,}  {like_ms:>9.1f} ms  {fts_ms:>7.1f} ms"
+              f"{'' if fts_count == like_count else f'  (icontains: {like_count:,})'}")
+
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark for quarantining a user through the UserSession index (migration 0020).
+
+Seeds a throwaway SQLite database with many logged-in sessions spread over
+many users, then times the old approach (decode every active session) against
+incidents.user_sessions.delete_user_sessions (indexed DELETEs).
+The project database (db.sqlite3) is never touched.
+
+Usage:
+    python benchmark_session_quarantine.py [--sessions N] [--users N]
+
+Example:
+    python benchmark_session_quarantine.py --sessions 100000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+# Setup Django against a separate benchmark database
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SIRTS.settings')
+
+parser = argparse.ArgumentParser(description='Benchmark user quarantine with and without the session index')
+parser.add_argument('--sessions', type=int, default=100_000, help='Active sessions to seed (default: 100,000)')
+parser.add_argument('--users', type=int, default=5_000, help='Users the sessions belong to (default: 5,000)')
+args = parser.parse_args()
+
+work_dir = tempfile.mkdtemp(prefix='sirts_session_benchmark_')
+
+from django.conf import settings  # noqa: E402
+
+settings.DATABASES['default'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.path.join(work_dir, 'db.sqlite3'),
+}
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.contrib.sessions.backends.db import SessionStore  # noqa: E402
+from django.contrib.sessions.models import Session  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from incidents.models import UserSession  # noqa: E402
+from incidents.user_sessions import delete_user_sessions  # noqa: E402
+
+
+def seed():
+    print(f"Seeding {args.sessions:,} sessions for {args.users:,} users ...")
+    start = time.perf_counter()
+    User.objects.bulk_create([User(username=f'bench_user_{i}') for i in range(args.users)])
+    user_ids = list(User.objects.values_list('id', flat=True))
+    store = SessionStore()
+    expires = timezone.now() + timedelta(days=14)
+    sessions = []
+    index = []
+    for i in range(args.sessions):
+        user_id = user_ids[i % len(user_ids)]
+        key = f'{i:032x}'
+        data = store.encode({'_auth_user_id': str(user_id), '_auth_user_backend': 'django.contrib.auth.backends.ModelBackend'})
+        sessions.append(Session(session_key=key, session_data=data, expire_date=expires))
+        index.append(UserSession(session_key=key, user_id=user_id))
+    with transaction.atomic():
+        Session.objects.bulk_create(sessions, batch_size=5000)
+        UserSession.objects.bulk_create(index, batch_size=5000)
+    print(f"  done in {time.perf_counter() - start:.1f}s")
+    return user_ids
+
+
+def decode_scan(user):
+    """The previous _delete_user_sessions: decode every active session"""
+    deleted = 0
+    for session in Session.objects.filter(expire_date__gte=timezone.now()):
+        session_user_id = session.get_decoded().get('_auth_user_id')
+        if session_user_id and str(user.pk) == str(session_user_id):
+            session.delete()
+            deleted += 1
+    return deleted
+
+
+def main():
+    call_command('migrate', verbosity=0)
+    user_ids = seed()
+    sessions_per_user = args.sessions // len(user_ids)
+
+    start = time.perf_counter()
+    scanned = decode_scan(User.objects.get(pk=user_ids[0]))
+    scan_ms = (time.perf_counter() - start) * 1000
+
+    connection.queries_log.clear()
+    settings.DEBUG = True
+    start = time.perf_counter()
+    indexed = delete_user_sessions(user_ids[1])[user_ids[1]]
+    index_ms = (time.perf_counter() - start) * 1000
+    queries = len(connection.queries)
+    settings.DEBUG = False
+
+    print(f"\nQuarantine one user ({sessions_per_user} session(s)) among {args.sessions:,} active sessions:")
+    print(f"  decode every session: {scan_ms:>10.1f} ms  ({scanned} deleted)")
+    print(f"  UserSession index:    {index_ms:>10.1f} ms  ({indexed} deleted, {queries} queries)")
+    print(f"  speedup: {scan_ms / index_ms:.0f}x")
+
+    left = Session.objects.filter(session_key__in=UserSession.objects.filter(user_id=user_ids[1]).values('session_key')).count()
+    shutil.rmtree(work_dir, ignore_errors=True)
+    if scanned != sessions_per_user or indexed != sessions_per_user or left:
+        print("MISMATCH")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,11 +2,23 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin, GroupAdmin as BaseGroupAdmin
 from django.contrib.auth.models import User, Group
 from django.contrib.admin import DateFieldListFilter
+from django.contrib.admin.views.main import ORDER_VAR
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
-from django.db.models import Q, Count
+from django.utils.decorators import method_decorator
+from django.db.models import Q, Count, FloatField, Value
 from datetime import datetime, timedelta
 from .models import Incident, EmployeeProfile, UserProfile, Comment, CommentRead
+from .replicas import reads_from_replica
+from .search import matching_ids, query_terms, search_incidents
+
+class ReplicaChangeListMixin:
+    """List pages read from the read replica, if one is configured (see incidents/replicas.py)"""
+
+    @method_decorator(reads_from_replica())
+    def changelist_view(self, request, extra_context=None):
+        return super().changelist_view(request, extra_context)
+
 
 # Custom Date Range Filter
 class DateRangeFilter(admin.SimpleListFilter):
@@ -201,7 +213,7 @@ class CommentReadInline(admin.TabularInline):
     # Note: Don't set max_num = 0 as it prevents existing records from displaying
 
 # 6. Define custom Incident Admin
-class IncidentAdmin(admin.ModelAdmin):
+class IncidentAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = (
         'id', 
         'title', 
@@ -212,7 +224,8 @@ class IncidentAdmin(admin.ModelAdmin):
         'status', 
         'created_at'
     )
-    # Ensure 'user__username' is in search_fields so you can type the name in the search box
+    # search_fields turns the search box on; get_search_results answers it from the full-text index,
+    # which covers these fields plus the admin response, IT status message and comments
     search_fields = ('id', 'title', 'user__username', 'reporter_name', 'description', 'laptop_model', 'laptop_serial', 'department')
     # This makes the user selection a searchable dropdown instead of a long list
     autocomplete_fields = ['user']
@@ -253,6 +266,22 @@ class IncidentAdmin(admin.ModelAdmin):
         
         return qs
     
+    def get_search_results(self, request, queryset, search_term):
+        """Search through the full-text index (see incidents/search.py) instead of icontains on every field"""
+        if not query_terms(search_term):
+            return queryset, False
+        if search_term.strip().isdigit():
+            # Typing a ticket number still finds that ticket (unranked: the OR can't use the rank join)
+            results = queryset.filter(
+                Q(pk__in=matching_ids(search_term)) | Q(pk=int(search_term))
+            ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+        else:
+            results = search_incidents(queryset, search_term)
+        if ORDER_VAR not in request.GET:
+            # Best matches first, unless a column header was clicked
+            results = results.order_by('-search_rank', *queryset.query.order_by)
+        return results, False
+    
     def changelist_view(self, request, extra_context=None):
         extra_context = extra_context or {}
         # Get all users who have reported incidents (for dropdown)
@@ -337,7 +366,7 @@ class IncidentAdmin(admin.ModelAdmin):
     get_user_with_id.admin_order_field = 'user__username'
 
 # 7. Define Comment Admin (standalone - hidden from admin interface)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = ('id', 'incident', 'user', 'created_at', 'message_preview')
     list_filter = ('created_at', 'user', 'incident')
     search_fields = ('message', 'user__username', 'incident__title', 'incident__id')
@@ -355,7 +384,7 @@ class CommentAdmin(admin.ModelAdmin):
         return {}
 
 # 8. Define CommentRead Admin (standalone - hidden from admin interface)
-class CommentReadAdmin(admin.ModelAdmin):
+class CommentReadAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = ('id', 'user', 'incident', 'last_read_at')
     list_filter = ('last_read_at', 'user', 'incident')
     search_fields = ('user__username', 'incident__title', 'incident__id')
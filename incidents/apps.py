@@ -1,5 +1,32 @@
+import sys
+
 from django.apps import AppConfig
 
 class IncidentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'incidents'
\ No newline at end of file
+    name = 'incidents'
+
+    def ready(self):
+        # Register signal handlers (unread counters, attachments, session index, role cache)
+        from . import signals  # noqa: F401
+        self.configure_classifier_cache()
+
+    def configure_classifier_cache(self):
+        """Size the classifier's prediction cache and attach the shared cache, if configured"""
+        from django.conf import settings
+
+        maxsize = getattr(settings, 'CLASSIFIER_CACHE_SIZE', None)
+        alias = getattr(settings, 'CLASSIFIER_SHARED_CACHE', None)
+        if maxsize is None and not alias:
+            return
+        # ticket_classifier.py lives in the project root; importing it does not load sklearn
+        if str(settings.BASE_DIR) not in sys.path:
+            sys.path.insert(0, str(settings.BASE_DIR))
+        import ticket_classifier
+        from django.core.cache import caches
+
+        ticket_classifier.configure_cache(
+            maxsize=maxsize,
+            shared=caches[alias] if alias else None,
+            timeout=getattr(settings, 'CLASSIFIER_SHARED_CACHE_TIMEOUT', None),
+        )
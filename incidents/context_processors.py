@@ -1,40 +1,26 @@
-from .models import Incident, Comment, CommentRead
-from django.contrib.auth.models import Group
+from . import roles
+from .models import Incident
+from .unread_counters import get_unread_mail_count
 
 def incident_monitor(request):
     """
     Counts ONLY 'Open' tickets that belong to the logged-in user.
     Also provides manager check for template access.
+    Runs a fixed number of queries regardless of how many tickets the user has.
     """
     context = {'pending_count': 0, 'mail_count': 0, 'is_manager': False}
-    
+
     if request.user.is_authenticated:
         # 1. Filter by User (request.user)
         # 2. Filter by Status ('Open')
         count = Incident.objects.filter(user=request.user, status='Open').count()
         context['pending_count'] = count
 
-        # Unread "mail" count: comments from other users on user's own incidents
-        user_incidents = Incident.objects.filter(user=request.user)
-        unread_total = 0
-        for incident in user_incidents:
-            try:
-                read_state = CommentRead.objects.get(user=request.user, incident=incident)
-                unread_total += Comment.objects.filter(
-                    incident=incident,
-                    created_at__gt=read_state.last_read_at
-                ).exclude(user=request.user).count()
-            except CommentRead.DoesNotExist:
-                unread_total += Comment.objects.filter(
-                    incident=incident
-                ).exclude(user=request.user).count()
-        context['mail_count'] = unread_total
-        
-        # Check if user is a manager (in Manager group)
-        try:
-            manager_group = Group.objects.get(name='Manager')
-            context['is_manager'] = manager_group in request.user.groups.all()
-        except Group.DoesNotExist:
-            context['is_manager'] = False
-    
-    return context
\ No newline at end of file
+        # Unread "mail" count: comments from other users on user's own incidents.
+        # Maintained incrementally in UnreadMailbox, so this is a primary-key lookup.
+        context['mail_count'] = get_unread_mail_count(request.user)
+
+        # Check if user is a manager (in Manager group); shared with the view via the request
+        context['is_manager'] = roles.is_manager(request)
+
+    return context
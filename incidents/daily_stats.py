@@ -0,0 +1,168 @@
+"""
+Helpers that keep IncidentDailyStat in step with Incident.
+
+Each row counts the incidents reported on one day with one combination of
+status, category, department and assignee. Saving or deleting an incident moves
+it between rows (see signals.py), so period counts and the calendar heatmap sum
+a few hundred rollup rows instead of scanning incidents. Bulk writes that skip
+signals must call apply_changes() themselves; rebuild_daily_stats fixes drift.
+"""
+
+from collections import Counter, namedtuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Incident, IncidentDailyStat
+
+# Incident fields that decide which rollup row an incident is counted in
+KEY_FIELDS = ('created_at', 'status', 'category', 'department', 'it_acknowledged_by_id')
+
+StatKey = namedtuple('StatKey', ['day', 'status', 'category', 'department', 'assignee'])
+
+
+def stat_key(created_at, status, category, department, assignee_id):
+    """Rollup row key for an incident's values."""
+    return StatKey(
+        timezone.localdate(created_at),
+        status,
+        category or '',
+        department or '',
+        assignee_id or 0,
+    )
+
+
+def incident_key(incident):
+    """Rollup row key for an incident, or None if any key field was not loaded."""
+    values = incident.__dict__
+    if incident.pk is None or any(field not in values for field in KEY_FIELDS):
+        return None
+    if values['created_at'] is None:
+        return None
+    return stat_key(*(values[field] for field in KEY_FIELDS))
+
+
+def stored_key(incident_id):
+    """Rollup row key for an incident as it is currently saved."""
+    row = Incident.objects.filter(pk=incident_id).values_list(*KEY_FIELDS).first()
+    return stat_key(*row) if row else None
+
+
+def apply_changes(changes):
+    """
+    Move incidents between rollup rows.
+
+    Args:
+        changes: iterable of (old_key, new_key); None for old_key means the
+            incident is new, None for new_key means it was deleted
+    """
+    deltas = Counter()
+    for old_key, new_key in changes:
+        if old_key == new_key:
+            continue
+        if old_key is not None:
+            deltas[old_key] -= 1
+        if new_key is not None:
+            deltas[new_key] += 1
+
+    with transaction.atomic():
+        for key, delta in deltas.items():
+            if not delta:
+                continue
+            fields = StatKey(*key)._asdict()
+            if IncidentDailyStat.objects.filter(**fields).update(count=F('count') + delta):
+                continue
+            try:
+                with transaction.atomic():
+                    IncidentDailyStat.objects.create(count=delta, **fields)
+            except IntegrityError:
+                # Created by a concurrent save in the meantime
+                IncidentDailyStat.objects.filter(**fields).update(count=F('count') + delta)
+
+
+def compute_daily_stats():
+    """Recount every rollup row from Incident: {key: count}"""
+    rows = (
+        Incident.objects.annotate(day=TruncDate('created_at'))
+        .values('day', 'status', 'category', 'department', 'it_acknowledged_by_id')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    counts = Counter()
+    for row in rows:
+        key = (row['day'], row['status'], row['category'] or '', row['department'] or '',
+               row['it_acknowledged_by_id'] or 0)
+        # None and '' category/department fold into the same row
+        counts[key] += row['total']
+    return dict(counts)
+
+
+def rebuild_daily_stats(expected=None):
+    """Replace every rollup row with a fresh recount; returns the number of rows."""
+    if expected is None:
+        expected = compute_daily_stats()
+    with transaction.atomic():
+        IncidentDailyStat.objects.all().delete()
+        IncidentDailyStat.objects.bulk_create([
+            IncidentDailyStat(day=day, status=status, category=category, department=department,
+                              assignee=assignee, count=count)
+            for (day, status, category, department, assignee), count in expected.items()
+        ], batch_size=1000)
+    return len(expected)
+
+
+def daily_stats(day_from=None, day_to=None, assignee=None, status=None, category_filter=None):
+    """
+    IncidentDailyStat rows narrowed to a date range and scope.
+
+    Args:
+        day_from, day_to (date): inclusive bounds (None = open-ended)
+        assignee (int): only incidents acknowledged by this user ID
+        status (str): only this status
+        category_filter (Q): extra filter on the category column
+    """
+    rows = IncidentDailyStat.objects.all()
+    if day_from:
+        rows = rows.filter(day__gte=day_from)
+    if day_to:
+        rows = rows.filter(day__lte=day_to)
+    if assignee is not None:
+        rows = rows.filter(assignee=assignee)
+    if status:
+        rows = rows.filter(status=status)
+    if category_filter is not None:
+        rows = rows.filter(category_filter)
+    return rows
+
+
+def summarize(rows, buckets):
+    """
+    Status bucket counts from rollup rows, shaped like get_status_summary().
+
+    Args:
+        rows: IncidentDailyStat queryset (see daily_stats)
+        buckets (dict): name -> Q on status (None counts every row)
+    """
+    aggregates = {
+        name: Sum('count', filter=condition) if condition is not None else Sum('count')
+        for name, condition in buckets.items()
+    }
+    return {name: total or 0 for name, total in rows.order_by().aggregate(**aggregates).items()}
+
+
+def per_day(rows):
+    """Incidents reported per day: [(day, count), ...] in date order, skipping empty days."""
+    return [
+        (row['day'], row['total'])
+        for row in rows.values('day').annotate(total=Sum('count')).filter(total__gt=0).order_by('day')
+    ]
+
+
+# Priority filter on the dashboard -> category filter on the rollup
+PRIORITY_CATEGORIES = {
+    'high': Q(category__in=['Network', 'Account']),
+    'medium': Q(category='Software'),
+    'low': ~Q(category__in=['Network', 'Account', 'Software']),
+}
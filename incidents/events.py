@@ -0,0 +1,215 @@
+"""
+Live incident events for the Server-Sent Events stream (/events/).
+
+publish() is called from signal handlers once the surrounding transaction has
+committed. Events are fanned out in-process to every open stream whose user may
+see them, by the same rule as the dashboard list: managers and staff with the
+view_all_global_tickets permission see everything, other staff only open
+unacknowledged tickets and the ones they acknowledged, and everyone else only
+events on their own incidents. Each event carries the incident's owner_id,
+status, acknowledged and assignee_id for this check.
+
+The stream needs the ASGI server (e.g. `uvicorn SIRTS.asgi:application`). With
+several worker processes, set EVENT_BROKER_ADDRESS and run
+`python manage.py run_event_broker` so events published in one process reach
+streams held by the others. The broker is a small local stand-in for a real
+pub/sub service such as Redis.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import socket
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ('incident_created', 'incident_acknowledged', 'status_changed', 'comment_added')
+
+# Events waiting for a slow client before it starts missing them
+SUBSCRIBER_QUEUE_SIZE = 100
+
+_subscribers = set()
+_subscribers_lock = threading.Lock()
+_sequence = itertools.count(1)
+# Identifies this process, so events coming back from the broker aren't delivered twice
+_origin = uuid.uuid4().hex
+_broker = None
+_broker_lock = threading.Lock()
+
+
+class Subscription:
+    """One open event stream: an asyncio queue on the loop that serves it."""
+
+    def __init__(self, user_id, is_staff, sees_all=False):
+        self.user_id = user_id
+        self.is_staff = is_staff
+        # Manager or view_all_global_tickets, resolved when the stream opened
+        self.sees_all = sees_all
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def wants(self, event):
+        data = event['data']
+        if data.get('owner_id') == self.user_id:
+            return True
+        if not self.is_staff:
+            return False
+        if self.sees_all:
+            return True
+        # The staff global view (unassigned open tickets) plus My Tickets, as in _dashboard_incidents
+        if data.get('assignee_id') == self.user_id:
+            return True
+        return data.get('status') == 'Open' and not data.get('acknowledged')
+
+    def offer(self, event):
+        """Hand an event to the stream (safe to call from any thread)."""
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        if self.queue.full():
+            # Drop the oldest event rather than block publishers on a stalled client
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        with _subscribers_lock:
+            _subscribers.discard(self)
+
+
+def subscribe(user, sees_all=False):
+    """
+    Open a subscription for a user; call from the event loop that will read it.
+
+    Args:
+        sees_all (bool): the user may see every ticket (Manager or
+            view_all_global_tickets, see roles.py)
+    """
+    subscription = Subscription(user.pk, user.is_staff, sees_all)
+    with _subscribers_lock:
+        _subscribers.add(subscription)
+    _get_broker()
+    return subscription
+
+
+def publish(event_type, **data):
+    """
+    Publish an event after the current transaction commits.
+
+    Args:
+        event_type (str): one of EVENT_TYPES
+        **data: event payload; 'owner_id', 'status', 'acknowledged' and
+            'assignee_id' decide who receives it
+    """
+    event = {'type': event_type, 'data': data, 'origin': _origin}
+    transaction.on_commit(lambda: _dispatch(event))
+
+
+def _dispatch(event):
+    event['id'] = f"{_origin[:8]}-{next(_sequence)}"
+    _deliver(event)
+    broker = _get_broker()
+    if broker is not None:
+        broker.send(event)
+
+
+def _deliver(event):
+    with _subscribers_lock:
+        subscribers = list(_subscribers)
+    for subscription in subscribers:
+        if subscription.wants(event):
+            try:
+                subscription.offer(event)
+            except RuntimeError:
+                # Its event loop has closed; the stream is gone
+                subscription.close()
+
+
+def format_event(event):
+    """Serialize an event in the text/event-stream format."""
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+def _get_broker():
+    """The broker connection for this process, started on first use (None if not configured)."""
+    global _broker
+    address = getattr(settings, 'EVENT_BROKER_ADDRESS', None)
+    if not address:
+        return None
+    with _broker_lock:
+        if _broker is None:
+            host, port = address.rsplit(':', 1)
+            _broker = BrokerClient(host, int(port))
+            _broker.start()
+    return _broker
+
+
+class BrokerClient(threading.Thread):
+    """
+    Line-delimited JSON connection to run_event_broker.
+    Sends this process's events and delivers everyone else's; reconnects on failure.
+    Events published while disconnected are only delivered locally.
+    """
+
+    def __init__(self, host, port):
+        super().__init__(name='incident-event-broker', daemon=True)
+        self.address = (host, port)
+        self.sock = None
+        self.send_lock = threading.Lock()
+
+    def send(self, event):
+        line = (json.dumps(event) + '\n').encode('utf-8')
+        with self.send_lock:
+            if self.sock is None:
+                return
+            try:
+                self.sock.sendall(line)
+            except OSError as e:
+                logger.warning('Lost connection to the event broker: %s', e)
+                self._disconnect()
+
+    def _disconnect(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+    def run(self):
+        delay = 1
+        while True:
+            try:
+                sock = socket.create_connection(self.address, timeout=5)
+                sock.settimeout(None)
+            except OSError as e:
+                logger.warning('Event broker at %s:%s unavailable: %s', *self.address, e)
+                time.sleep(delay)
+                delay = min(delay * 2, 30)
+                continue
+            delay = 1
+            with self.send_lock:
+                self.sock = sock
+            try:
+                for line in sock.makefile('rb'):
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    if event.get('origin') != _origin:
+                        _deliver(event)
+            except (OSError, ValueError):
+                # Socket closed by send() after an error
+                pass
+            with self.send_lock:
+                if self.sock is sock:
+                    self._disconnect()
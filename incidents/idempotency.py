@@ -0,0 +1,152 @@
+"""
+Idempotency for the n8n and Telegram callback endpoints.
+
+n8n retries a callback when it doesn't see the response in time, and every
+retry used to post another comment or re-save the incident. Views wrapped in
+@idempotent remember their response under a key, and a repeat of the same
+request gets the stored response back without running the view (no Incident
+read or write).
+
+The key is the endpoint path plus the Idempotency-Key header; responses are
+kept for IDEMPOTENCY_KEY_TTL seconds. Reusing a header key with a different
+body gets a 422 instead of someone else's response. Endpoints that create
+something (a comment) also use @idempotent(dedupe_body=True): without the
+header, a request whose body matches one from the last
+IDEMPOTENCY_PAYLOAD_TTL seconds is treated as a retry. Endpoints that set
+state don't, since Hardware -> Network -> Hardware must apply all three.
+
+Only 2xx responses are stored; anything else (e.g. a 404 for a ticket that
+doesn't exist yet) runs the view again on the next retry. A repeat that
+arrives while the first request is still running gets a 409; that claim
+lasts IDEMPOTENCY_LEASE_SECONDS, so a worker killed mid-request doesn't
+block the key for long.
+
+Expired keys are ignored and overwritten; `python manage.py
+clear_idempotency_keys` deletes them in bulk (run it on a schedule).
+"""
+
+import functools
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+# Rounds of claim/lookup before a key that keeps changing hands is reported busy
+CLAIM_ATTEMPTS = 3
+
+
+def request_key(request, dedupe_body=False):
+    """
+    (key, ttl seconds, request hash) for the request, or None if it isn't deduplicated.
+    The request hash (of the body) tells a retry from a reused header key.
+    """
+    body_hash = hashlib.sha256(request.body).hexdigest()
+    header = request.headers.get(HEADER, '').strip()
+    if header:
+        raw = b'header\n' + request.path.encode('utf-8') + b'\n' + header.encode('utf-8')
+        ttl = getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60)
+    elif dedupe_body:
+        raw = b'body\n' + request.path.encode('utf-8') + b'\n' + body_hash.encode('ascii')
+        ttl = getattr(settings, 'IDEMPOTENCY_PAYLOAD_TTL', 10 * 60)
+    else:
+        return None
+    return hashlib.sha256(raw).hexdigest(), ttl, body_hash
+
+
+def _claim(key, request_hash):
+    """
+    Reserve the key for this request, for IDEMPOTENCY_LEASE_SECONDS.
+
+    Returns:
+        IdempotencyKey: None if the key is ours now, else the live row that holds it
+    """
+    for _attempt in range(CLAIM_ATTEMPTS):
+        now = timezone.now()
+        # A retry of a finished request is a single read: no write lock, no Incident access
+        held = IdempotencyKey.objects.filter(key=key, expires_at__gt=now).first()
+        if held is not None:
+            return held
+        lease_until = now + timedelta(seconds=getattr(settings, 'IDEMPOTENCY_LEASE_SECONDS', 60))
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.create(key=key, request_hash=request_hash, expires_at=lease_until)
+            return None
+        except IntegrityError:
+            pass
+        # Take over an expired row (or an abandoned claim); otherwise a concurrent request just claimed the key
+        if IdempotencyKey.objects.filter(key=key, expires_at__lte=now).update(
+            status_code=0, body=b'', request_hash=request_hash, expires_at=lease_until
+        ):
+            return None
+        held = IdempotencyKey.objects.filter(key=key).first()
+        if held is not None:
+            return held
+        # The holder gave the key up in between (error or non-2xx response): claim it afresh
+    # Still contended after several rounds: answer as if it were in progress
+    return IdempotencyKey(key=key, request_hash=request_hash, status_code=0)
+
+
+def idempotent(view=None, *, dedupe_body=False):
+    """
+    Decorator for JSON POST callbacks: replay the stored response for repeated requests.
+
+    Args:
+        dedupe_body (bool): also treat a request without an Idempotency-Key
+            header as a retry if its body matches a recent one (for endpoints
+            that create something, never for ones that set state)
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(request, *args, **kwargs):
+            claim = request_key(request, dedupe_body)
+            if claim is None:
+                return view(request, *args, **kwargs)
+            key, ttl, request_hash = claim
+            held = _claim(key, request_hash)
+            if held is not None:
+                if held.request_hash and held.request_hash != request_hash:
+                    return JsonResponse({
+                        'success': False,
+                        'error': 'This idempotency key was already used with a different request body'
+                    }, status=422)
+                if not held.status_code:
+                    return JsonResponse({
+                        'success': False,
+                        'error': 'A request with this idempotency key is still being processed'
+                    }, status=409)
+                response = HttpResponse(bytes(held.body), status=held.status_code, content_type='application/json')
+                response[REPLAY_HEADER] = 'true'
+                return response
+
+            try:
+                response = view(request, *args, **kwargs)
+            except Exception:
+                IdempotencyKey.objects.filter(key=key).delete()
+                raise
+            if 200 <= response.status_code < 300 and not response.streaming:
+                IdempotencyKey.objects.filter(key=key).update(
+                    status_code=response.status_code, body=response.content,
+                    expires_at=timezone.now() + timedelta(seconds=ttl),
+                )
+            else:
+                # Not a result worth replaying: let the caller retry for real
+                IdempotencyKey.objects.filter(key=key).delete()
+            return response
+        return wrapped
+
+    if view is not None:
+        return decorator(view)
+    return decorator
+
+
+def clear_expired_keys():
+    """Delete expired idempotency keys; returns the number deleted."""
+    deleted, _per_model = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
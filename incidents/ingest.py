@@ -0,0 +1,188 @@
+"""
+Bulk creation of incidents sent by n8n (e.g. a queue replayed after an outage).
+
+Does what n8n_webhook_new_incident does for one incident, for a whole batch in
+a fixed number of queries: one IN query per user key type (user_id, username,
+email), one for the reporters' EmployeeProfiles, and batched INSERTs in a
+single transaction. bulk_create skips signals, so the daily rollup, the search
+index and the live events are updated here instead (see signals.py).
+"""
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import F
+
+from . import daily_stats, events, search
+from .models import EmployeeProfile, Incident
+
+INSERT_BATCH_SIZE = 1000
+MAX_TITLE_WORDS = 10
+
+# Payload fields copied onto the incident as-is, overriding the profile snapshot
+OVERRIDE_FIELDS = ('laptop_model', 'laptop_serial', 'department', 'reporter_name', 'email')
+# Payload fields stored on the incident, checked for type and column length
+TEXT_FIELDS = ('title', 'description', 'status', *OVERRIDE_FIELDS)
+
+
+def _user_key(item):
+    """(field, value) the item identifies its reporter by, with the single endpoint's precedence"""
+    for field in ('user_id', 'username', 'email'):
+        if field in item:
+            return field, item[field]
+    return None, None
+
+
+def _invalid(item):
+    """Why the item can't be ingested, or None (checked up front so one bad item can't fail the batch)"""
+    if not isinstance(item, dict):
+        return 'Item must be a JSON object'
+    for field in TEXT_FIELDS:
+        value = item.get(field)
+        if value is not None and not isinstance(value, str):
+            return f'{field} must be a string'
+        max_length = Incident._meta.get_field(field).max_length
+        if value and max_length and len(value) > max_length:
+            return f'{field} cannot exceed {max_length} characters'
+    title = item.get('title') or ''
+    if len(title.split()) > MAX_TITLE_WORDS:
+        return f'Issue title cannot exceed {MAX_TITLE_WORDS} words.'
+    field, value = _user_key(item)
+    if field == 'user_id':
+        # isdecimal, not isdigit: int() rejects digits like '²'
+        if isinstance(value, bool) or not str(value).strip().isdecimal():
+            return f'Invalid user_id {value!r}'
+        _min, max_id = connection.ops.integer_field_range(User._meta.pk.get_internal_type())
+        if int(value) > max_id:
+            return f'Invalid user_id {value!r}'
+    if field in ('username', 'email') and not isinstance(value, str):
+        return f'{field} must be a string'
+    return None
+
+
+def _resolve_users(items):
+    """
+    Users referenced by the items, with one query per key type.
+
+    Returns:
+        dict: (field, value) -> User, or -> None for emails shared by several users
+    """
+    wanted = {'user_id': set(), 'username': set(), 'email': set()}
+    for item in items:
+        field, value = _user_key(item)
+        if field == 'user_id':
+            wanted[field].add(int(value))
+        elif field is not None:
+            wanted[field].add(value)
+
+    users = {}
+    only = ('id', 'username', 'email')
+    if wanted['user_id']:
+        for user in User.objects.filter(pk__in=wanted['user_id']).only(*only):
+            users[('user_id', user.pk)] = user
+    if wanted['username']:
+        for user in User.objects.filter(username__in=wanted['username']).only(*only):
+            users[('username', user.username)] = user
+    if wanted['email']:
+        for user in User.objects.filter(email__in=wanted['email']).only(*only):
+            key = ('email', user.email)
+            # Like User.objects.get(email=...), an ambiguous email matches nobody
+            users[key] = None if key in users else user
+    return users
+
+
+def _profiles(user_ids):
+    """user_id -> (laptop_model, laptop_serial, department display name)"""
+    return {
+        profile.user_id: (profile.laptop_model, profile.laptop_serial, profile.get_department_display())
+        for profile in EmployeeProfile.objects.filter(user_id__in=user_ids).only(
+            'user_id', 'laptop_model', 'laptop_serial', 'department'
+        )
+    }
+
+
+def ingest_incidents(items):
+    """
+    Create an incident for every valid item.
+
+    Args:
+        items (list): n8n_webhook_new_incident payloads (dicts)
+
+    Returns:
+        list: one result per item, in order: {'index', 'success': True, 'incident_id', ...}
+            or {'index', 'success': False, 'error'}
+    """
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        error = _invalid(item)
+        if error:
+            results[index] = {'index': index, 'success': False, 'error': error}
+        else:
+            valid.append((index, item))
+    if not valid:
+        return results
+
+    users = _resolve_users(item for _index, item in valid)
+    system_user = None
+    reporters = []
+    for _index, item in valid:
+        field, value = _user_key(item)
+        user = users.get((field, int(value) if field == 'user_id' else value))
+        if user is None:
+            if system_user is None:
+                # Unknown reporters fall back to the system user, created once per batch
+                system_user, _created = User.objects.get_or_create(
+                    username='system', defaults={'email': 'system@example.com'}
+                )
+            user = system_user
+        reporters.append(user)
+    profiles = _profiles({user.pk for user in reporters})
+
+    incidents = []
+    for (_index, item), user in zip(valid, reporters):
+        incident = Incident(
+            user=user,
+            title=item.get('title') or 'Incident from n8n',
+            description=item.get('description') or 'Reported via n8n webhook',
+            status=item.get('status', 'Open'),
+        )
+        if user.pk in profiles:
+            incident.laptop_model, incident.laptop_serial, incident.department = profiles[user.pk]
+        for field in OVERRIDE_FIELDS:
+            if field in item:
+                setattr(incident, field, item[field])
+        incidents.append(incident)
+
+    with transaction.atomic():
+        Incident.objects.bulk_create(incidents, batch_size=INSERT_BATCH_SIZE)
+        resolved = [incident.pk for incident in incidents if incident.status == 'Resolved']
+        if resolved:
+            # Resolved on arrival: resolved at the moment it was reported
+            Incident.objects.filter(pk__in=resolved).update(resolved_at=F('created_at'))
+
+        # What the post_save signal handlers would have done
+        daily_stats.apply_changes((None, daily_stats.incident_key(incident)) for incident in incidents)
+        ids = [incident.pk for incident in incidents]
+        for start in range(0, len(ids), search.INDEX_BATCH_SIZE):
+            search.index_incidents(ids[start:start + search.INDEX_BATCH_SIZE])
+        for incident in incidents:
+            events.publish(
+                'incident_created',
+                incident_id=incident.pk, owner_id=incident.user_id,
+                title=incident.title, status=incident.status,
+                acknowledged=incident.it_acknowledged, assignee_id=incident.it_acknowledged_by_id,
+            )
+
+    for (index, _item), incident in zip(valid, incidents):
+        results[index] = {
+            'index': index,
+            'success': True,
+            'incident_id': incident.pk,
+            'ticket_id': incident.pk,
+            'title': incident.title,
+            'status': incident.status,
+            'reported_by_id': incident.user.pk,
+            'reported_by': incident.user.username,
+            'user_id': incident.user.pk,
+        }
+    return results
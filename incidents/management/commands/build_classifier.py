@@ -0,0 +1,51 @@
+import os
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Trains the ticket classifier once and saves it as a versioned, checksummed artifact'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output-dir',
+            type=str,
+            default=None,
+            help='Directory for the model artifact (default: classifier_models/ in the project root)',
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only check that the existing artifact loads and is up to date',
+        )
+
+    def handle(self, *args, **kwargs):
+        # ticket_classifier.py lives in the project root
+        project_root = str(settings.BASE_DIR)
+        if project_root not in sys.path:
+            sys.path.insert(0, project_root)
+        import ticket_classifier
+
+        directory = kwargs.get('output_dir') or ticket_classifier.MODEL_DIR
+
+        if kwargs.get('verify'):
+            try:
+                ticket_classifier.load_artifact(directory)
+            except ticket_classifier.ModelArtifactError as e:
+                self.stdout.write(self.style.ERROR(f'✗ {e}'))
+                sys.exit(1)
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ Model artifact in {directory} is valid (version {ticket_classifier.model_version()})'
+            ))
+            return
+
+        manifest = ticket_classifier.build_artifact(directory)
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Built ticket classifier version {manifest["version"]}'
+        ))
+        self.stdout.write(f'  - Path: {os.path.join(directory, ticket_classifier.MODEL_FILENAME)}')
+        self.stdout.write(f'  - SHA256: {manifest["sha256"]}')
+        self.stdout.write(f'  - sklearn: {manifest["sklearn_version"]}')
+        self.stdout.write(f'  - Size: {manifest["size"]} bytes')
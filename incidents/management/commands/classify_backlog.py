@@ -0,0 +1,180 @@
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from incidents import daily_stats
+from incidents.models import Incident
+
+
+def _load_classifier():
+    """Pool initializer: load the model once per worker process"""
+    import ticket_classifier
+    ticket_classifier.get_model()
+
+
+class Command(BaseCommand):
+    help = 'Classifies incidents that have no category yet, in batches across a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Incidents read, classified and written per batch (default: 1000)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Classifier processes; 1 classifies in this process (default: number of CPUs)',
+        )
+        parser.add_argument(
+            '--start-after',
+            type=int,
+            default=0,
+            help='Only classify incidents with an ID above this one (to resume a dry run or an interrupted run)',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Stop after this many incidents',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Classify and report, but do not save categories',
+        )
+
+    def handle(self, *args, **kwargs):
+        # ticket_classifier.py lives in the project root
+        project_root = str(settings.BASE_DIR)
+        if project_root not in sys.path:
+            sys.path.insert(0, project_root)
+        import ticket_classifier
+
+        chunk_size = max(1, kwargs['chunk_size'])
+        workers = max(1, kwargs['workers'])
+        dry_run = kwargs.get('dry_run')
+        limit = kwargs.get('limit')
+
+        backlog = Incident.objects.filter(Q(category__isnull=True) | Q(category=''))
+        remaining = backlog.filter(pk__gt=kwargs['start_after']).count()
+        if limit is not None:
+            remaining = min(remaining, limit)
+        if not remaining:
+            self.stdout.write(self.style.SUCCESS('No uncategorized incidents to classify'))
+            return
+        self.stdout.write(
+            f'Classifying {remaining} uncategorized incident(s) '
+            f'with {workers} worker(s), {chunk_size} per batch'
+        )
+
+        # Load the model before forking so workers share it instead of each loading a copy
+        ticket_classifier.get_model()
+        pool = None
+        if workers > 1:
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_load_classifier)
+
+        categories = Counter()
+        processed = 0
+        skipped = 0
+        last_id = kwargs['start_after']
+        start = time.perf_counter()
+        in_flight = deque()
+
+        def chunks():
+            """Keyset pages over the backlog, so each read is an index range scan"""
+            after = kwargs['start_after']
+            read = 0
+            while limit is None or read < limit:
+                size = chunk_size if limit is None else min(chunk_size, limit - read)
+                rows = list(
+                    backlog.filter(pk__gt=after)
+                    .order_by('pk')
+                    .values_list('pk', 'title', 'description')[:size]
+                    .iterator(chunk_size=size)
+                )
+                if not rows:
+                    return
+                after = rows[-1][0]
+                read += len(rows)
+                yield rows
+
+        def write(rows, predictions):
+            nonlocal processed, skipped, last_id
+            updates = [
+                Incident(pk=pk, category=prediction['category'])
+                for (pk, _title, _description), prediction in zip(rows, predictions)
+            ]
+            filled = updates
+            if not dry_run:
+                with transaction.atomic():
+                    # Only fill rows that are still uncategorized; a ticket may
+                    # have been classified by n8n while this batch was running
+                    still_empty = {
+                        row[0]: daily_stats.stat_key(*row[1:])
+                        for row in backlog.filter(pk__in=[incident.pk for incident in updates])
+                        .values_list('pk', *daily_stats.KEY_FIELDS)
+                    }
+                    filled = [incident for incident in updates if incident.pk in still_empty]
+                    Incident.objects.bulk_update(filled, ['category'], batch_size=500)
+                    # bulk_update skips signals, so move the incidents in the daily rollup here
+                    daily_stats.apply_changes(
+                        (still_empty[incident.pk], still_empty[incident.pk]._replace(category=incident.category))
+                        for incident in filled
+                    )
+            categories.update(incident.category for incident in filled)
+            processed += len(rows)
+            skipped += len(updates) - len(filled)
+            last_id = rows[-1][0]
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'  - {processed}/{remaining} processed ({skipped} skipped), up to ID {last_id} '
+                f'({processed / elapsed:.0f} tickets/sec)'
+            )
+
+        try:
+            for rows in chunks():
+                texts = [ticket_classifier.combine_text(title, description) for _pk, title, description in rows]
+                if pool is None:
+                    write(rows, ticket_classifier.classify_many(texts))
+                    continue
+                # Keep every worker busy; write finished batches back in ID order
+                in_flight.append((rows, pool.submit(ticket_classifier.classify_many, texts)))
+                if len(in_flight) >= workers * 2:
+                    rows, future = in_flight.popleft()
+                    write(rows, future.result())
+            while in_flight:
+                rows, future = in_flight.popleft()
+                write(rows, future.result())
+        except KeyboardInterrupt:
+            for _rows, future in in_flight:
+                future.cancel()
+            self.stdout.write(self.style.WARNING(
+                f'Interrupted. Incidents up to ID {last_id} are done; '
+                f'run again (with --start-after {last_id} for a dry run) to continue.'
+            ))
+            return
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        elapsed = time.perf_counter() - start
+        prefix = '[dry run] ' if dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}Classified {processed - skipped} incident(s) in {elapsed:.2f}s '
+            f'({processed / elapsed if elapsed else 0:.0f} tickets/sec)'
+        ))
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f'Skipped {skipped} incident(s) that were categorized by someone else during the run'
+            ))
+        for category, count in categories.most_common():
+            self.stdout.write(f'  - {category}: {count}')
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from incidents.user_sessions import clear_expired_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes expired sessions and stale session index rows. '
+        'Run on a schedule (e.g. hourly cron); quarantine no longer does this cleanup.'
+    )
+
+    def handle(self, *args, **kwargs):
+        sessions_deleted, index_deleted = clear_expired_sessions()
+        self.stdout.write(self.style.SUCCESS(
+            f'Expired sessions cleaned\n'
+            f'  - Sessions deleted: {sessions_deleted}\n'
+            f'  - Stale index rows deleted: {index_deleted}'
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from incidents.idempotency import clear_expired_keys
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes expired idempotency keys (stored n8n/Telegram callback responses). '
+        'Run on a schedule (e.g. hourly cron).'
+    )
+
+    def handle(self, *args, **kwargs):
+        deleted = clear_expired_keys()
+        self.stdout.write(self.style.SUCCESS(
+            f'Expired idempotency keys cleaned\n'
+            f'  - Keys deleted: {deleted}'
+        ))
@@ -0,0 +1,132 @@
+import os
+import re
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from incidents.models import AttachmentBlob, Incident
+from incidents.storage import attachment_storage, hash_file
+
+BLOB_NAME_RE = re.compile(r'^incident_attachments/[0-9a-f]{2}/(?P<digest>[0-9a-f]{64})(\.[^/]*)?$')
+
+
+class Command(BaseCommand):
+    help = 'Moves existing incident attachments into the content-addressed store, removing duplicate copies'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would change without moving files or updating incidents',
+        )
+        parser.add_argument(
+            '--delete-orphans',
+            action='store_true',
+            help='Also delete files in incident_attachments/ that no incident references',
+        )
+
+    def handle(self, *args, **kwargs):
+        dry_run = kwargs.get('dry_run')
+        migrated = 0
+        duplicates = 0
+        missing = 0
+        bytes_freed = 0
+        stored = set()
+
+        legacy_names = list(
+            Incident.objects.exclude(attachment='')
+            .exclude(attachment__isnull=True)
+            .values_list('attachment', flat=True)
+            .distinct()
+        )
+        for old_name in legacy_names:
+            if BLOB_NAME_RE.match(old_name):
+                continue
+            if not attachment_storage.exists(old_name):
+                missing += 1
+                self.stdout.write(self.style.WARNING(f'  - Missing file, skipped: {old_name}'))
+                continue
+
+            with attachment_storage.open(old_name) as content:
+                digest = hash_file(content)
+            new_name = attachment_storage.blob_name('incident_attachments', digest, old_name)
+            size = attachment_storage.size(old_name)
+
+            if new_name in stored or attachment_storage.exists(new_name):
+                duplicates += 1
+                bytes_freed += size
+                action = 'duplicate of'
+            else:
+                migrated += 1
+                action = 'moved to'
+            stored.add(new_name)
+            self.stdout.write(f'  - {old_name} {action} {new_name}')
+            if dry_run:
+                continue
+
+            if action == 'moved to':
+                os.makedirs(os.path.dirname(attachment_storage.path(new_name)), exist_ok=True)
+                os.replace(attachment_storage.path(old_name), attachment_storage.path(new_name))
+            with transaction.atomic():
+                Incident.objects.filter(attachment=old_name).update(attachment=new_name)
+            if action == 'duplicate of':
+                attachment_storage.delete(old_name)
+
+        orphans = self.find_orphans()
+        for name in orphans:
+            self.stdout.write(f'  - Unreferenced file: {name}')
+            if kwargs.get('delete_orphans'):
+                bytes_freed += attachment_storage.size(name)
+                if not dry_run:
+                    attachment_storage.delete(name)
+
+        if not dry_run:
+            blobs = self.rebuild_blobs()
+            self.stdout.write(f'  - Reference counts rebuilt for {blobs} blob(s)')
+
+        prefix = '[dry run] ' if dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}Attachments moved into the store: {migrated}\n'
+            f'{prefix}Duplicate copies removed: {duplicates}\n'
+            f'{prefix}Unreferenced files found: {len(orphans)}'
+            f'{" (deleted)" if kwargs.get("delete_orphans") else ""}\n'
+            f'{prefix}Disk space reclaimed: {bytes_freed / (1024 * 1024):.2f} MB'
+        ))
+        if missing:
+            self.stdout.write(self.style.WARNING(f'{missing} attachment(s) point at files that no longer exist'))
+
+    def find_orphans(self):
+        """Top-level legacy files in incident_attachments/ that no incident points at"""
+        if not attachment_storage.exists('incident_attachments'):
+            return []
+        referenced = set(Incident.objects.exclude(attachment='').values_list('attachment', flat=True))
+        _dirs, files = attachment_storage.listdir('incident_attachments')
+        return sorted(
+            f'incident_attachments/{filename}' for filename in files
+            if f'incident_attachments/{filename}' not in referenced
+        )
+
+    def rebuild_blobs(self):
+        """Recount AttachmentBlob rows from the incidents that reference each stored file"""
+        counts = (
+            Incident.objects.exclude(attachment='')
+            .exclude(attachment__isnull=True)
+            .values('attachment')
+            .annotate(refs=Count('id'))
+            .order_by()
+        )
+        blobs = []
+        for row in counts:
+            match = BLOB_NAME_RE.match(row['attachment'])
+            if not match or not attachment_storage.exists(row['attachment']):
+                continue
+            blobs.append(AttachmentBlob(
+                sha256=match.group('digest'),
+                name=row['attachment'],
+                size=attachment_storage.size(row['attachment']),
+                ref_count=row['refs'],
+            ))
+        with transaction.atomic():
+            AttachmentBlob.objects.all().delete()
+            AttachmentBlob.objects.bulk_create(blobs)
+        return len(blobs)
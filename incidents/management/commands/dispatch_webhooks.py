@@ -0,0 +1,77 @@
+import time
+
+import requests
+from django.core.management.base import BaseCommand
+from incidents.outbox import (
+    DEFAULT_BACKOFF_SECONDS,
+    DEFAULT_MAX_ATTEMPTS,
+    deliver_due_webhooks,
+)
+
+
+class Command(BaseCommand):
+    help = 'Delivers queued n8n webhooks from the outbox, retrying failures with exponential backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Deliver everything that is currently due, then exit',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Webhooks to deliver per batch (default: 50)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Seconds to sleep when the queue is empty (default: 1)',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=DEFAULT_MAX_ATTEMPTS,
+            help=f'Attempts before a webhook is marked failed (default: {DEFAULT_MAX_ATTEMPTS})',
+        )
+        parser.add_argument(
+            '--backoff',
+            type=float,
+            default=DEFAULT_BACKOFF_SECONDS,
+            help=f'Base retry delay in seconds, doubled on every attempt (default: {DEFAULT_BACKOFF_SECONDS})',
+        )
+
+    def handle(self, *args, **kwargs):
+        # One session for the whole run so deliveries reuse the connection to n8n
+        session = requests.Session()
+        self.stdout.write('Webhook dispatcher started')
+
+        try:
+            while True:
+                delivered, retried, failed = deliver_due_webhooks(
+                    session=session,
+                    batch_size=kwargs['batch_size'],
+                    max_attempts=kwargs['max_attempts'],
+                    backoff=kwargs['backoff'],
+                )
+                if delivered or retried or failed:
+                    self.stdout.write(
+                        f'  - Delivered: {delivered}, will retry: {retried}, failed: {failed}'
+                    )
+                if failed:
+                    self.stdout.write(self.style.WARNING(
+                        f'  - {failed} webhook(s) gave up after {kwargs["max_attempts"]} attempts'
+                    ))
+
+                batch_was_full = delivered + retried + failed >= kwargs['batch_size']
+                if batch_was_full:
+                    continue
+                if kwargs['once']:
+                    break
+                time.sleep(kwargs['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS('Webhook dispatcher stopped'))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from incidents.daily_stats import compute_daily_stats, rebuild_daily_stats
+from incidents.models import IncidentDailyStat
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the per-day incident rollup (IncidentDailyStat) from Incident'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report rollup rows that differ from the recomputed values, do not write',
+        )
+
+    def handle(self, *args, **kwargs):
+        expected = compute_daily_stats()
+
+        # Compare the stored rows with the recomputed ones
+        stored = {
+            (row['day'], row['status'], row['category'], row['department'], row['assignee']): row['count']
+            for row in IncidentDailyStat.objects.exclude(count=0).values(
+                'day', 'status', 'category', 'department', 'assignee', 'count'
+            )
+        }
+        mismatched = {
+            key for key in set(stored) | set(expected)
+            if stored.get(key, 0) != expected.get(key, 0)
+        }
+
+        if mismatched:
+            self.stdout.write(self.style.WARNING(f'{len(mismatched)} rollup row(s) out of sync'))
+            for key in sorted(mismatched, key=str):
+                day, status, category, department, assignee = key
+                self.stdout.write(
+                    f'  - {day} {status} / {category or "-"} / {department or "-"} / assignee {assignee or "-"}: '
+                    f'stored {stored.get(key, 0)}, expected {expected.get(key, 0)}'
+                )
+        else:
+            self.stdout.write(self.style.SUCCESS('Daily incident rollup is in sync'))
+
+        if kwargs.get('check'):
+            return
+
+        rows = rebuild_daily_stats(expected)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} daily rollup row(s)'))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from incidents import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index over incidents and their comments'
+
+    def handle(self, *args, **kwargs):
+        if not search.is_available():
+            self.stdout.write(self.style.WARNING(
+                f'No search index on this database ({connection.vendor}); '
+                f'run migrate, or searches keep using icontains filters'
+            ))
+            return
+
+        start = time.perf_counter()
+        with transaction.atomic():
+            indexed = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {indexed} incident(s) in {time.perf_counter() - start:.1f}s'
+        ))
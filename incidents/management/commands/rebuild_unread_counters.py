@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from incidents.models import UnreadCounter
+from incidents.unread_counters import compute_unread_counts, rebuild_unread_counters
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the unread comment counters from Comment and CommentRead'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report counters that differ from the recomputed values, do not write',
+        )
+
+    def handle(self, *args, **kwargs):
+        expected = compute_unread_counts()
+
+        # Compare the stored counters with the recomputed ones
+        stored = {
+            (row['user_id'], row['incident_id']): row['count']
+            for row in UnreadCounter.objects.filter(count__gt=0).values('user_id', 'incident_id', 'count')
+        }
+        mismatched = {
+            key for key in set(stored) | set(expected)
+            if stored.get(key, 0) != expected.get(key, 0)
+        }
+
+        if mismatched:
+            self.stdout.write(self.style.WARNING(f'{len(mismatched)} counter(s) out of sync'))
+            for user_id, incident_id in sorted(mismatched):
+                self.stdout.write(
+                    f'  - User ID {user_id}, Ticket #{incident_id}: '
+                    f'stored {stored.get((user_id, incident_id), 0)}, '
+                    f'expected {expected.get((user_id, incident_id), 0)}'
+                )
+        else:
+            self.stdout.write(self.style.SUCCESS('All unread counters are in sync'))
+
+        if kwargs.get('check'):
+            return
+
+        counters, mailboxes = rebuild_unread_counters(expected)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {counters} unread counter(s) across {mailboxes} user(s)'
+        ))
@@ -0,0 +1,57 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs the local event broker that relays live incident events between '
+        'ASGI worker processes (see EVENT_BROKER_ADDRESS)'
+    )
+
+    def add_arguments(self, parser):
+        default = getattr(settings, 'EVENT_BROKER_ADDRESS', None) or '127.0.0.1:8765'
+        parser.add_argument(
+            '--address',
+            type=str,
+            default=default,
+            help=f'host:port to listen on (default: {default})',
+        )
+
+    def handle(self, *args, **kwargs):
+        host, port = kwargs['address'].rsplit(':', 1)
+        try:
+            asyncio.run(self.serve(host, int(port)))
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS('Event broker stopped'))
+
+    async def serve(self, host, port):
+        clients = set()
+
+        async def relay(reader, writer):
+            clients.add(writer)
+            peer = writer.get_extra_info('peername')
+            self.stdout.write(f'  - Worker connected: {peer} ({len(clients)} connected)')
+            try:
+                while line := await reader.readline():
+                    # Fan the event out to every other worker
+                    for client in list(clients):
+                        if client is writer:
+                            continue
+                        try:
+                            client.write(line)
+                        except (ConnectionError, RuntimeError):
+                            clients.discard(client)
+            except ConnectionError:
+                pass
+            finally:
+                clients.discard(writer)
+                writer.close()
+                self.stdout.write(f'  - Worker disconnected: {peer} ({len(clients)} connected)')
+
+        server = await asyncio.start_server(relay, host, port)
+        self.stdout.write(self.style.SUCCESS(f'Event broker listening on {host}:{port}'))
+        async with server:
+            await server.serve_forever()
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from incidents.replicas import copy_sqlite_primary
+
+
+class Command(BaseCommand):
+    help = (
+        'Copies the SQLite primary database to the SQLite read replica (DB_REPLICA_NAME). '
+        'For local testing of replica routing; production replicas use PostgreSQL replication.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=None,
+            help='Keep copying every N seconds, like a lagging replica (default: copy once and exit)',
+        )
+
+    def handle(self, *args, **kwargs):
+        interval = kwargs['interval']
+        try:
+            while True:
+                try:
+                    seconds = copy_sqlite_primary()
+                except ValueError as e:
+                    raise CommandError(str(e))
+                self.stdout.write(self.style.SUCCESS(f'Replica updated in {seconds:.2f}s'))
+                if interval is None:
+                    return
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Replica sync stopped'))
@@ -0,0 +1,76 @@
+# Generated by Django 6.0 on 2026-10-17 02:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_unread_counters(apps, schema_editor):
+    """Seed the counters from existing Comment/CommentRead rows"""
+    Comment = apps.get_model('incidents', 'Comment')
+    CommentRead = apps.get_model('incidents', 'CommentRead')
+    UnreadCounter = apps.get_model('incidents', 'UnreadCounter')
+    UnreadMailbox = apps.get_model('incidents', 'UnreadMailbox')
+
+    last_read = {
+        (row.user_id, row.incident_id): row.last_read_at
+        for row in CommentRead.objects.all()
+    }
+    counts = {}
+    for comment in Comment.objects.select_related('incident').iterator():
+        owner_id = comment.incident.user_id
+        if comment.user_id == owner_id:
+            continue
+        key = (owner_id, comment.incident_id)
+        read_at = last_read.get(key)
+        if read_at is None or comment.created_at > read_at:
+            counts[key] = counts.get(key, 0) + 1
+
+    totals = {}
+    for (user_id, _incident_id), count in counts.items():
+        totals[user_id] = totals.get(user_id, 0) + count
+
+    UnreadCounter.objects.bulk_create([
+        UnreadCounter(user_id=user_id, incident_id=incident_id, count=count)
+        for (user_id, incident_id), count in counts.items()
+    ])
+    UnreadMailbox.objects.bulk_create([
+        UnreadMailbox(user_id=user_id, total=total)
+        for user_id, total in totals.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('incidents', '0015_incident_view_all_global_tickets_permission'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadMailbox',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='unread_mailbox', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterModelOptions(
+            name='incident',
+            options={'permissions': [('view_all_global_tickets', 'Can view all tickets in global view (not just open tickets)')]},
+        ),
+        migrations.CreateModel(
+            name='UnreadCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('incident', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='unread_counters', to='incidents.incident')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='unread_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'incident')},
+            },
+        ),
+        migrations.RunPython(populate_unread_counters, reverse_code=migrations.RunPython.noop),
+    ]
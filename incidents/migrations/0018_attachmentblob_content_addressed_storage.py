@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-17 02:47
+
+import incidents.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incidents', '0017_incident_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttachmentBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Storage path of the stored file', max_length=255, unique=True)),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('ref_count', models.PositiveIntegerField(default=0, help_text='Number of incidents pointing at this file')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='incident',
+            name='attachment',
+            field=models.FileField(blank=True, help_text='Attached file for incident report', null=True, storage=incidents.storage.ContentAddressedStorage(), upload_to='incident_attachments/'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 6.0 on 2026-10-17 02:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def index_existing_sessions(apps, schema_editor):
+    """Decode the sessions that are already logged in once, so quarantine can find them"""
+    from django.contrib.sessions.backends.db import SessionStore
+
+    Session = apps.get_model('sessions', 'Session')
+    User = apps.get_model('auth', 'User')
+    UserSession = apps.get_model('incidents', 'UserSession')
+
+    owners = {}
+    store = SessionStore()
+    for session in Session.objects.filter(expire_date__gte=timezone.now()).iterator():
+        user_id = store.decode(session.session_data).get('_auth_user_id')
+        if user_id and str(user_id).isdigit():
+            owners[session.session_key] = int(user_id)
+    existing = set(User.objects.filter(pk__in=set(owners.values())).values_list('pk', flat=True))
+    UserSession.objects.bulk_create([
+        UserSession(session_key=session_key, user_id=user_id)
+        for session_key, user_id in owners.items()
+        if user_id in existing
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incidents', '0019_outboundwebhook'),
+        ('sessions', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSession',
+            fields=[
+                ('session_key', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(index_existing_sessions, migrations.RunPython.noop),
+    ]
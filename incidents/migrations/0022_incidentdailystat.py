@@ -0,0 +1,56 @@
+# Generated by Django 6.0 on 2026-10-17 02:58
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def populate_daily_stats(apps, schema_editor):
+    """Seed the rollup from the existing incidents"""
+    Incident = apps.get_model('incidents', 'Incident')
+    IncidentDailyStat = apps.get_model('incidents', 'IncidentDailyStat')
+
+    counts = Counter()
+    rows = (
+        Incident.objects.annotate(day=TruncDate('created_at'))
+        .values('day', 'status', 'category', 'department', 'it_acknowledged_by_id')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        counts[(row['day'], row['status'], row['category'] or '', row['department'] or '',
+                row['it_acknowledged_by_id'] or 0)] += row['total']
+    IncidentDailyStat.objects.bulk_create([
+        IncidentDailyStat(day=day, status=status, category=category, department=department,
+                          assignee=assignee, count=count)
+        for (day, status, category, department, assignee), count in counts.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incidents', '0021_incident_status_resolved_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IncidentDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('category', models.CharField(blank=True, default='', max_length=50)),
+                ('department', models.CharField(blank=True, default='', max_length=100)),
+                ('assignee', models.PositiveIntegerField(default=0, help_text='it_acknowledged_by user ID (0 = unassigned)')),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['assignee', 'day'], name='dailystat_assignee_day_idx')],
+                'unique_together': {('day', 'status', 'category', 'department', 'assignee')},
+            },
+        ),
+        migrations.RunPython(populate_daily_stats, migrations.RunPython.noop),
+    ]
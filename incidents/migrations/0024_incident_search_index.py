@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-17 03:40
+
+import django.db.models.deletion
+import incidents.search
+from django.db import migrations, models
+
+from incidents import search
+
+
+def create_search_index(apps, schema_editor):
+    """Create the full-text table for this database and index the existing incidents"""
+    search.create_index_table(schema_editor)
+    search.rebuild_index(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    search.drop_index_table(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incidents', '0023_incident_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.CreateModel(
+            name='IncidentSearchEntry',
+            fields=[
+                ('incident', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='incidents.incident')),
+                ('document', incidents.search.SearchDocumentField()),
+            ],
+            options={
+                'db_table': 'incidents_incident_search',
+                'managed': False,
+            },
+        ),
+    ]
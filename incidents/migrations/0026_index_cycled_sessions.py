@@ -0,0 +1,44 @@
+# Generated by Django 6.0 on 2026-10-17 05:12
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def index_missing_sessions(apps, schema_editor):
+    """
+    Index the live sessions the login signal missed: keys cycled by
+    update_session_auth_hash() after a password change were never recorded.
+    """
+    from django.contrib.sessions.backends.db import SessionStore
+
+    Session = apps.get_model('sessions', 'Session')
+    User = apps.get_model('auth', 'User')
+    UserSession = apps.get_model('incidents', 'UserSession')
+
+    owners = {}
+    store = SessionStore()
+    missing = Session.objects.filter(expire_date__gte=timezone.now()).exclude(
+        session_key__in=UserSession.objects.values('session_key')
+    )
+    for session in missing.iterator():
+        user_id = store.decode(session.session_data).get('_auth_user_id')
+        if user_id and str(user_id).isdigit():
+            owners[session.session_key] = int(user_id)
+    existing = set(User.objects.filter(pk__in=set(owners.values())).values_list('pk', flat=True))
+    UserSession.objects.bulk_create([
+        UserSession(session_key=session_key, user_id=user_id)
+        for session_key, user_id in owners.items()
+        if user_id in existing
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incidents', '0025_idempotencykey'),
+        ('sessions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_missing_sessions, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,11 @@
 import os
 
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 
+from .search import SearchDocumentField
+from .storage import attachment_storage
+
 # Extensions treated as images (inline preview; skip VirusTotal in webhook)
 _IMAGE_ATTACHMENT_EXTS = frozenset({".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".heic", ".heif"})
 
@@ -87,7 +90,7 @@ class Incident(models.Model):
     it_status_message = models.TextField(blank=True, null=True, help_text="IT status message (e.g., waiting for parts, cannot finish, etc.)")
     
     # File Attachment Fields (for VirusTotal scanning)
-    attachment = models.FileField(upload_to='incident_attachments/', blank=True, null=True, help_text="Attached file for incident report")
+    attachment = models.FileField(upload_to='incident_attachments/', storage=attachment_storage, blank=True, null=True, help_text="Attached file for incident report")
     file_hash = models.CharField(max_length=64, blank=True, null=True, help_text="SHA256 hash of the attached file for VirusTotal scanning")
     
     # AI Classification Field
@@ -110,6 +113,25 @@ class Incident(models.Model):
         permissions = [
             ('view_all_global_tickets', 'Can view all tickets in global view (not just open tickets)'),
         ]
+        # Composite indexes matching the filter()/order_by('-created_at') combinations
+        # used by home, admin_dashboard, incident_calendar_data and incident_monitor
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='incident_user_created_idx'),
+            models.Index(fields=['user', 'status'], name='incident_user_status_idx'),
+            models.Index(fields=['status', 'it_acknowledged', '-created_at'], name='incident_status_ack_idx'),
+            models.Index(fields=['it_acknowledged_by', 'status', '-created_at'], name='incident_ackby_status_idx'),
+            models.Index(fields=['laptop_serial', '-created_at'], name='incident_serial_created_idx'),
+            models.Index(fields=['category', '-created_at'], name='incident_category_created_idx'),
+            # (created_at, id) is the keyset for /api/incidents/ cursors (see keyset.py)
+            models.Index(fields=['-created_at', '-id'], name='incident_created_id_idx'),
+            models.Index(fields=['status', 'resolved_at'], name='incident_status_resolved_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # The attachment's blob row is locked while the file is stored and its
+        # reference taken in post_save (see storage.py): one transaction for both
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     @property
     def attachment_is_image(self):
@@ -154,4 +176,127 @@ class CommentRead(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.user.username} last read comments for Ticket #{self.incident.id} at {self.last_read_at}"
\ No newline at end of file
+        return f"{self.user.username} last read comments for Ticket #{self.incident.id} at {self.last_read_at}"
+
+# 5. UNREAD COUNTERS - Denormalized unread "mail" counts for the navbar badge
+class UnreadCounter(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='unread_counters')
+    incident = models.ForeignKey(Incident, on_delete=models.CASCADE, related_name='unread_counters')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['user', 'incident']
+
+    def __str__(self):
+        return f"{self.user.username} has {self.count} unread comments on Ticket #{self.incident_id}"
+
+class UnreadMailbox(models.Model):
+    # Per-user rollup of UnreadCounter so the badge is a primary-key lookup
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='unread_mailbox')
+    total = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user.username} has {self.total} unread comments"
+
+# 6. ATTACHMENT BLOBS - Reference counts for content-addressed attachment files
+class AttachmentBlob(models.Model):
+    # One row per stored file; the extension is kept in the name so the same bytes
+    # uploaded as .png and .bin are two blobs with the same hash
+    name = models.CharField(max_length=255, unique=True, help_text="Storage path of the stored file")
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0, help_text="Number of incidents pointing at this file")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} references)"
+
+# 7. OUTBOUND WEBHOOKS - Durable outbox for n8n notifications
+class OutboundWebhook(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('delivered', 'Delivered'),
+        ('failed', 'Failed'),
+    ]
+    url = models.URLField(max_length=500)
+    payload = models.JSONField()
+    incident = models.ForeignKey(Incident, on_delete=models.SET_NULL, null=True, blank=True, related_name='outbound_webhooks')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(auto_now_add=True)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='webhook_status_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"Webhook #{self.id} to {self.url} ({self.status})"
+
+
+# 8. USER SESSIONS - Index of which sessions belong to which user (for quarantine)
+class UserSession(models.Model):
+    session_key = models.CharField(max_length=40, primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='user_sessions')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Session {self.session_key[:8]}... for {self.user.username}"
+
+
+# 9. INCIDENT DAILY STATS - Per-day incident counts for the calendar heatmap and period counts
+class IncidentDailyStat(models.Model):
+    # One row per (day reported, status, category, department, assignee).
+    # Missing values are stored as '' / 0 so every combination has exactly one row.
+    day = models.DateField()
+    status = models.CharField(max_length=20)
+    category = models.CharField(max_length=50, blank=True, default='')
+    department = models.CharField(max_length=100, blank=True, default='')
+    assignee = models.PositiveIntegerField(default=0, help_text="it_acknowledged_by user ID (0 = unassigned)")
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('day', 'status', 'category', 'department', 'assignee')
+        indexes = [
+            models.Index(fields=['assignee', 'day'], name='dailystat_assignee_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.status}: {self.count}"
+
+
+# 10. INCIDENT SEARCH INDEX - Full-text search row per incident (see search.py)
+class IncidentSearchEntry(models.Model):
+    # Read-only: written with raw SQL by search.py. On SQLite this is a view over
+    # the FTS5 table, on PostgreSQL a table with a tsvector (migration 0024).
+    incident = models.OneToOneField(
+        Incident, on_delete=models.DO_NOTHING, primary_key=True,
+        related_name='search_entry', db_constraint=False,
+    )
+    document = SearchDocumentField()
+
+    class Meta:
+        managed = False
+        db_table = 'incidents_incident_search'
+
+    def __str__(self):
+        return f"Search entry for incident #{self.incident_id}"
+
+
+# 11. IDEMPOTENCY KEYS - Stored responses of n8n/Telegram callbacks, replayed on retries (see idempotency.py)
+class IdempotencyKey(models.Model):
+    # sha256 of the endpoint path and the Idempotency-Key header (or the request body)
+    key = models.CharField(max_length=64, primary_key=True)
+    # sha256 of the request body, to reject a header key reused for a different request
+    request_hash = models.CharField(max_length=64, blank=True, default='')
+    # 0 while the first request is still running
+    status_code = models.PositiveSmallIntegerField(default=0)
+    body = models.BinaryField(default=b'')
+    # End of the in-progress lease, then of the stored response's TTL
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Idempotency key {self.key[:12]}... ({self.status_code or 'in progress'})"
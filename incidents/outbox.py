@@ -0,0 +1,93 @@
+"""
+Durable outbox for webhooks sent to n8n.
+
+Views call enqueue_webhook() instead of posting inline, so a request only pays for
+one INSERT. The dispatch_webhooks management command delivers due rows in batches
+over a shared HTTP session and retries failures with exponential backoff.
+"""
+
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import OutboundWebhook
+
+DEFAULT_MAX_ATTEMPTS = 8
+DEFAULT_BACKOFF_SECONDS = 5
+MAX_BACKOFF_SECONDS = 60 * 60
+
+
+def enqueue_webhook(url, payload, incident=None):
+    """Queue a JSON POST for the dispatcher and return the OutboundWebhook row."""
+    return OutboundWebhook.objects.create(url=url, payload=payload, incident=incident)
+
+
+def backoff_delay(attempts, base=DEFAULT_BACKOFF_SECONDS):
+    """Seconds to wait before the next try: base * 2^(attempts - 1), capped at an hour."""
+    return min(base * (2 ** max(attempts - 1, 0)), MAX_BACKOFF_SECONDS)
+
+
+def claim_due_webhooks(batch_size, lease_seconds):
+    """
+    Claim up to batch_size due webhooks.
+
+    Claimed rows have next_attempt_at pushed out by the lease, so another dispatcher
+    won't pick them up while they are being sent. If this worker dies mid-batch they
+    simply become due again once the lease runs out.
+    """
+    with transaction.atomic():
+        queryset = OutboundWebhook.objects.filter(
+            status='pending',
+            next_attempt_at__lte=timezone.now(),
+        ).order_by('next_attempt_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        batch = list(queryset[:batch_size])
+        if batch:
+            OutboundWebhook.objects.filter(pk__in=[webhook.pk for webhook in batch]).update(
+                next_attempt_at=timezone.now() + timedelta(seconds=lease_seconds)
+            )
+    return batch
+
+
+def deliver_due_webhooks(session=None, batch_size=50, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                         backoff=DEFAULT_BACKOFF_SECONDS, timeout=None):
+    """
+    Deliver one batch of due webhooks over a shared HTTP session.
+
+    Returns:
+        tuple: (delivered, retried, failed) counts for the batch
+    """
+    session = session or requests.Session()
+    timeout = timeout or getattr(settings, 'N8N_WEBHOOK_TIMEOUT', 5)
+    delivered = retried = failed = 0
+
+    batch = claim_due_webhooks(batch_size, lease_seconds=batch_size * timeout + 30)
+    for webhook in batch:
+        webhook.attempts += 1
+        try:
+            response = session.post(webhook.url, json=webhook.payload, timeout=timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            webhook.last_error = str(e)[:2000]
+            if webhook.attempts >= max_attempts:
+                webhook.status = 'failed'
+                failed += 1
+            else:
+                webhook.next_attempt_at = timezone.now() + timedelta(seconds=backoff_delay(webhook.attempts, backoff))
+                retried += 1
+        else:
+            webhook.status = 'delivered'
+            webhook.delivered_at = timezone.now()
+            webhook.last_error = None
+            delivered += 1
+
+    if batch:
+        OutboundWebhook.objects.bulk_update(
+            batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'delivered_at']
+        )
+
+    return delivered, retried, failed
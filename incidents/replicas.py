@@ -0,0 +1,189 @@
+"""
+Read-replica routing for the read-only dashboard and reporting paths.
+
+When settings.DATABASES has a REPLICA_DATABASE alias, code inside
+replica_reads() (or a view decorated with reads_from_replica()) sends its ORM
+reads to the replica. Everything else, all writes, and reads of the auth and
+sessions tables always use the primary ('default').
+
+Read-your-writes: once a request writes, the rest of it reads from the
+primary, and ReplicaPinMiddleware sets a cookie so that user's requests for
+the next REPLICA_PIN_SECONDS read from the primary too (long enough for the
+replica to catch up, e.g. after the redirect that follows a form post).
+Reporting code that can live with slightly old numbers passes stale=True to
+ignore the pin.
+
+Without a replica alias configured, the router does nothing.
+"""
+
+import contextlib
+import contextvars
+import functools
+import sqlite3
+import time
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.decorators import sync_and_async_middleware
+
+PIN_COOKIE = 'sirts_primary_until'
+# Never read from a lagging copy: logins, sessions, group/permission checks
+PRIMARY_ONLY_APPS = frozenset({'auth', 'sessions', 'contenttypes'})
+
+
+class _Routing:
+    """Routing state for one request (or one replica_reads block outside a request)"""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned   # a recent request from this client wrote
+        self.wrote = False     # this request wrote
+        self.reads = None      # None (primary), 'fresh' or 'stale'
+
+
+_routing = contextvars.ContextVar('incidents_replica_routing', default=None)
+
+
+def replica_alias():
+    """The replica's DATABASES alias, or None if there is no replica."""
+    alias = getattr(settings, 'REPLICA_DATABASE', 'replica')
+    return alias if alias in settings.DATABASES else None
+
+
+@contextlib.contextmanager
+def replica_reads(stale=False):
+    """
+    Send ORM reads in this block to the replica.
+
+    Args:
+        stale (bool): read from the replica even if this request (or a recent
+            one from the same client) wrote, for reports that tolerate lag
+    """
+    state = _routing.get()
+    token = None
+    if state is None:
+        state = _Routing()
+        token = _routing.set(state)
+    previous = state.reads
+    state.reads = 'stale' if stale else 'fresh'
+    try:
+        yield
+    finally:
+        state.reads = previous
+        if token is not None:
+            _routing.reset(token)
+
+
+def reads_from_replica(stale=False):
+    """View decorator: GET/HEAD requests run inside replica_reads(stale)."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            with replica_reads(stale=stale):
+                return view(request, *args, **kwargs)
+        return wrapped
+    return decorator
+
+
+class ReplicaRouter:
+    """DATABASE_ROUTERS entry: replica reads inside replica_reads(), primary for everything else."""
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is None or state.reads is None or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        alias = replica_alias()
+        if alias is None:
+            return None
+        if state.reads == 'fresh' and (state.pinned or state.wrote):
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Inside a transaction reads must see its own uncommitted writes
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Rows from the replica are the primary's rows
+        aliases = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema from the primary
+        if db == replica_alias():
+            return False
+        return None
+
+
+def _start(request):
+    try:
+        pinned_until = float(request.COOKIES.get(PIN_COOKIE, 0))
+    except ValueError:
+        pinned_until = 0
+    state = _Routing(pinned=pinned_until > time.time())
+    return state, _routing.set(state)
+
+
+def _finish(state, response):
+    if state.wrote and replica_alias() is not None:
+        seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+        response.set_cookie(
+            PIN_COOKIE, f'{time.time() + seconds:.3f}', max_age=seconds, httponly=True, samesite='Lax',
+        )
+    return response
+
+
+@sync_and_async_middleware
+def ReplicaPinMiddleware(get_response):
+    """Tracks whether a request wrote, and pins the client to the primary for a few seconds if so."""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            state, token = _start(request)
+            try:
+                response = await get_response(request)
+            finally:
+                _routing.reset(token)
+            return _finish(state, response)
+    else:
+        def middleware(request):
+            state, token = _start(request)
+            try:
+                response = get_response(request)
+            finally:
+                _routing.reset(token)
+            return _finish(state, response)
+    return middleware
+
+
+def copy_sqlite_primary():
+    """
+    Copy the SQLite primary into the SQLite replica file (local testing only).
+
+    Uses SQLite's online backup, so the copy is consistent even while the
+    primary is being written to. Returns the seconds taken.
+    """
+    alias = replica_alias()
+    primary = connections[DEFAULT_DB_ALIAS]
+    replica = connections[alias] if alias else None
+    if replica is None or primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+        raise ValueError('copy_sqlite_primary() needs SQLite for both the primary and the replica')
+    start = time.perf_counter()
+    # Our own open read transaction would block the copy
+    replica.close()
+    source = sqlite3.connect(primary.settings_dict['NAME'])
+    target = sqlite3.connect(replica.settings_dict['NAME'])
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+    return time.perf_counter() - start
@@ -0,0 +1,106 @@
+"""
+Role resolution for the dashboard views and templates.
+
+A user's roles (Manager group membership, the view_all_global_tickets
+permission) are worked out once per request and memoized on the request, so
+views, the context processor and helper functions can all ask without
+re-running the groups and permissions queries.
+
+Across requests the role set is cached under a version number. Changing a
+user's groups or permissions, a group's permissions, or renaming/deleting a
+group bumps the version (see signals.py), which makes every cached entry
+stale at once. ROLE_CACHE picks the CACHES alias; with a per-process cache
+(LocMemCache) other workers only notice after ROLE_CACHE_TTL seconds, so the
+default TTL is a few seconds; use a shared cache before raising it.
+"""
+
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.core.cache import caches
+from django.db.models import Q
+
+MANAGER = 'manager'
+VIEW_ALL_GLOBAL = 'view_all_global'
+
+MANAGER_GROUP = 'Manager'
+VIEW_ALL_GLOBAL_PERMISSION = ('incidents', 'view_all_global_tickets')
+
+CACHE_PREFIX = 'incidents:roles:'
+VERSION_KEY = CACHE_PREFIX + 'version'
+
+_REQUEST_ATTR = '_incident_roles'
+
+
+def _cache():
+    return caches[getattr(settings, 'ROLE_CACHE', 'default')]
+
+
+def _version(cache):
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # add() so two workers starting together agree on the first version
+        cache.add(VERSION_KEY, 1, None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def invalidate():
+    """Make every cached role set stale (call when groups or permissions change)."""
+    cache = _cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # No version yet: nothing has been cached under one either
+        cache.add(VERSION_KEY, 1, None)
+
+
+def _compute(user):
+    roles = set()
+    group_names = set(user.groups.values_list('name', flat=True))
+    if MANAGER_GROUP in group_names:
+        # Managers automatically have the global view
+        roles.update((MANAGER, VIEW_ALL_GLOBAL))
+    elif user.is_superuser:
+        roles.add(VIEW_ALL_GLOBAL)
+    else:
+        app_label, codename = VIEW_ALL_GLOBAL_PERMISSION
+        granted = Permission.objects.filter(
+            Q(user=user) | Q(group__user=user),
+            content_type__app_label=app_label, codename=codename,
+        ).exists()
+        if granted:
+            roles.add(VIEW_ALL_GLOBAL)
+    return frozenset(roles)
+
+
+def roles_for_user(user):
+    """The user's role set (frozenset of MANAGER / VIEW_ALL_GLOBAL), from the cache when possible."""
+    if not user.is_authenticated or not user.is_active:
+        return frozenset()
+    cache = _cache()
+    # is_superuser is part of the key, so toggling it needs no invalidation
+    key = f'{CACHE_PREFIX}{_version(cache)}:{user.pk}:{int(user.is_superuser)}'
+    roles = cache.get(key)
+    if roles is None:
+        roles = _compute(user)
+        cache.set(key, roles, getattr(settings, 'ROLE_CACHE_TTL', 5))
+    return roles
+
+
+def get_roles(request):
+    """roles_for_user(request.user), resolved at most once per request."""
+    user = request.user
+    memo = getattr(request, _REQUEST_ATTR, None)
+    # Keyed on the user so a login/logout mid-request isn't answered from the memo
+    if memo is None or memo[0] != user.pk:
+        memo = (user.pk, roles_for_user(user))
+        setattr(request, _REQUEST_ATTR, memo)
+    return memo[1]
+
+
+def is_manager(request):
+    return MANAGER in get_roles(request)
+
+
+def can_view_all_global_tickets(request):
+    return VIEW_ALL_GLOBAL in get_roles(request)
@@ -0,0 +1,301 @@
+"""
+Full-text search over incidents and their comments.
+
+Each incident has one search row holding its title, description, admin
+response, IT status message, every comment, and a "details" column with the
+short fields staff also search by (reporter, username, laptop serial/model,
+department). Signal handlers re-index an incident whenever it or one of its
+comments is saved or deleted, and a user's incidents when they are renamed
+(see signals.py); rebuild_search_index rebuilds the whole index.
+
+On SQLite the rows live in the FTS5 table incidents_incident_fts, read through
+the incidents_incident_search view; on PostgreSQL incidents_incident_search is
+a table with a GIN-indexed tsvector (migration 0024). Either way the ORM sees
+it as the unmanaged IncidentSearchEntry model, so a search is a join the
+database drives from the index. On other databases, or when SQLite was built
+without FTS5 (migration 0024 then skips the index), search_incidents() falls
+back to icontains filters.
+
+Queries match every word as a prefix ("print jam" finds "printer jammed"),
+and results are ranked by relevance with title matches counting most.
+"""
+
+import re
+
+from django.db import OperationalError, connection, models, transaction
+from django.db.models import F, FloatField, Func, Lookup, Q, Value
+
+FTS_TABLE = 'incidents_incident_fts'
+SEARCH_TABLE = 'incidents_incident_search'
+COLUMNS = ('title', 'description', 'admin_response', 'it_status_message', 'comments', 'details')
+# bm25 weight per column (SQLite) / tsvector weight per column (PostgreSQL)
+WEIGHTS = (10.0, 4.0, 2.0, 2.0, 1.0, 3.0)
+PG_WEIGHTS = ('A', 'B', 'C', 'C', 'D', 'B')
+PG_CONFIG = 'english'
+# Incident fields whose change needs a re-index (user for the username in "details")
+INDEXED_FIELDS = frozenset({
+    'title', 'description', 'admin_response', 'it_status_message',
+    'user', 'reporter_name', 'laptop_serial', 'laptop_model', 'department',
+})
+
+# Ids per re-index statement (stays under SQLite's bound-parameter limit)
+INDEX_BATCH_SIZE = 1000
+
+# Words used from a query; longer queries only get slower, not more precise
+MAX_TERMS = 8
+TERM_RE = re.compile(r'\w+')
+
+# Text of every indexed column per incident, in COLUMNS order
+_DOCUMENT_SQL = {
+    'sqlite': """
+        SELECT i.id,
+               i.title,
+               COALESCE(i.description, ''),
+               COALESCE(i.admin_response, ''),
+               COALESCE(i.it_status_message, ''),
+               COALESCE((SELECT group_concat(c.message, ' ') FROM incidents_comment c WHERE c.incident_id = i.id), ''),
+               COALESCE(u.username, '') || ' ' || COALESCE(i.reporter_name, '') || ' ' ||
+               COALESCE(i.laptop_serial, '') || ' ' || COALESCE(i.laptop_model, '') || ' ' ||
+               COALESCE(i.department, '')
+        FROM incidents_incident i LEFT JOIN auth_user u ON u.id = i.user_id
+    """,
+    'postgresql': """
+        SELECT i.id,
+               i.title,
+               COALESCE(i.description, ''),
+               COALESCE(i.admin_response, ''),
+               COALESCE(i.it_status_message, ''),
+               COALESCE((SELECT string_agg(c.message, ' ') FROM incidents_comment c WHERE c.incident_id = i.id), ''),
+               CONCAT_WS(' ', u.username, i.reporter_name, i.laptop_serial, i.laptop_model, i.department)
+        FROM incidents_incident i LEFT JOIN auth_user u ON u.id = i.user_id
+    """,
+}
+
+
+def query_terms(query):
+    return TERM_RE.findall((query or '').lower())[:MAX_TERMS]
+
+
+def _match_expression(query):
+    """The query in the database's own syntax: every term, as a prefix"""
+    terms = query_terms(query)
+    if connection.vendor == 'postgresql':
+        return ' & '.join(f'{term}:*' for term in terms)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+class SearchDocumentField(models.TextField):
+    """An incident's indexed text (FTS5 row or tsvector); filter it with __matches."""
+
+
+@SearchDocumentField.register_lookup
+class Matches(Lookup):
+    """document__matches='user query'"""
+    lookup_name = 'matches'
+    prepare_rhs = False
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        return f'{lhs} MATCH %s', (*lhs_params, _match_expression(self.rhs))
+
+    def as_postgresql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        return f"{lhs} @@ to_tsquery('{PG_CONFIG}', %s)", (*lhs_params, _match_expression(self.rhs))
+
+
+class SearchRank(Func):
+    """Relevance of a search_entry__document__matches hit (higher is better)"""
+    output_field = FloatField()
+
+    def __init__(self, document, query):
+        super().__init__(document, Value(query))
+
+    def as_sql(self, compiler, connection):
+        # FTS5's hidden rank column is the weighted bm25 of the current MATCH
+        # (lower is better); the view exposes it next to the document
+        document = self.get_source_expressions()[0]
+        return f'-{compiler.quote_name_unless_alias(document.alias)}."rank"', ()
+
+    def as_postgresql(self, compiler, connection):
+        document, query = self.get_source_expressions()
+        sql, params = compiler.compile(document)
+        return f"ts_rank({sql}, to_tsquery('{PG_CONFIG}', %s))", (*params, _match_expression(query.value))
+
+
+def has_fts5(using):
+    """True if this SQLite build has the FTS5 module."""
+    try:
+        with transaction.atomic(using=using.alias), using.cursor() as cursor:
+            cursor.execute("CREATE VIRTUAL TABLE temp.incidents_fts5_probe USING fts5(probe)")
+            cursor.execute("DROP TABLE temp.incidents_fts5_probe")
+    except OperationalError:
+        return False
+    return True
+
+
+def create_index_table(schema_editor):
+    """
+    Create the search table for this database (used by migration 0024).
+    Creates nothing on SQLite builds without FTS5, leaving the icontains fallback.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        if not has_fts5(schema_editor.connection):
+            return
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            f"{', '.join(COLUMNS)}, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        # Make the hidden rank column use the column weights
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rank) VALUES ('rank', 'bm25({', '.join(map(str, WEIGHTS))})')"
+        )
+        # "rowid + 0" stops SQLite from looking each incident up in the index
+        # one by one: the join has to start from the MATCH
+        schema_editor.execute(
+            f"CREATE VIEW {SEARCH_TABLE} AS "
+            f"SELECT rowid + 0 AS incident_id, {FTS_TABLE} AS document, rank FROM {FTS_TABLE}"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE TABLE {SEARCH_TABLE} ("
+            f"incident_id integer PRIMARY KEY REFERENCES incidents_incident (id) "
+            f"ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            f"document tsvector NOT NULL)"
+        )
+        schema_editor.execute(f"CREATE INDEX {SEARCH_TABLE}_document_idx ON {SEARCH_TABLE} USING GIN (document)")
+
+
+def drop_index_table(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"DROP VIEW IF EXISTS {SEARCH_TABLE}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+_available = {}
+
+
+def is_available(using=connection):
+    """True if this database has the search index (False means icontains fallback)."""
+    alias = using.alias
+    if alias not in _available:
+        if using.vendor not in _DOCUMENT_SQL:
+            return False
+        if SEARCH_TABLE not in using.introspection.table_names(include_views=True):
+            # Not cached: the index appears once migrations have run
+            return False
+        _available[alias] = True
+    return _available[alias]
+
+
+def _write(cursor, vendor, where, params):
+    select = _DOCUMENT_SQL[vendor] + where
+    if vendor == 'sqlite':
+        cursor.execute(f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(COLUMNS)}) {select}", params)
+        return
+    vector = ' || '.join(
+        f"setweight(to_tsvector('{PG_CONFIG}', d.c{i}), '{weight}')"
+        for i, weight in enumerate(PG_WEIGHTS, 1)
+    )
+    cursor.execute(
+        f"INSERT INTO {SEARCH_TABLE} (incident_id, document) "
+        f"SELECT d.id, {vector} FROM ({select}) AS d (id, {', '.join(f'c{i}' for i in range(1, 7))}) "
+        f"ON CONFLICT (incident_id) DO UPDATE SET document = EXCLUDED.document",
+        params,
+    )
+
+
+def _delete(cursor, vendor, incident_ids=None):
+    """Delete the given incidents' rows (all rows when incident_ids is None)"""
+    table, key = (FTS_TABLE, 'rowid') if vendor == 'sqlite' else (SEARCH_TABLE, 'incident_id')
+    if incident_ids is None:
+        cursor.execute(f"DELETE FROM {table}")
+    else:
+        cursor.execute(f"DELETE FROM {table} WHERE {key} IN ({', '.join(['%s'] * len(incident_ids))})", incident_ids)
+
+
+def index_incidents(incident_ids):
+    """Re-index incidents from their saved state (deleted ones go via remove_incident)."""
+    incident_ids = list(incident_ids)
+    if not incident_ids or not is_available():
+        return
+    vendor = connection.vendor
+    placeholders = ', '.join(['%s'] * len(incident_ids))
+    with connection.cursor() as cursor:
+        if vendor == 'sqlite':
+            # FTS5 has no upsert: drop the old rows, then insert whatever still exists
+            _delete(cursor, vendor, incident_ids)
+        _write(cursor, vendor, f" WHERE i.id IN ({placeholders})", incident_ids)
+
+
+def index_user_incidents(user_id):
+    """Re-index every incident reported by a user (their username is in "details")."""
+    from .models import Incident
+    if not is_available():
+        return
+    ids = list(Incident.objects.filter(user_id=user_id).values_list('pk', flat=True))
+    for start in range(0, len(ids), INDEX_BATCH_SIZE):
+        index_incidents(ids[start:start + INDEX_BATCH_SIZE])
+
+
+def remove_incident(incident_id):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        _delete(cursor, connection.vendor, [incident_id])
+
+
+def rebuild_index(using=connection):
+    """Re-index every incident; returns the number indexed."""
+    if not is_available(using):
+        return 0
+    vendor = using.vendor
+    with using.cursor() as cursor:
+        _delete(cursor, vendor)
+        _write(cursor, vendor, '', [])
+        if vendor == 'sqlite':
+            # Merge the index segments written by the bulk insert
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT COUNT(*) FROM {SEARCH_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def search_incidents(queryset, query):
+    """
+    Incidents in the queryset matching every word of the query, annotated with
+    search_rank (higher is more relevant; 0 with the icontains fallback).
+    Ordering is left to the caller.
+    """
+    if not query_terms(query):
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+    if not is_available():
+        return queryset.filter(_fallback_filter(query)).annotate(search_rank=Value(0.0, output_field=FloatField()))
+    return queryset.filter(search_entry__document__matches=query).annotate(
+        search_rank=SearchRank(F('search_entry__document'), query)
+    )
+
+
+def matching_ids(query):
+    """Subquery of matching incident ids, for OR-ing with other conditions (unranked)."""
+    from .models import Incident, IncidentSearchEntry
+    if not is_available():
+        return Incident.objects.filter(_fallback_filter(query)).values('pk')
+    return IncidentSearchEntry.objects.filter(document__matches=query).values('incident_id')
+
+
+def _fallback_filter(query):
+    from .models import Comment
+    condition = Q()
+    for term in query_terms(query):
+        condition &= (
+            Q(title__icontains=term) | Q(description__icontains=term) |
+            Q(admin_response__icontains=term) | Q(it_status_message__icontains=term) |
+            Q(user__username__icontains=term) | Q(reporter_name__icontains=term) |
+            Q(laptop_serial__icontains=term) | Q(laptop_model__icontains=term) |
+            Q(department__icontains=term) |
+            Q(pk__in=Comment.objects.filter(message__icontains=term).values('incident_id'))
+        )
+    return condition
@@ -0,0 +1,181 @@
+from django.contrib.auth.models import Group, User
+from django.db.models import DEFERRED, F
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from . import daily_stats, events, roles, search
+from .models import Comment, Incident, UnreadCounter, UnreadMailbox
+from .storage import release_blob, retain_blob
+from .unread_counters import record_deleted_comment, record_new_comment, recount_incident
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    """Bump the ticket owner's unread counters and push a live event whenever a comment is written."""
+    # Comments are searched as part of their incident
+    search.index_incidents([instance.incident_id])
+    if created:
+        record_new_comment(instance)
+        events.publish(
+            'comment_added',
+            incident_id=instance.incident_id,
+            owner_id=instance.incident.user_id,
+            status=instance.incident.status,
+            acknowledged=instance.incident.it_acknowledged,
+            assignee_id=instance.incident.it_acknowledged_by_id,
+            comment_id=instance.pk,
+            actor_id=instance.user_id,
+            actor=instance.user.username,
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    """Take a deleted comment off the owner's unread counters and out of the search index."""
+    record_deleted_comment(instance)
+    search.index_incidents([instance.incident_id])
+
+
+@receiver(post_delete, sender=UnreadCounter)
+def unread_counter_deleted(sender, instance, **kwargs):
+    """Keep the rollup in step when a counter disappears (e.g. its incident was deleted)."""
+    if instance.count:
+        UnreadMailbox.objects.filter(
+            user_id=instance.user_id, total__gte=instance.count
+        ).update(total=F('total') - instance.count)
+
+
+@receiver(post_delete, sender=Incident)
+def incident_deleted(sender, instance, **kwargs):
+    """Release the incident's reference on its content-addressed attachment."""
+    if instance.attachment:
+        release_blob(instance.attachment.name)
+    # Take it out of the daily rollup
+    key = daily_stats.incident_key(instance) or getattr(instance, '_daily_stat_key', None)
+    if key is not None:
+        daily_stats.apply_changes([(key, None)])
+    search.remove_incident(instance.pk)
+
+
+@receiver(post_init, sender=Incident)
+def incident_loaded(sender, instance, **kwargs):
+    """Remember which daily rollup row a loaded incident is counted in, its attachment and its owner."""
+    instance._daily_stat_key = daily_stats.incident_key(instance)
+    # None when the field was deferred: looked up in pre_save if it matters
+    attachment = instance.__dict__.get('attachment', DEFERRED)
+    instance._stored_attachment = None if attachment is DEFERRED else _attachment_name(attachment)
+    instance._stored_owner_id = instance.__dict__.get('user_id')
+
+
+def _attachment_name(value):
+    return getattr(value, 'name', value) or ''
+
+
+def _saves(field, update_fields):
+    return update_fields is None or field in update_fields
+
+
+@receiver(pre_save, sender=Incident)
+def incident_saving(sender, instance, update_fields=None, **kwargs):
+    if instance.pk is not None and instance._daily_stat_key is None:
+        # Loaded with deferred fields (or built by hand): look the row up
+        instance._daily_stat_key = daily_stats.stored_key(instance.pk)
+    if instance._state.adding:
+        instance._stored_attachment = ''
+        instance._stored_owner_id = None
+        return
+    missing = [
+        field for field, stored in (('attachment', instance._stored_attachment), ('user', instance._stored_owner_id))
+        if stored is None and _saves(field, update_fields)
+    ]
+    if missing:
+        stored = Incident.objects.filter(pk=instance.pk).values('attachment', 'user_id').first() or {}
+        if 'attachment' in missing:
+            instance._stored_attachment = _attachment_name(stored.get('attachment'))
+        if 'user' in missing:
+            instance._stored_owner_id = stored.get('user_id')
+
+
+@receiver(post_save, sender=Incident)
+def incident_saved(sender, instance, created, **kwargs):
+    """Move the incident to its new daily rollup row and refresh its search entry."""
+    old_key = None if created else instance._daily_stat_key
+    new_key = daily_stats.incident_key(instance) or daily_stats.stored_key(instance.pk)
+    daily_stats.apply_changes([(old_key, new_key)])
+    instance._daily_stat_key = new_key
+
+    update_fields = kwargs.get('update_fields')
+    # Move the attachment reference when the file was set, replaced or cleared
+    if _saves('attachment', update_fields):
+        old_attachment, new_attachment = instance._stored_attachment, _attachment_name(instance.attachment)
+        if new_attachment != old_attachment:
+            if new_attachment:
+                retain_blob(new_attachment)
+            if old_attachment:
+                release_blob(old_attachment)
+        instance._stored_attachment = new_attachment
+
+    # Unread mail follows the ticket to its new owner
+    if _saves('user', update_fields):
+        if not created and instance._stored_owner_id not in (None, instance.user_id):
+            recount_incident(instance.pk)
+        instance._stored_owner_id = instance.user_id
+
+    if created or update_fields is None or search.INDEXED_FIELDS.intersection(update_fields):
+        search.index_incidents([instance.pk])
+
+    # Live updates for open dashboards (see events.py)
+    payload = {
+        'incident_id': instance.pk,
+        'owner_id': instance.user_id,
+        'title': instance.title,
+        'status': new_key.status if new_key else instance.status,
+        'acknowledged': instance.it_acknowledged,
+        'assignee_id': instance.it_acknowledged_by_id,
+    }
+    if created:
+        events.publish('incident_created', **payload)
+        return
+    if old_key is None or new_key is None:
+        return
+    if old_key.status != new_key.status:
+        events.publish('status_changed', previous_status=old_key.status, **payload)
+    if new_key.assignee and new_key.assignee != old_key.assignee:
+        events.publish(
+            'incident_acknowledged',
+            acknowledged_by=instance.it_acknowledged_by.username if instance.it_acknowledged_by else None,
+            **payload
+        )
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, update_fields=None, **kwargs):
+    # Saves that can't rename (e.g. login updating last_login) skip the lookup
+    if instance.pk is None or not _saves('username', update_fields):
+        instance._stored_username = None
+        return
+    instance._stored_username = User.objects.filter(pk=instance.pk).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    """The username is searchable on every incident the user reported: re-index them after a rename."""
+    stored = getattr(instance, '_stored_username', None)
+    if not created and stored is not None and stored != instance.username:
+        search.index_user_incidents(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def roles_changed(sender, action, **kwargs):
+    """Group membership or permissions changed: drop every cached role set."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        roles.invalidate()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, **kwargs):
+    # Roles are resolved by group name, so a rename or delete changes them too
+    roles.invalidate()
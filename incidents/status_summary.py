@@ -0,0 +1,63 @@
+"""
+Status bar counts for the dashboard and My History pages.
+
+Every bucket is computed in one aggregate() with conditional Count()s instead of
+one count() query per status. Callers can pass a short cache TTL; the cache key is
+a hash of the compiled SQL and parameters, so two requests with the same filters
+(after period/date parsing) share an entry.
+"""
+
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+# Bucket name -> filter. None means "every row in the queryset".
+STATUS_BUCKETS = {
+    'open': Q(status='Open'),
+    'open_in_progress': Q(status__in=['Open', 'In Progress']),
+    'resolved': Q(status='Resolved'),
+    'closed': Q(status='Closed'),
+    'total': None,
+}
+
+CACHE_PREFIX = 'incidents:status_summary:'
+
+
+def _cache_key(queryset, buckets):
+    sql, params = queryset.order_by().query.sql_with_params()
+    raw = f"{sql}|{params!r}|{sorted(buckets)!r}"
+    return CACHE_PREFIX + hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def get_status_summary(queryset, buckets=None, cache_ttl=0):
+    """
+    Count the queryset into the named buckets with a single aggregate query.
+
+    Args:
+        queryset: Incident queryset with every filter except status already applied
+        buckets (dict): name -> Q filter (None counts every row); defaults to STATUS_BUCKETS
+        cache_ttl (int): seconds to cache the result for; 0 disables caching
+
+    Returns:
+        dict: bucket name -> count
+    """
+    if buckets is None:
+        buckets = STATUS_BUCKETS
+
+    key = None
+    if cache_ttl:
+        key = _cache_key(queryset, buckets)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    aggregates = {
+        name: Count('id', filter=condition) if condition is not None else Count('id')
+        for name, condition in buckets.items()
+    }
+    summary = queryset.order_by().aggregate(**aggregates)
+
+    if key:
+        cache.set(key, summary, cache_ttl)
+    return summary
@@ -0,0 +1,111 @@
+"""
+Content-addressed storage for incident attachments.
+
+Every file is stored once under the SHA256 of its bytes, e.g.
+``incident_attachments/ab/ab12...ef.pdf``. Uploading a file that is already
+stored writes nothing to disk. Each AttachmentBlob counts the incidents pointing
+at its file: references are taken and dropped by the Incident save/delete
+signals (see signals.py), inside the incident row's transaction, so a failed
+save leaves the count alone. Files are removed once no incident references
+them any more, whether the incident was deleted or its attachment replaced.
+"""
+
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+
+
+def hash_file(content):
+    """Return the SHA256 of a Django File, reusing the upload handler's digest if present."""
+    digest = getattr(content, 'sha256', None)
+    if digest:
+        return digest
+    sha256_hash = hashlib.sha256()
+    for chunk in content.chunks():
+        sha256_hash.update(chunk)
+    content.seek(0)
+    return sha256_hash.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that names files by content hash and never stores a blob twice."""
+
+    def __init__(self, **kwargs):
+        # Same name always means same bytes, so overwriting on a race is harmless
+        kwargs.setdefault('allow_overwrite', True)
+        super().__init__(**kwargs)
+
+    def blob_name(self, directory, digest, original_name):
+        ext = os.path.splitext(original_name)[1].lower()[:16]
+        return f"{directory}/{digest[:2]}/{digest}{ext}"
+
+    def get_available_name(self, name, max_length=None):
+        # Content-addressed names are final; never add a random suffix
+        return name
+
+    def _save(self, name, content):
+        digest = hash_file(content)
+        name = self.blob_name(os.path.dirname(name), digest, name)
+        # Hold the blob's row while looking for the file, so collect_blob() can't
+        # delete it between exists() and the incident taking its reference
+        lock_blob(name, digest, content.size)
+        if not self.exists(name):
+            name = super()._save(name, content)
+        return name
+
+
+def lock_blob(name, digest, size):
+    """
+    Lock the blob's row (creating it with no references if needed) until the
+    current transaction ends. Returns the AttachmentBlob.
+    """
+    from .models import AttachmentBlob
+
+    while True:
+        AttachmentBlob.objects.get_or_create(name=name, defaults={'sha256': digest, 'size': size})
+        blob = AttachmentBlob.objects.select_for_update().filter(name=name).first()
+        if blob is not None:
+            return blob
+        # collect_blob() deleted it while we waited for the lock
+
+
+def retain_blob(name):
+    """Add one reference to a stored blob (called when an incident starts pointing at it)."""
+    from .models import AttachmentBlob
+
+    if AttachmentBlob.objects.filter(name=name).update(ref_count=F('ref_count') + 1):
+        return
+    # Set by hand rather than uploaded, e.g. a name copied from another incident
+    digest = os.path.splitext(os.path.basename(name))[0]
+    blob = lock_blob(name, digest[:64], attachment_storage.size(name) if attachment_storage.exists(name) else 0)
+    AttachmentBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+
+
+def release_blob(name):
+    """Drop one reference to a stored blob; the file is deleted after commit if that was the last one."""
+    from .models import AttachmentBlob
+
+    if AttachmentBlob.objects.filter(name=name, ref_count__gt=0).update(ref_count=F('ref_count') - 1):
+        transaction.on_commit(lambda: collect_blob(name))
+
+
+def collect_blob(name):
+    """Delete a blob's file and row if nothing references it any more."""
+    from .models import AttachmentBlob
+
+    with transaction.atomic():
+        # Re-checked under the row lock: an upload of the same bytes may have
+        # taken a new reference since release_blob() ran
+        blob = AttachmentBlob.objects.select_for_update().filter(name=name, ref_count=0).first()
+        if blob is None:
+            return
+        attachment_storage.delete(name)
+        blob.delete()
+
+
+attachment_storage = ContentAddressedStorage()
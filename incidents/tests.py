@@ -1,3 +1,478 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission, User
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import events, roles, search
+from .models import AttachmentBlob, Comment, EmployeeProfile, IdempotencyKey, Incident, UnreadCounter
+from .storage import attachment_storage
+from .unread_counters import compute_unread_counts, get_unread_mail_count, mark_comments_read
+from .user_sessions import delete_user_sessions
+
+
+class SessionQuarantineTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser('quarantine_admin', 'qa@example.com', 'Old-passphrase-81')
+
+    def test_quarantine_finds_session_after_password_change(self):
+        self.client.login(username='quarantine_admin', password='Old-passphrase-81')
+        response = self.client.post('/admin/password_change/', {
+            'old_password': 'Old-passphrase-81',
+            'new_password1': 'Fresh-passphrase-93',
+            'new_password2': 'Fresh-passphrase-93',
+        })
+        self.assertEqual(response.status_code, 302)
+        # update_session_auth_hash() cycled the key, and the user is still logged in
+        self.assertEqual(self.client.get('/admin/').status_code, 200)
+
+        self.assertEqual(delete_user_sessions([self.user.pk]), {self.user.pk: 1})
+        self.assertEqual(self.client.get('/admin/').status_code, 302)
+
+    def test_logout_forgets_session(self):
+        self.client.login(username='quarantine_admin', password='Old-passphrase-81')
+        self.assertEqual(self.user.user_sessions.count(), 1)
+        self.client.post('/admin/logout/')
+        self.assertEqual(self.user.user_sessions.count(), 0)
+
+
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('ticket_owner')
+        self.support = User.objects.create_user('support_agent')
+        self.incident = Incident.objects.create(user=self.owner, title='Laptop', description='no boot')
+
+    def comment(self, user, message='Any update?'):
+        return Comment.objects.create(incident=self.incident, user=user, message=message)
+
+    def counts(self):
+        counters = dict(
+            ((user_id, incident_id), count)
+            for user_id, incident_id, count in UnreadCounter.objects.filter(count__gt=0)
+            .values_list('user_id', 'incident_id', 'count')
+        )
+        self.assertEqual(counters, compute_unread_counts())
+        return get_unread_mail_count(self.owner), get_unread_mail_count(self.support)
+
+    def test_deleting_unread_comments_decrements_the_badge(self):
+        first = self.comment(self.support)
+        self.comment(self.support, 'Second')
+        self.assertEqual(self.counts(), (2, 0))
+        first.delete()
+        self.assertEqual(self.counts(), (1, 0))
+        # Bulk delete, as the admin action does
+        Comment.objects.filter(incident=self.incident).delete()
+        self.assertEqual(self.counts(), (0, 0))
+
+    def test_deleting_the_incident_clears_its_counts(self):
+        self.comment(self.support)
+        self.comment(self.support, 'Second')
+        self.incident.delete()
+        self.assertEqual(self.counts(), (0, 0))
+
+    def test_deleting_read_comments_leaves_the_badge(self):
+        read = self.comment(self.support)
+        mark_comments_read(self.owner, self.incident)
+        Comment.objects.filter(pk=read.pk).update(created_at=timezone.now() - timedelta(minutes=1))
+        self.comment(self.support, 'Unread one')
+        Comment.objects.get(pk=read.pk).delete()
+        self.assertEqual(self.counts(), (1, 0))
+
+    def test_owner_change_moves_the_counts(self):
+        self.comment(self.support)
+        self.comment(self.owner, 'Owner reply')
+        self.assertEqual(self.counts(), (1, 0))
+        self.incident.user = self.support
+        self.incident.save()
+        # The support agent's own comment isn't mail for them; the old owner's reply is
+        self.assertEqual(self.counts(), (0, 1))
+
+
+class DashboardPaginationTests(TestCase):
+    def setUp(self):
+        manager = User.objects.create_user('dashboard_manager', is_staff=True)
+        manager.groups.add(Group.objects.get_or_create(name='Manager')[0])
+        self.client.force_login(manager)
+        reporter = User.objects.create_user('dashboard_reporter')
+        Incident.objects.bulk_create([
+            Incident(user=reporter, title=f'Ticket {i}', description='queued') for i in range(25)
+        ])
+
+    def test_next_links_walk_every_incident_without_offset(self):
+        seen = []
+        url = '/dashboard/?page_size=10'
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertFalse([q['sql'] for q in queries if 'OFFSET' in q['sql'] and 'incidents_incident' in q['sql']])
+            seen += [item['incident'].pk for item in response.context['incidents_with_unread']]
+            cursor = response.context['next_cursor']
+            url = f'/dashboard/?page_size=10&after={cursor}' if cursor else None
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_bad_cursor_starts_from_the_newest(self):
+        response = self.client.get('/dashboard/?page_size=10&after=not-a-cursor')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['incidents_with_unread']), 10)
+
+
+class BulkIngestTests(TestCase):
+    def test_bad_items_are_skipped_and_the_rest_created(self):
+        user = User.objects.create_user('ingest_reporter')
+        items = [
+            {'title': 'Huge id', 'user_id': 99999999999999999999999},
+            {'title': 'Bool id', 'user_id': True},
+            {'title': 'Superscript id', 'user_id': '\u00b2'},
+            {'title': 'Long serial', 'user_id': user.pk, 'laptop_serial': 'X' * 101},
+            {'title': 'Odd status', 'user_id': user.pk, 'status': {'name': 'Open'}},
+            {'title': ['not', 'text'], 'user_id': user.pk},
+            {'title': 'Printer offline', 'user_id': user.pk, 'department': 'IT'},
+        ]
+        response = self.client.post(
+            '/webhook-test/new-incidents/', json.dumps({'incidents': items}), content_type='application/json'
+        )
+        results = response.json()['results']
+        self.assertEqual([result['success'] for result in results], [False] * 6 + [True])
+        self.assertEqual(list(Incident.objects.values_list('title', 'user_id')), [('Printer offline', user.pk)])
+
+
+class EventScopeTests(TestCase):
+    def setUp(self):
+        self.reporter = User.objects.create_user('event_reporter')
+        self.staff = User.objects.create_user('event_staff', is_staff=True)
+        self.other_staff = User.objects.create_user('event_other_staff', is_staff=True)
+
+    def published(self, action):
+        with mock.patch.object(events, 'publish') as publish:
+            action()
+        return [{'type': call.args[0], 'data': call.kwargs} for call in publish.call_args_list]
+
+    def receivers(self, event):
+        async def check():
+            subscriptions = {
+                'reporter': events.Subscription(self.reporter.pk, False),
+                'staff': events.Subscription(self.staff.pk, True),
+                'other_staff': events.Subscription(self.other_staff.pk, True),
+                'manager': events.Subscription(0, True, sees_all=True),
+            }
+            return {name for name, subscription in subscriptions.items() if subscription.wants(event)}
+        return asyncio.run(check())
+
+    def test_limited_staff_see_only_their_dashboard_tickets(self):
+        [created] = self.published(lambda: setattr(self, 'incident', Incident.objects.create(
+            user=self.reporter, title='Badge reader', description='door 2',
+        )))
+        self.assertEqual(self.receivers(created), {'reporter', 'staff', 'other_staff', 'manager'})
+
+        def acknowledge():
+            self.incident.status = 'In Progress'
+            self.incident.it_acknowledged = True
+            self.incident.it_acknowledged_by = self.staff
+            self.incident.save()
+        for event in self.published(acknowledge):
+            self.assertEqual(self.receivers(event), {'reporter', 'staff', 'manager'})
+
+        [comment] = self.published(lambda: Comment.objects.create(
+            incident=self.incident, user=self.staff, message='Replacing the reader',
+        ))
+        self.assertEqual(self.receivers(comment), {'reporter', 'staff', 'manager'})
+
+
+class ClassifyTicketsTests(TestCase):
+    def test_bad_items_get_their_own_error(self):
+        tickets = [
+            {'title': 42, 'description': 'number as title'},
+            {'title': 'Mouse', 'description': ['not', 'text']},
+            {'ticket_id': 99999999999999999999999},
+            {'title': 'Cannot connect to the VPN', 'description': 'Timeout from home'},
+        ]
+        response = self.client.post(
+            '/api/classify-tickets/', json.dumps({'tickets': tickets}), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(['error' in result for result in results], [True, True, True, False])
+        self.assertIn('predicted_category', results[3])
+
+
+class ClassifyBacklogTests(TestCase):
+    def test_rows_categorized_mid_run_are_skipped_not_counted(self):
+        import ticket_classifier
+        user = User.objects.create_user('backlog_user')
+        first, second = (
+            Incident.objects.create(user=user, title=f'Ticket {n}', description='printer jam', category='')
+            for n in range(2)
+        )
+
+        def classify_while_n8n_runs(texts):
+            # n8n classifies the second ticket while the batch is being predicted
+            Incident.objects.filter(pk=second.pk).update(category='Network')
+            return [{'category': 'Hardware', 'confidence': 1.0} for _text in texts]
+
+        out = io.StringIO()
+        with mock.patch.object(ticket_classifier, 'classify_many', side_effect=classify_while_n8n_runs):
+            call_command('classify_backlog', workers=1, stdout=out)
+        self.assertIn('Classified 1 incident(s)', out.getvalue())
+        self.assertIn('Skipped 1 incident(s)', out.getvalue())
+        self.assertIn('  - Hardware: 1', out.getvalue())
+        self.assertEqual(Incident.objects.get(pk=second.pk).category, 'Network')
+        self.assertEqual(Incident.objects.get(pk=first.pk).category, 'Hardware')
+
+
+class SearchIndexTests(TestCase):
+    def test_renamed_user_is_found_by_new_name(self):
+        user = User.objects.create_user('alice')
+        incident = Incident.objects.create(user=user, title='Monitor flicker', description='desk 4')
+        user.username = 'bob'
+        user.save()
+        found = search.search_incidents(Incident.objects.all(), 'bob')
+        self.assertEqual(list(found.values_list('pk', flat=True)), [incident.pk])
+        self.assertFalse(search.search_incidents(Incident.objects.all(), 'alice').exists())
+
+    def test_fallback_searches_the_indexed_columns(self):
+        user = User.objects.create_user('carol')
+        incident = Incident.objects.create(
+            user=user, title='Slow boot', description='desk 9',
+            department='Finance', laptop_model='ThinkPad', reporter_name='Robert',
+        )
+        with mock.patch.object(search, 'is_available', return_value=False):
+            for query in ('finance', 'thinkpad', 'robert'):
+                with self.subTest(query=query):
+                    found = search.search_incidents(Incident.objects.all(), query)
+                    self.assertEqual(list(found.values_list('pk', flat=True)), [incident.pk])
+                    matched = Incident.objects.filter(pk__in=search.matching_ids(query))
+                    self.assertEqual(list(matched.values_list('pk', flat=True)), [incident.pk])
+
+
+class QuarantineApiTests(TestCase):
+    def quarantine(self, payload):
+        return self.client.post('/api/quarantine-users/', json.dumps(payload), content_type='application/json')
+
+    def test_non_string_selectors_are_rejected(self):
+        for payload in ({'department': ['FIN']}, {'department': 7}, {'laptop_serial': {'sn': 1}},
+                        {'user_ids': [99999999999999999999999]}, {'user_ids': [-1]}):
+            with self.subTest(payload=payload):
+                self.assertEqual(self.quarantine(payload).status_code, 400)
+
+    def test_user_ids_are_quarantined(self):
+        user = User.objects.create_user('quarantine_target')
+        response = self.quarantine({'user_ids': [user.pk]})
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertFalse(user.is_active)
+
+    def test_department_selector_skips_staff(self):
+        employee = User.objects.create_user('fin_employee')
+        admin = User.objects.create_user('fin_admin', is_staff=True)
+        for user in (employee, admin):
+            EmployeeProfile.objects.create(user=user, department='FIN')
+        response = self.quarantine({'department': 'Finance'})
+        self.assertEqual(response.status_code, 200)
+        statuses = {result['user_id']: result['status'] for result in response.json()['results']}
+        self.assertEqual(statuses, {employee.pk: 'quarantined', admin.pk: 'skipped'})
+        admin.refresh_from_db()
+        self.assertTrue(admin.is_active)
+
+    @override_settings(N8N_API_SECRET='s3cret')
+    def test_shared_secret_is_required_when_set(self):
+        user = User.objects.create_user('secret_target')
+        self.assertEqual(self.quarantine({'user_ids': [user.pk]}).status_code, 403)
+        response = self.client.post(
+            '/api/quarantine-users/', json.dumps({'user_ids': [user.pk]}),
+            content_type='application/json', HTTP_X_N8N_SECRET='s3cret',
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class RoleCacheTests(TestCase):
+    def setUp(self):
+        caches[settings.ROLE_CACHE].clear()
+        self.user = User.objects.create_user('role_user')
+        self.manager = Group.objects.create(name=roles.MANAGER_GROUP)
+        self.auditors = Group.objects.create(name='Auditors')
+        app_label, codename = roles.VIEW_ALL_GLOBAL_PERMISSION
+        self.permission = Permission.objects.get(content_type__app_label=app_label, codename=codename)
+
+    def request(self):
+        # A fresh request each time, so only the shared role cache carries over
+        return SimpleNamespace(user=User.objects.get(pk=self.user.pk))
+
+    def test_removing_manager_membership_drops_the_role(self):
+        self.user.groups.add(self.manager)
+        self.assertTrue(roles.is_manager(self.request()))
+        self.user.groups.remove(self.manager)
+        self.assertFalse(roles.is_manager(self.request()))
+
+    def test_renaming_the_manager_group_drops_the_role(self):
+        self.user.groups.add(self.manager)
+        self.assertTrue(roles.is_manager(self.request()))
+        self.manager.name = 'Former managers'
+        self.manager.save()
+        self.assertFalse(roles.is_manager(self.request()))
+
+    def test_deleting_the_manager_group_drops_the_role(self):
+        self.user.groups.add(self.manager)
+        self.assertTrue(roles.is_manager(self.request()))
+        self.manager.delete()
+        self.assertFalse(roles.is_manager(self.request()))
+
+    def test_group_permission_changes_are_picked_up(self):
+        self.user.groups.add(self.auditors)
+        self.assertFalse(roles.can_view_all_global_tickets(self.request()))
+        self.auditors.permissions.add(self.permission)
+        self.assertTrue(roles.can_view_all_global_tickets(self.request()))
+        self.auditors.permissions.remove(self.permission)
+        self.assertFalse(roles.can_view_all_global_tickets(self.request()))
+
+
+class AttachmentReferenceTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix='sirts_test_media_')
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user('attachment_user')
+
+    def report(self, content, name='log.txt'):
+        return Incident.objects.create(
+            user=self.user, title='Attachment', description='file',
+            attachment=SimpleUploadedFile(name, content),
+        )
+
+    def refs(self, name):
+        return AttachmentBlob.objects.filter(name=name).values_list('ref_count', flat=True).first()
+
+    def test_shared_blob_counts_every_incident(self):
+        first = self.report(b'same bytes')
+        second = self.report(b'same bytes')
+        self.assertEqual(first.attachment.name, second.attachment.name)
+        self.assertEqual(self.refs(first.attachment.name), 2)
+        first.delete()
+        self.assertEqual(self.refs(second.attachment.name), 1)
+        self.assertTrue(attachment_storage.exists(second.attachment.name))
+
+    def test_replacing_and_clearing_release_the_old_file(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            incident = self.report(b'first version')
+        old_name = incident.attachment.name
+        with self.captureOnCommitCallbacks(execute=True):
+            incident.attachment = SimpleUploadedFile('log.txt', b'second version')
+            incident.save()
+        new_name = incident.attachment.name
+        self.assertIsNone(self.refs(old_name))
+        self.assertFalse(attachment_storage.exists(old_name))
+        self.assertEqual(self.refs(new_name), 1)
+
+        reloaded = Incident.objects.get(pk=incident.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            reloaded.attachment = None
+            reloaded.save()
+        self.assertIsNone(self.refs(new_name))
+        self.assertFalse(attachment_storage.exists(new_name))
+
+    def test_rolled_back_save_takes_no_reference(self):
+        kept = self.report(b'shared bytes')
+        try:
+            with transaction.atomic():
+                self.report(b'shared bytes')
+                raise RuntimeError('request failed after the save')
+        except RuntimeError:
+            pass
+        self.assertEqual(self.refs(kept.attachment.name), 1)
+
+    def test_upload_after_release_keeps_the_file(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            incident = self.report(b'racing bytes')
+            name = incident.attachment.name
+            incident.delete()
+            # Same bytes uploaded before the release's deletion runs
+            again = self.report(b'racing bytes')
+        for callback in callbacks:
+            callback()
+        self.assertEqual(again.attachment.name, name)
+        self.assertEqual(self.refs(name), 1)
+        self.assertTrue(attachment_storage.exists(name))
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.incident = Incident.objects.create(
+            user=User.objects.create_user('callback_user'), title='Callback', description='n8n',
+        )
+
+    def post(self, url, payload, **headers):
+        return self.client.post(url, json.dumps(payload), content_type='application/json', headers=headers)
+
+    def set_category(self, category, **headers):
+        return self.post('/api/update-ticket-category/', {'ticket_id': self.incident.pk, 'category': category}, **headers)
+
+    def comment(self, payload, **headers):
+        return self.post('/api/add-ticket-comment/', payload, **headers)
+
+    def test_state_changes_without_a_key_all_apply(self):
+        for category in ('Hardware', 'Network', 'Hardware'):
+            self.assertEqual(self.set_category(category).status_code, 200)
+        self.incident.refresh_from_db()
+        self.assertEqual(self.incident.category, 'Hardware')
+
+    def test_header_key_replays_and_rejects_a_different_body(self):
+        first = self.set_category('Network', **{'Idempotency-Key': 'category-1'})
+        replay = self.set_category('Network', **{'Idempotency-Key': 'category-1'})
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(replay.content, first.content)
+        self.assertEqual(self.set_category('Software', **{'Idempotency-Key': 'category-1'}).status_code, 422)
+
+    def test_repeated_comment_body_is_posted_once(self):
+        payload = {'ticket_id': self.incident.pk, 'message': 'Scan finished'}
+        self.assertEqual(self.comment(payload).status_code, 200)
+        self.assertEqual(self.comment(payload)['Idempotent-Replayed'], 'true')
+        self.assertEqual(Comment.objects.filter(incident=self.incident).count(), 1)
+
+    def test_errors_are_not_replayed(self):
+        payload = {'ticket_id': self.incident.pk + 1, 'message': 'Arrived before its ticket'}
+        self.assertEqual(self.comment(payload).status_code, 404)
+        Incident.objects.create(pk=self.incident.pk + 1, user=self.incident.user, title='Late', description='n8n')
+        self.assertEqual(self.comment(payload).status_code, 200)
+
+    def test_claim_released_mid_race_is_claimed_again(self):
+        create = IdempotencyKey.objects.create
+        attempts = []
+
+        def racing_create(**fields):
+            attempts.append(fields['key'])
+            if len(attempts) == 1:
+                # Another request held the key and deleted it before our lookup
+                raise IntegrityError('UNIQUE constraint failed')
+            return create(**fields)
+
+        with mock.patch.object(IdempotencyKey.objects, 'create', side_effect=racing_create):
+            first = self.set_category('Network', **{'Idempotency-Key': 'category-race'})
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(first.status_code, 200)
+        replay = self.set_category('Network', **{'Idempotency-Key': 'category-race'})
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+
+    def test_abandoned_claim_expires_after_the_lease(self):
+        self.assertEqual(self.set_category('Other', **{'Idempotency-Key': 'crashed'}).status_code, 200)
+        # As if the worker had died mid-request
+        key = IdempotencyKey.objects.get()
+        IdempotencyKey.objects.filter(pk=key.pk).update(status_code=0, body=b'')
+        self.assertEqual(self.set_category('Other', **{'Idempotency-Key': 'crashed'}).status_code, 409)
+        IdempotencyKey.objects.filter(pk=key.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.set_category('Other', **{'Idempotency-Key': 'crashed'}).status_code, 200)
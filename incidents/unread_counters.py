@@ -0,0 +1,185 @@
+"""
+Helpers that keep UnreadCounter / UnreadMailbox in step with Comment and CommentRead.
+
+Unread "mail" for a user means comments left by other users on that user's own
+incidents since they last read the ticket. Instead of recomputing that on every
+request, counters are bumped when a comment is written, decremented when an
+unread comment is deleted, moved when the ticket changes owner and zeroed when
+the owner reads the ticket, so the navbar badge only needs UnreadMailbox.total.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Comment, CommentRead, Incident, UnreadCounter, UnreadMailbox
+
+
+def record_new_comment(comment):
+    """Increment the ticket owner's unread counters for a newly created comment."""
+    owner_id = comment.incident.user_id
+    if owner_id == comment.user_id:
+        # People don't get mail for their own comments
+        return
+
+    with transaction.atomic():
+        updated = UnreadCounter.objects.filter(
+            user_id=owner_id, incident_id=comment.incident_id
+        ).update(count=F('count') + 1)
+        if not updated:
+            counter, created = UnreadCounter.objects.get_or_create(
+                user_id=owner_id, incident_id=comment.incident_id, defaults={'count': 1}
+            )
+            if not created:
+                UnreadCounter.objects.filter(pk=counter.pk).update(count=F('count') + 1)
+
+        updated = UnreadMailbox.objects.filter(user_id=owner_id).update(total=F('total') + 1)
+        if not updated:
+            mailbox, created = UnreadMailbox.objects.get_or_create(user_id=owner_id, defaults={'total': 1})
+            if not created:
+                UnreadMailbox.objects.filter(pk=mailbox.pk).update(total=F('total') + 1)
+
+
+def record_deleted_comment(comment):
+    """Decrement the ticket owner's unread counters if a deleted comment was still unread."""
+    owner_id = Incident.objects.filter(pk=comment.incident_id).values_list('user_id', flat=True).first()
+    if owner_id is None or owner_id == comment.user_id:
+        # The incident is being deleted too (its counters go with it), or it was the owner's own comment
+        return
+    last_read = CommentRead.objects.filter(
+        user_id=owner_id, incident_id=comment.incident_id
+    ).values_list('last_read_at', flat=True).first()
+    if last_read is not None and comment.created_at <= last_read:
+        return
+
+    with transaction.atomic():
+        updated = UnreadCounter.objects.filter(
+            user_id=owner_id, incident_id=comment.incident_id, count__gt=0
+        ).update(count=F('count') - 1)
+        if updated:
+            UnreadMailbox.objects.filter(user_id=owner_id, total__gt=0).update(total=F('total') - 1)
+
+
+def recount_incident(incident_id):
+    """Recompute one incident's unread counter from scratch, e.g. after its owner changed."""
+    with transaction.atomic():
+        # One row at a time, so unread_counter_deleted takes each off its old owner's mailbox
+        for counter in UnreadCounter.objects.filter(incident_id=incident_id):
+            counter.delete()
+        for (owner_id, _incident_id), count in compute_unread_counts([incident_id]).items():
+            UnreadCounter.objects.create(user_id=owner_id, incident_id=incident_id, count=count)
+            updated = UnreadMailbox.objects.filter(user_id=owner_id).update(total=F('total') + count)
+            if not updated:
+                mailbox, created = UnreadMailbox.objects.get_or_create(user_id=owner_id, defaults={'total': count})
+                if not created:
+                    UnreadMailbox.objects.filter(pk=mailbox.pk).update(total=F('total') + count)
+
+
+def clear_unread(user, incident):
+    """Zero the user's unread counter for an incident and take it off their rollup."""
+    with transaction.atomic():
+        counter = UnreadCounter.objects.select_for_update().filter(
+            user=user, incident=incident, count__gt=0
+        ).first()
+        if counter is None:
+            return
+        UnreadMailbox.objects.filter(user=user, total__gte=counter.count).update(
+            total=F('total') - counter.count
+        )
+        counter.count = 0
+        counter.save(update_fields=['count'])
+
+
+def mark_comments_read(user, incident):
+    """Record that the user has read every comment on the incident."""
+    CommentRead.objects.update_or_create(
+        user=user,
+        incident=incident,
+        defaults={'last_read_at': timezone.now()}
+    )
+    clear_unread(user, incident)
+
+
+def get_unread_mail_count(user):
+    """Return the user's unread mail total (a single primary-key lookup)."""
+    total = UnreadMailbox.objects.filter(pk=user.pk).values_list('total', flat=True).first()
+    return total or 0
+
+
+def annotate_unread_comments(queryset, user):
+    """
+    Annotate an Incident queryset with unread_comments_count for the given user.
+    Counts every comment newer than the user's CommentRead (all of them if never read),
+    as one correlated subquery rather than a query per incident.
+    """
+    last_read = CommentRead.objects.filter(
+        user=user,
+        incident=OuterRef('incident'),
+    ).values('last_read_at')[:1]
+    unread = Comment.objects.filter(
+        incident=OuterRef('pk')
+    ).annotate(
+        last_read_at=Subquery(last_read)
+    ).filter(
+        Q(last_read_at__isnull=True) | Q(created_at__gt=F('last_read_at'))
+    ).order_by().values('incident').annotate(
+        total=Count('id')
+    ).values('total')
+    return queryset.annotate(
+        unread_comments_count=Coalesce(Subquery(unread, output_field=IntegerField()), 0)
+    )
+
+
+def compute_unread_counts(incident_ids=None):
+    """
+    Recompute unread counts from Comment and CommentRead (for the given incidents, or all).
+    Returns a dict of {(user_id, incident_id): count} for every non-zero counter.
+    """
+    last_read = CommentRead.objects.filter(
+        user_id=OuterRef('incident__user_id'),
+        incident_id=OuterRef('incident_id'),
+    ).values('last_read_at')[:1]
+    comments = Comment.objects.all()
+    if incident_ids is not None:
+        comments = comments.filter(incident_id__in=incident_ids)
+    rows = comments.exclude(
+        user_id=F('incident__user_id')
+    ).annotate(
+        last_read_at=Subquery(last_read)
+    ).filter(
+        Q(last_read_at__isnull=True) | Q(created_at__gt=F('last_read_at'))
+    ).values(
+        'incident__user_id', 'incident_id'
+    ).annotate(
+        unread=Count('id')
+    ).order_by()
+    return {(row['incident__user_id'], row['incident_id']): row['unread'] for row in rows}
+
+
+def rebuild_unread_counters(expected=None):
+    """
+    Replace every UnreadCounter and UnreadMailbox row with freshly computed values.
+    Returns the number of counters and mailboxes written.
+    """
+    if expected is None:
+        expected = compute_unread_counts()
+
+    totals = {}
+    for (user_id, _incident_id), count in expected.items():
+        totals[user_id] = totals.get(user_id, 0) + count
+
+    with transaction.atomic():
+        # Mailboxes go first so the UnreadCounter post_delete handler has nothing to adjust
+        UnreadMailbox.objects.all().delete()
+        UnreadCounter.objects.all().delete()
+        UnreadCounter.objects.bulk_create([
+            UnreadCounter(user_id=user_id, incident_id=incident_id, count=count)
+            for (user_id, incident_id), count in expected.items()
+        ], batch_size=1000)
+        UnreadMailbox.objects.bulk_create([
+            UnreadMailbox(user_id=user_id, total=total)
+            for user_id, total in totals.items()
+        ], batch_size=1000)
+
+    return len(expected), len(totals)
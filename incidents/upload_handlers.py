@@ -0,0 +1,27 @@
+import hashlib
+
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+
+class HashingTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Streams every upload into a temporary file and computes its SHA256 on the way.
+
+    Each chunk is hashed and written in the same pass, so memory per upload is
+    bounded by the chunk size. Saving the file to a FileField afterwards moves the
+    temporary file into MEDIA_ROOT instead of copying it. The hex digest is
+    available as ``uploaded_file.sha256``.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.sha256 = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded_file = super().file_complete(file_size)
+        uploaded_file.sha256 = self.sha256.hexdigest()
+        return uploaded_file
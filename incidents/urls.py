@@ -11,7 +11,11 @@ urlpatterns = [
     path('mail/open/<int:ticket_id>/', views.open_mail_notification, name='open_mail_notification'),
     path('api/update-ticket/', views.update_incident_from_n8n, name='update_ticket'),
     path('api/quarantine-user/', views.quarantine_user_api, name='quarantine_user_api'),
+    path('api/quarantine-users/', views.quarantine_users_api, name='quarantine_users_api'),
     path('api/classify-ticket/', views.classify_ticket_api, name='classify_ticket_api'),
+    path('api/classify-tickets/', views.classify_tickets_api, name='classify_tickets_api'),
+    path('api/classifier-stats/', views.classifier_stats_api, name='classifier_stats_api'),
+    path('api/incidents/', views.incidents_api, name='incidents_api'),
     path('api/update-ticket-category/', views.update_ticket_category, name='update_ticket_category'),
     path('api/add-ticket-comment/', views.add_ticket_comment_from_n8n, name='add_ticket_comment_from_n8n'),
     
@@ -28,9 +32,13 @@ urlpatterns = [
     # Calendar
     path('calendar/', views.incident_calendar, name='incident_calendar'), # The page itself
     path('calendar/data/', views.incident_calendar_data, name='calendar_data'),
+
+    # Live updates (Server-Sent Events, ASGI only)
+    path('events/', views.event_stream, name='event_stream'),
     
     # Webhook endpoint for n8n
     path('webhook-test/new-incident/', views.n8n_webhook_new_incident, name='n8n_webhook_new_incident'),
+    path('webhook-test/new-incidents/', views.n8n_webhook_new_incidents_bulk, name='n8n_webhook_new_incidents_bulk'),
     
     # Telegram webhook endpoints for IT acknowledgment
     path('webhook/telegram/acknowledge/<int:ticket_id>/', views.telegram_acknowledge, name='telegram_acknowledge'),
@@ -0,0 +1,152 @@
+"""
+Index of which sessions belong to which user.
+
+Django's Session table only stores the user id inside the encoded session data,
+so finding a user's sessions means decoding every active session. UserSession
+maps session_key -> user, so quarantine becomes two indexed DELETEs however
+many people are logged in.
+
+The mapping is kept by SessionStore (SESSION_ENGINE = 'incidents.user_sessions'),
+which records it whenever an authenticated session is saved under a key it
+isn't indexed under yet: at login, and whenever the key is cycled, e.g. by
+update_session_auth_hash() after a password change.
+
+Expired sessions are not cleaned up during quarantine; run
+`python manage.py clear_expired_sessions` on a schedule instead.
+"""
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends import db
+from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.utils import timezone
+
+from .models import UserSession
+
+
+def record_session(user_id, session_key):
+    """Remember that session_key belongs to user_id."""
+    if session_key:
+        UserSession.objects.update_or_create(session_key=session_key, defaults={'user_id': user_id})
+
+
+def forget_session(session_key):
+    """Drop the mapping for a session that is being deleted."""
+    if session_key:
+        UserSession.objects.filter(session_key=session_key).delete()
+
+
+class SessionStore(db.SessionStore):
+    """Database sessions that keep UserSession in step with every key they are saved under."""
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        # (session_key, user id) the index already has for this session
+        self._indexed = None
+
+    def load(self):
+        data = super().load()
+        if data.get(SESSION_KEY) is not None:
+            # Loaded under its key: recorded when that key was first saved
+            self._indexed = (self.session_key, str(data[SESSION_KEY]))
+        return data
+
+    def _owner(self):
+        user_id = self._get_session().get(SESSION_KEY)
+        return (self.session_key, str(user_id)) if user_id is not None and self.session_key else None
+
+    def save(self, must_create=False):
+        super().save(must_create=must_create)
+        owner = self._owner()
+        if owner is not None and owner != self._indexed:
+            record_session(owner[1], owner[0])
+            self._indexed = owner
+
+    async def asave(self, must_create=False):
+        await super().asave(must_create=must_create)
+        owner = self._owner()
+        if owner is not None and owner != self._indexed:
+            await sync_to_async(record_session)(owner[1], owner[0])
+            self._indexed = owner
+
+    def delete(self, session_key=None):
+        session_key = session_key or self.session_key
+        super().delete(session_key)
+        forget_session(session_key)
+
+    async def adelete(self, session_key=None):
+        session_key = session_key or self.session_key
+        await super().adelete(session_key)
+        await sync_to_async(forget_session)(session_key)
+
+
+def delete_user_sessions(user_ids):
+    """
+    Log the given users out everywhere.
+
+    Args:
+        user_ids: a user ID or an iterable of them
+
+    Returns:
+        dict: user ID -> number of sessions deleted
+    """
+    if isinstance(user_ids, int):
+        user_ids = [user_ids]
+    user_ids = list(user_ids)
+    counts = dict.fromkeys(user_ids, 0)
+    with transaction.atomic():
+        owners = dict(
+            UserSession.objects.filter(user_id__in=user_ids).values_list('session_key', 'user_id')
+        )
+        if not owners:
+            return counts
+        # Only count sessions that were still valid; expired ones are just cleaned up
+        live = Session.objects.filter(
+            session_key__in=list(owners), expire_date__gte=timezone.now()
+        ).values_list('session_key', flat=True)
+        for session_key in live:
+            counts[owners[session_key]] += 1
+        Session.objects.filter(session_key__in=list(owners)).delete()
+        UserSession.objects.filter(user_id__in=user_ids).delete()
+    return counts
+
+
+def quarantine_users(user_ids):
+    """
+    Deactivate the given users and log them out everywhere.
+    All accounts are frozen with one UPDATE and all sessions purged in one pass.
+
+    Returns:
+        dict: user ID -> {'username', 'account_was_active', 'sessions_deleted'}
+        (IDs with no matching user are left out)
+    """
+    user_ids = list(user_ids)
+    with transaction.atomic():
+        users = {
+            user_id: {'username': username, 'account_was_active': is_active}
+            for user_id, username, is_active in User.objects.filter(pk__in=user_ids)
+            .values_list('id', 'username', 'is_active')
+        }
+        if not users:
+            return {}
+        User.objects.filter(pk__in=list(users)).update(is_active=False)
+        sessions = delete_user_sessions(list(users))
+    for user_id, result in users.items():
+        result['sessions_deleted'] = sessions[user_id]
+    return users
+
+
+def clear_expired_sessions():
+    """
+    Delete expired sessions and index rows whose session no longer exists.
+
+    Returns:
+        tuple: (sessions deleted, index rows deleted)
+    """
+    sessions_deleted = Session.objects.filter(expire_date__lt=timezone.now()).delete()[0]
+    index_deleted = UserSession.objects.exclude(
+        session_key__in=Session.objects.values('session_key')
+    ).delete()[0]
+    return sessions_deleted, index_deleted
@@ -2,9 +2,8 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm
-from django.contrib.auth.models import User, Group
+from django.contrib.auth.models import User
 from django.contrib import messages
-from django.contrib.sessions.models import Session
 from .models import (
     Incident,
     EmployeeProfile,
@@ -12,30 +11,169 @@ from .models import (
     CommentRead,
     incident_attachment_filename_is_image,
 )
-from datetime import datetime, timedelta, date
+from . import daily_stats, events, keyset, roles, search, unread_counters
+from .idempotency import idempotent
+from .ingest import ingest_incidents
+from .replicas import reads_from_replica
+from .status_summary import STATUS_BUCKETS, get_status_summary
+from .outbox import enqueue_webhook
+from .user_sessions import delete_user_sessions, quarantine_users
+from datetime import datetime, timedelta, date, timezone as dt_timezone
 from django.utils import timezone
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
 from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.conf import settings
 from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Count, Prefetch, Q
+from django.db.models.functions import TruncDate
 from urllib.parse import urlencode
+import asyncio
 import json
-import requests
 import hashlib
+import hmac
+
+
+def _parse_filter_date(value):
+    """Date from a dd/mm/yyyy or yyyy-mm-dd filter value, or None"""
+    for fmt in ('%d/%m/%Y', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _start_of_day(day):
+    """Midnight at the start of a day in the current time zone"""
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def _period_bounds(period_filter, from_date, to_date, today):
+    """First and last day (inclusive) selected by the dashboard filters; None means open-ended"""
+    # If date range is specified, use it instead of period
+    if from_date or to_date:
+        return _parse_filter_date(from_date), _parse_filter_date(to_date)
+    # Otherwise use period filter
+    if period_filter == 'today':
+        return today, today
+    elif period_filter == 'week':
+        return today - timedelta(days=today.weekday()), None
+    elif period_filter == 'month':
+        return today.replace(day=1), None
+    else:  # 'all'
+        return None, None
+
+
+def _filter_created_between(queryset, first_day, last_day):
+    """Incidents created between two days (inclusive; None is open-ended)"""
+    # Compare created_at with datetimes (not created_at__date) so the indexes apply
+    if first_day:
+        queryset = queryset.filter(created_at__gte=_start_of_day(first_day))
+    if last_day:
+        queryset = queryset.filter(created_at__lt=_start_of_day(last_day + timedelta(days=1)))
+    return queryset
+
+
+def _dashboard_incidents(request, see_all):
+    """
+    Incidents listed on the admin dashboard for the filters in request.GET
+    (status, it_status, period/from/to, priority, user, serial, view_user,
+    view_serial, my_tickets/ticket_type, q). Shared with the JSON listing API so
+    both accept the same filter vocabulary. Unordered; with q, annotated with
+    search_rank.
+    """
+    params = request.GET
+    status_filter = params.get('status')
+    user_filter = params.get('user')
+    priority_filter = params.get('priority')
+    serial_filter = params.get('serial')
+    view_user = params.get('view_user')
+    view_serial = params.get('view_serial')
+    my_tickets = params.get('my_tickets')
+    ticket_type = params.get('ticket_type', 'active')
+
+    # Basic Filtering Logic
+    # Users with 'view_all_global_tickets' permission see all tickets
+    # Others see only unassigned open tickets OR their own tickets
+    if my_tickets == '1':
+        # My Tickets view: show only tickets claimed by current user
+        incidents = Incident.objects.filter(it_acknowledged_by=request.user)
+    elif see_all:
+        # Users with permission or managers see all tickets in global view
+        incidents = Incident.objects.all()
+    else:
+        # Staff global view: show only unassigned open tickets
+        incidents = Incident.objects.filter(status='Open', it_acknowledged=False)
+
+    # If viewing specific user or serial history, bypass period filter and show all
+    if view_user:
+        incidents = incidents.filter(user__username=view_user)
+    elif view_serial:
+        incidents = incidents.filter(laptop_serial=view_serial)
+    else:
+        # Apply period/date range filtering to incidents
+        incidents = _filter_created_between(incidents, *_period_bounds(
+            params.get('period', 'all'), params.get('from'), params.get('to'), timezone.now().date()
+        ))
+
+    # Status filtering
+    # If filtering by "Open", include both "Open" and "In Progress" statuses
+    if status_filter:
+        if status_filter == 'Open':
+            incidents = incidents.filter(status__in=['Open', 'In Progress'])
+        else:
+            incidents = incidents.filter(status=status_filter)
+    
+    # My Tickets sub-filtering: Active (In Progress) or Finished (Resolved/Closed)
+    if my_tickets == '1':
+        if ticket_type == 'active':
+            incidents = incidents.filter(status='In Progress')
+        elif ticket_type == 'finished':
+            incidents = incidents.filter(status__in=['Resolved', 'Closed'])
+    
+    # IT Status filtering (only if not in My Tickets view)
+    if not my_tickets:
+        it_status_filter = params.get('it_status')
+        if it_status_filter == 'acknowledged':
+            incidents = incidents.filter(it_acknowledged=True)
+        elif it_status_filter == 'pending':
+            incidents = incidents.filter(it_acknowledged=False)
+    
+    # User filtering (only if not viewing specific user)
+    if user_filter and not view_user:
+        incidents = incidents.filter(user__username__icontains=user_filter)
+    
+    # Priority filtering based on AI category
+    if priority_filter == 'high':
+        # High priority: Network or Account issues
+        incidents = incidents.filter(category__in=['Network', 'Account'])
+    elif priority_filter == 'medium':
+        # Medium priority: Software issues
+        incidents = incidents.filter(category='Software')
+    elif priority_filter == 'low':
+        # Low priority: everything else (Hardware, Other, missing category)
+        incidents = incidents.exclude(category__in=['Network', 'Account', 'Software'])
+    
+    # Serial filtering (only if not viewing specific serial)
+    if serial_filter and not view_serial:
+        incidents = incidents.filter(laptop_serial__icontains=serial_filter)
+    
+    # Full-text search over the ticket text and its comments (see search.py)
+    search_query = params.get('q', '').strip()
+    if search_query:
+        incidents = search.search_incidents(incidents, search_query)
+    return incidents
 
 
-# Helper functions for role checking
+# Helper functions for role checking (views use roles.get_roles(request), memoized per request)
 def is_manager(user):
     """Check if user is in the Manager group"""
-    if not user.is_authenticated:
-        return False
-    try:
-        manager_group = Group.objects.get(name='Manager')
-        return manager_group in user.groups.all()
-    except Group.DoesNotExist:
-        return False
+    return roles.MANAGER in roles.roles_for_user(user)
 
 
 def is_staff_member(user):
@@ -44,26 +182,16 @@ def is_staff_member(user):
 
 
 def can_view_all_global_tickets(user):
-    """Check if user can view all tickets in global view"""
-    if not user.is_authenticated:
-        return False
-    # Check direct permission
-    if user.has_perm('incidents.view_all_global_tickets'):
-        return True
-    # Check if user is in a group with the permission
-    if user.groups.filter(permissions__codename='view_all_global_tickets').exists():
-        return True
-    # Managers automatically have this permission
-    if is_manager(user):
-        return True
-    return False
+    """Check if user can view all tickets in global view (permission, group permission or Manager)"""
+    return roles.VIEW_ALL_GLOBAL in roles.roles_for_user(user)
 
 
 @login_required
+@reads_from_replica()
 def home(request):
 
     # Shows the user's own incident history with status overview
-    incidents = Incident.objects.filter(user=request.user).prefetch_related('comments').order_by('-created_at')
+    incidents = Incident.objects.filter(user=request.user).order_by('-created_at', '-id')
     
     # Get filter parameters
     status_filter = request.GET.get('status')
@@ -133,13 +261,45 @@ def home(request):
     elif it_status_filter == 'pending':
         incidents = incidents.filter(it_acknowledged=False)
     
-    # Process incidents to extract smart scanner suggestions and calculate unread comments
+    # If opening a ticket from Mail, jump to the page that contains it so the modal exists in the DOM.
+    page_number = request.GET.get('page', 1)
+    try:
+        page_number = int(page_number)
+    except (TypeError, ValueError):
+        page_number = 1
+    open_ticket_raw = request.GET.get('open_ticket')
+    if open_ticket_raw:
+        try:
+            open_tid = int(open_ticket_raw)
+            target = incidents.filter(id=open_tid).values('created_at').first()
+            if target:
+                # Position = number of rows sorted ahead of it in ('-created_at', '-id') order
+                newer_count = incidents.filter(
+                    Q(created_at__gt=target['created_at']) |
+                    Q(created_at=target['created_at'], id__gt=open_tid)
+                ).count()
+                page_number = (newer_count // page_size) + 1
+        except (TypeError, ValueError):
+            pass
+
+    # Pagination happens in the database; only the visible page is loaded and processed
+    page_queryset = unread_counters.annotate_unread_comments(
+        incidents, request.user
+    ).select_related(
+        'user', 'user__employeeprofile', 'user__userprofile', 'resolved_by'
+    ).prefetch_related(
+        Prefetch('comments', queryset=Comment.objects.select_related('user'))
+    )
+    paginator = Paginator(page_queryset, page_size)
+    processed_page = paginator.get_page(page_number)
+
+    # Process incidents to extract smart scanner suggestions and attach unread comments
     processed_incidents = []
-    for incident in incidents:
+    for incident in processed_page.object_list:
         incident_dict = {
             'incident': incident,
             'smart_suggestions': [],
-            'unread_comments_count': 0
+            'unread_comments_count': incident.unread_comments_count
         }
         
         # Extract smart scanner suggestions if status is Resolved
@@ -153,40 +313,8 @@ def home(request):
                 # New format: Description is directly the suggestions, split by newline
                 incident_dict['smart_suggestions'] = [s.strip() for s in incident.description.split('\n') if s.strip()]
         
-        # Calculate unread comments count
-        # Check if there are any comments
-        if incident.comments.exists():
-            try:
-                comment_read = CommentRead.objects.get(user=request.user, incident=incident)
-                # Count comments created after last read
-                unread_comments = incident.comments.filter(created_at__gt=comment_read.last_read_at)
-                incident_dict['unread_comments_count'] = unread_comments.count()
-            except CommentRead.DoesNotExist:
-                # User has never read comments, so all comments are unread
-                incident_dict['unread_comments_count'] = incident.comments.count()
-        
         processed_incidents.append(incident_dict)
-
-    # If opening a ticket from Mail, jump to the page that contains it so the modal exists in the DOM.
-    page_number = request.GET.get('page', 1)
-    try:
-        page_number = int(page_number)
-    except (TypeError, ValueError):
-        page_number = 1
-    open_ticket_raw = request.GET.get('open_ticket')
-    if open_ticket_raw:
-        try:
-            open_tid = int(open_ticket_raw)
-            for idx, item in enumerate(processed_incidents):
-                if item['incident'].id == open_tid:
-                    page_number = (idx // page_size) + 1
-                    break
-        except (TypeError, ValueError):
-            pass
-
-    # Pagination for processed incidents
-    paginator = Paginator(processed_incidents, page_size)
-    processed_page = paginator.get_page(page_number)
+    processed_page.object_list = processed_incidents
 
     # Build base query string for pagination links (exclude page)
     query_params = request.GET.copy()
@@ -198,11 +326,12 @@ def home(request):
     status_bar_base = Incident.objects.filter(user=request.user)
     status_bar_base = get_period_queryset(status_bar_base)
     
+    summary = get_status_summary(status_bar_base)
     status_counts = {
-        'open': status_bar_base.filter(status='Open').count(),
-        'resolved': status_bar_base.filter(status='Resolved').count(),
-        'closed': status_bar_base.filter(status='Closed').count(),
-        'total': status_bar_base.count()
+        'open': summary['open'],
+        'resolved': summary['resolved'],
+        'closed': summary['closed'],
+        'total': summary['total']
     }
     
     # Format dates for display in template (dd/mm/yyyy)
@@ -293,20 +422,18 @@ def report_incident(request):
             ) or (getattr(file_obj, "content_type", "") or "").lower().startswith("image/")
 
             # Generate SHA256 hash for VirusTotal scanning
-            # Read file content into memory for hashing (Django will handle saving)
-            file_content = b''
-            sha256_hash = hashlib.sha256()
-            
-            # Read file in chunks to handle large files safely
-            for chunk in file_obj.chunks():
-                sha256_hash.update(chunk)
-                file_content += chunk
+            # HashingTemporaryFileUploadHandler already hashed the file while streaming it to disk
+            file_hash = getattr(file_obj, 'sha256', None)
+            if not file_hash:
+                # Fallback for other upload handlers: hash in chunks without buffering the file
+                sha256_hash = hashlib.sha256()
+                for chunk in file_obj.chunks():
+                    sha256_hash.update(chunk)
+                file_hash = sha256_hash.hexdigest()
+                file_obj.seek(0)
             
-            file_hash = sha256_hash.hexdigest()
-            
-            # Create a new file-like object from the content for Django to save
-            from django.core.files.base import ContentFile
-            attachment_file = ContentFile(file_content, name=file_obj.name)
+            # Hand the upload straight to the FileField; a temporary upload is moved into place, not copied
+            attachment_file = file_obj
         
         # 2. Create the incident object but don't save to DB yet
         incident = Incident(
@@ -356,7 +483,7 @@ def report_incident(request):
         else:
             messages.success(request, "Ticket submitted successfully. IT will review it.")
         
-        # 5. Trigger n8n Webhook with file_hash and file_url for VirusTotal scanning
+        # 5. Queue n8n Webhook with file_hash and file_url for VirusTotal scanning
         from django.conf import settings
         # n8n webhook URL - use N8N_BASE_URL if set, otherwise use ngrok URL for HTTPS
         # Use /webhook/ for production (workflow active), /webhook-test/ for testing (workflow inactive)
@@ -398,16 +525,15 @@ def report_incident(request):
             "skip_virustotal": bool(skip_virustotal_for_attachment and file_hash),
         }
         
-        try:
-            requests.post(n8n_url, json=payload, timeout=5)
-        except Exception as e:
-            print(f"n8n Webhook failed: {e}")
+        # Queue the webhook; the dispatch_webhooks worker delivers it and retries on failure
+        enqueue_webhook(n8n_url, payload, incident=incident)
             
         return redirect('home')
 
     return render(request, 'report_incident.html')
 
 @login_required
+@reads_from_replica()
 def admin_dashboard(request):
     # Only staff members (is_staff=True) can access the dashboard
     if not is_staff_member(request.user):
@@ -415,38 +541,29 @@ def admin_dashboard(request):
         return redirect('home')
 
     # Determine if user is a manager
-    user_is_manager = is_manager(request.user)
+    user_is_manager = roles.is_manager(request)
     # Check if user has permission to view all global tickets
-    can_view_all_global = can_view_all_global_tickets(request.user)
+    can_view_all_global = roles.can_view_all_global_tickets(request)
     
-    # Get filter parameters
-    status_filter = request.GET.get('status')
+    # Get filter parameters (the list itself is filtered by _dashboard_incidents)
     user_filter = request.GET.get('user')
     period_filter = request.GET.get('period', 'all')
     from_date = request.GET.get('from')
     to_date = request.GET.get('to')
     priority_filter = request.GET.get('priority')
-    serial_filter = request.GET.get('serial')  # Filter by laptop serial number
     view_user = request.GET.get('view_user')  # View all history for a specific user
     view_serial = request.GET.get('view_serial')  # View all history for a specific laptop serial
     my_tickets = request.GET.get('my_tickets')  # Filter to show only tickets claimed by current user
     ticket_type = request.GET.get('ticket_type', 'active')  # 'active' or 'finished' for My Tickets view
     
-    # Basic Filtering Logic
-    # Users with 'view_all_global_tickets' permission see all tickets
-    # Others see only unassigned open tickets OR their own tickets
-    if my_tickets == '1':
-        # My Tickets view: show only tickets claimed by current user
-        incidents = Incident.objects.filter(it_acknowledged_by=request.user).order_by('-created_at')
-    elif can_view_all_global or user_is_manager:
-        # Users with permission or managers see all tickets in global view
-        incidents = Incident.objects.all().order_by('-created_at')
+    incidents = _dashboard_incidents(request, can_view_all_global or user_is_manager)
+    searching = bool(request.GET.get('q', '').strip())
+    if searching:
+        # Best matches first when searching
+        incidents = incidents.order_by('-search_rank', *keyset.ORDERING)
     else:
-        # Staff global view: show only unassigned open tickets
-        incidents = Incident.objects.filter(
-            status='Open',
-            it_acknowledged=False
-        ).order_by('-created_at')
+        incidents = incidents.order_by(*keyset.ORDERING)
+
     page_size_param = request.GET.get('page_size', '10')
     try:
         page_size = int(page_size_param)
@@ -457,107 +574,7 @@ def admin_dashboard(request):
 
     # Period filtering (today, week, month, all)
     today = timezone.now().date()
-    
-    # Helper function to get period filter queryset
-    def get_period_queryset(base_queryset):
-        # If date range is specified, use it instead of period
-        if from_date or to_date:
-            queryset = base_queryset
-            if from_date:
-                # Convert string to date object if needed
-                if isinstance(from_date, str):
-                    # Try dd/mm/yyyy format first, then yyyy-mm-dd
-                    try:
-                        from_date_obj = datetime.strptime(from_date, '%d/%m/%Y').date()
-                    except ValueError:
-                        try:
-                            from_date_obj = datetime.strptime(from_date, '%Y-%m-%d').date()
-                        except ValueError:
-                            from_date_obj = None
-                else:
-                    from_date_obj = from_date
-                if from_date_obj:
-                    queryset = queryset.filter(created_at__date__gte=from_date_obj)
-            if to_date:
-                # Convert string to date object if needed
-                if isinstance(to_date, str):
-                    # Try dd/mm/yyyy format first, then yyyy-mm-dd
-                    try:
-                        to_date_obj = datetime.strptime(to_date, '%d/%m/%Y').date()
-                    except ValueError:
-                        try:
-                            to_date_obj = datetime.strptime(to_date, '%Y-%m-%d').date()
-                        except ValueError:
-                            to_date_obj = None
-                else:
-                    to_date_obj = to_date
-                if to_date_obj:
-                    queryset = queryset.filter(created_at__date__lte=to_date_obj)
-            return queryset
-        
-        # Otherwise use period filter
-        if period_filter == 'today':
-            return base_queryset.filter(created_at__date=today)
-        elif period_filter == 'week':
-            week_start = today - timedelta(days=today.weekday())
-            return base_queryset.filter(created_at__date__gte=week_start)
-        elif period_filter == 'month':
-            return base_queryset.filter(created_at__year=today.year, created_at__month=today.month)
-        else:  # 'all'
-            return base_queryset
-    
-    # If viewing specific user or serial history, bypass period filter and show all
-    if view_user:
-        incidents = incidents.filter(user__username=view_user)
-        # Don't apply period filter when viewing user history
-    elif view_serial:
-        incidents = incidents.filter(laptop_serial=view_serial)
-        # Don't apply period filter when viewing serial history
-    else:
-        # Apply period/date range filtering to incidents
-        incidents = get_period_queryset(incidents)
-
-    # Status filtering
-    # If filtering by "Open", include both "Open" and "In Progress" statuses
-    if status_filter:
-        if status_filter == 'Open':
-            incidents = incidents.filter(status__in=['Open', 'In Progress'])
-        else:
-            incidents = incidents.filter(status=status_filter)
-    
-    # My Tickets sub-filtering: Active (In Progress) or Finished (Resolved/Closed)
-    if my_tickets == '1':
-        if ticket_type == 'active':
-            incidents = incidents.filter(status='In Progress')
-        elif ticket_type == 'finished':
-            incidents = incidents.filter(status__in=['Resolved', 'Closed'])
-    
-    # IT Status filtering (only if not in My Tickets view)
-    if not my_tickets:
-        it_status_filter = request.GET.get('it_status')
-        if it_status_filter == 'acknowledged':
-            incidents = incidents.filter(it_acknowledged=True)
-        elif it_status_filter == 'pending':
-            incidents = incidents.filter(it_acknowledged=False)
-    
-    # User filtering (only if not viewing specific user)
-    if user_filter and not view_user:
-        incidents = incidents.filter(user__username__icontains=user_filter)
-    
-    # Priority filtering based on AI category
-    if priority_filter == 'high':
-        # High priority: Network or Account issues
-        incidents = incidents.filter(category__in=['Network', 'Account'])
-    elif priority_filter == 'medium':
-        # Medium priority: Software issues
-        incidents = incidents.filter(category='Software')
-    elif priority_filter == 'low':
-        # Low priority: everything else (Hardware, Other, missing category)
-        incidents = incidents.exclude(category__in=['Network', 'Account', 'Software'])
-    
-    # Serial filtering (only if not viewing specific serial)
-    if serial_filter and not view_serial:
-        incidents = incidents.filter(laptop_serial__icontains=serial_filter)
+    first_day, last_day = _period_bounds(period_filter, from_date, to_date, today)
 
     # Summary Counts - apply ALL filters (except status) to status bar counts
     # This ensures status bars reflect the current filter context
@@ -579,7 +596,7 @@ def admin_dashboard(request):
         status_bar_base = status_bar_base.filter(laptop_serial=view_serial)
     else:
         # Apply period/date range filter
-        status_bar_base = get_period_queryset(status_bar_base)
+        status_bar_base = _filter_created_between(status_bar_base, first_day, last_day)
     
     # Apply priority filter (if set) so cards match current view
     if priority_filter == 'high':
@@ -638,51 +655,86 @@ def admin_dashboard(request):
         view_serial_display = view_serial
     
     # Calculate status counts - include "In Progress" in "Open" count
-    open_count = status_bar_base.filter(status__in=['Open', 'In Progress']).count()
-    resolved_count = status_bar_base.filter(status='Resolved').count()
-    closed_count = status_bar_base.filter(status='Closed').count()
-    open_year_count = Incident.objects.filter(status__in=['Open', 'In Progress'], created_at__year=datetime.now().year).count()
+    # When every filter maps onto the daily rollup (period, priority, global or
+    # My Tickets scope), sum IncidentDailyStat rows instead of scanning incidents.
+    # Otherwise one aggregate query for every bucket, briefly cached so busy dashboards share results
+    status_cache_ttl = getattr(settings, 'STATUS_SUMMARY_CACHE_TTL', 0)
+    rollup_scope = None
+    if not (view_user or view_serial or user_filter):
+        if my_tickets == '1':
+            rollup_scope = {'assignee': request.user.pk}
+        elif can_view_all_global or user_is_manager:
+            rollup_scope = {}
+    if rollup_scope is not None:
+        summary = daily_stats.summarize(
+            daily_stats.daily_stats(
+                first_day, last_day,
+                category_filter=daily_stats.PRIORITY_CATEGORIES.get(priority_filter),
+                **rollup_scope
+            ),
+            STATUS_BUCKETS,
+        )
+    else:
+        summary = get_status_summary(status_bar_base, cache_ttl=status_cache_ttl)
+    open_count = summary['open_in_progress']
+    resolved_count = summary['resolved']
+    closed_count = summary['closed']
+    open_year_count = daily_stats.summarize(
+        daily_stats.daily_stats(today.replace(month=1, day=1), today.replace(month=12, day=31)),
+        {'open_in_progress': STATUS_BUCKETS['open_in_progress']},
+    )['open_in_progress']
     
     # Pagination for incidents list
-    paginator = Paginator(incidents, page_size)
-    page_number = request.GET.get('page', 1)
-    incidents_page = paginator.get_page(page_number)
+    # Unread comment counts are a subquery annotation, so any page size renders in a fixed number of queries
+    incidents = unread_counters.annotate_unread_comments(
+        incidents, request.user
+    ).select_related('user', 'it_acknowledged_by', 'resolved_by')
+    incidents_page = None
+    next_cursor = None
+    if searching:
+        # Ranked search results keep numbered pages: ranking scores every match anyway
+        paginator = Paginator(incidents, page_size)
+        incidents_page = paginator.get_page(request.GET.get('page', 1))
+        page_rows = incidents_page.object_list
+    else:
+        # Browsing pages with a keyset cursor (?after=), so every "Next" costs the same however deep
+        try:
+            page_rows, next_cursor = keyset.paginate(incidents, request.GET.get('after'), page_size)
+        except keyset.InvalidCursor:
+            page_rows, next_cursor = keyset.paginate(incidents, None, page_size)
     
-    # Calculate unread comments for each incident (for IT staff) on the current page only
-    incidents_with_unread = []
-    for incident in incidents_page.object_list:
-        unread_count = 0
-        if incident.comments.exists():
-            try:
-                comment_read = CommentRead.objects.get(user=request.user, incident=incident)
-                unread_count = incident.comments.filter(created_at__gt=comment_read.last_read_at).count()
-            except CommentRead.DoesNotExist:
-                unread_count = incident.comments.count()
-        incidents_with_unread.append({
+    # Attach the unread comment count for each incident (for IT staff) on the current page only
+    incidents_with_unread = [
+        {
             'incident': incident,
-            'unread_comments_count': unread_count
-        })
+            'unread_comments_count': incident.unread_comments_count
+        }
+        for incident in page_rows
+    ]
 
     # Dashboard notification cards for tickets with updated comments
     comment_notifications = [
         item for item in incidents_with_unread if item['unread_comments_count'] > 0
     ]
     
-    # Build base query string for pagination links (exclude page)
+    # Build base query string for pagination links (exclude page and cursor)
     query_params = request.GET.copy()
-    if 'page' in query_params:
-        query_params.pop('page')
+    for key in ('page', 'after'):
+        if key in query_params:
+            query_params.pop(key)
     base_query = query_params.urlencode()
     
     context = {
-        'incidents': incidents_page,
+        'incidents': incidents_page,  # Paginator page when searching, else None
+        'next_cursor': next_cursor,  # ?after= value for the next page (keyset pagination)
+        'after_cursor': request.GET.get('after'),
         'incidents_with_unread': incidents_with_unread,  # For template to show notifications
         'comment_notifications': comment_notifications,
         'open_count': open_count,
         'resolved_count': resolved_count,
         'closed_count': closed_count,
         'open_year_count': open_year_count,
-        'all_count': status_bar_base.count(),
+        'all_count': summary['total'],
         'period_filter': period_filter,  # Pass period to template
         'from_date_display': from_date_display,  # Formatted date for display
         'to_date_display': to_date_display,  # Formatted date for display
@@ -713,14 +765,10 @@ def manage_ticket(request, ticket_id):
         return redirect('home')
         
     ticket = Incident.objects.prefetch_related('comments').get(id=ticket_id)
-    user_is_manager = is_manager(request.user)
+    user_is_manager = roles.is_manager(request)
     
     # Mark comments as read when viewing the ticket
-    CommentRead.objects.update_or_create(
-        user=request.user,
-        incident=ticket,
-        defaults={'last_read_at': timezone.now()}
-    )
+    unread_counters.mark_comments_read(request.user, ticket)
     
     if request.method == 'POST':
         # Check if this is a ticket assignment (managers only)
@@ -857,7 +905,18 @@ def register(request):
 
 from django.http import JsonResponse
 
+def _calendar_window_date(value):
+    """Date part of a FullCalendar start/end parameter ('2026-09-28', '2026-09-28T00:00:00+08:00', ...)"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value.strip()[:10])
+    except ValueError:
+        return None
+
+
 @login_required
+@reads_from_replica(stale=True)
 def incident_calendar_data(request):
     """
     Returns JSON data for calendar events.
@@ -865,23 +924,31 @@ def incident_calendar_data(request):
     Like Google Calendar, shows when incidents were created and when they were resolved.
     Supports filtering by status and resolved_by admin.
     Only staff can access calendar data.
+    
+    Only the window FullCalendar asks for (start/end parameters) is queried.
+    Responses carry an ETag, so refetching an unchanged window returns 304.
+    Reads come from the read replica even right after a write (a few seconds
+    of lag is fine for the calendar).
+
+    With mode=heatmap, returns one background event per day with the number
+    of incidents reported that day.
     """
     if not is_staff_member(request.user):
         return JsonResponse([], safe=False)
     
+    if request.GET.get('mode') == 'heatmap':
+        return _conditional_json(request, _calendar_heatmap_events(request))
+    
     incidents = Incident.objects.all()
     
     # Managers see all tickets, Staff see only their own tickets
-    if not is_manager(request.user):
+    if not roles.is_manager(request):
         incidents = incidents.filter(it_acknowledged_by=request.user)
     
     # Get filter parameters
     status_filter = request.GET.get('status', '')
     admin_filter = request.GET.get('admin', '')
     
-    # Fetch all incidents for the calendar
-    incidents = Incident.objects.all()
-    
     # Apply status filter
     if status_filter:
         incidents = incidents.filter(status=status_filter)
@@ -890,37 +957,123 @@ def incident_calendar_data(request):
     if admin_filter:
         incidents = incidents.filter(resolved_by_id=admin_filter)
     
+    # Only the visible window. Closed tickets with a resolved date are shown on
+    # that date, everything else on the date it was reported.
+    window_start = _calendar_window_date(request.GET.get('start'))
+    window_end = _calendar_window_date(request.GET.get('end'))
+    shown_on_resolved = Q(status='Closed', resolved_at__isnull=False)
+    if window_start or window_end:
+        on_resolved = shown_on_resolved
+        on_created = ~shown_on_resolved
+        if window_start:
+            since = datetime.combine(window_start, datetime.min.time(), tzinfo=dt_timezone.utc)
+            on_resolved &= Q(resolved_at__gte=since)
+            on_created &= Q(created_at__gte=since)
+        if window_end:
+            until = datetime.combine(window_end, datetime.min.time(), tzinfo=dt_timezone.utc)
+            on_resolved &= Q(resolved_at__lt=until)
+            on_created &= Q(created_at__lt=until)
+        incidents = incidents.filter(on_resolved | on_created)
+    
     events = []
     
-    for incident in incidents:
+    for incident in incidents.order_by('id').values('id', 'title', 'status', 'created_at', 'resolved_at'):
         # Determine the primary date and label based on status
-        if incident.status == 'Closed' and incident.resolved_at:
+        if incident['status'] == 'Closed' and incident['resolved_at']:
             # Show on the date IT fixed it
-            event_date = incident.resolved_at
-            title = f"CLOSED #{incident.id}"
+            event_date = incident['resolved_at']
+            title = f"CLOSED #{incident['id']}"
             color = '#28a745' # Green
-        elif incident.status == 'Resolved':
+        elif incident['status'] == 'Resolved':
             # Show on the date user fixed it (usually created_at)
-            event_date = incident.created_at
-            title = f"SELF-FIXED #{incident.id}"
+            event_date = incident['created_at']
+            title = f"SELF-FIXED #{incident['id']}"
             color = '#007bff' # Blue
         else:
             # Show on the date reported
-            event_date = incident.created_at
-            title = f"OPEN #{incident.id}"
+            event_date = incident['created_at']
+            title = f"OPEN #{incident['id']}"
             color = '#dc3545' # Red
 
         # Create single-day event (no end date, only start date)
         events.append({
-            'title': f"{title}: {incident.title}",
+            'title': f"{title}: {incident['title']}",
             'start': event_date.date().isoformat(), # Only use the date part (YYYY-MM-DD format)
             'allDay': True, # Single-day event without time
             'backgroundColor': color,
             'borderColor': color,
-            'url': reverse('manage_ticket', args=[incident.id]),
+            'url': reverse('manage_ticket', args=[incident['id']]),
         })
-        
-    return JsonResponse(events, safe=False)
+    
+    return _conditional_json(request, events)
+
+
+def _calendar_heatmap_events(request):
+    """
+    Incidents reported per day in the calendar window, as background events.
+    Read from the IncidentDailyStat rollup; the Resolved By filter isn't part
+    of the rollup, so with it set the days are counted from Incident instead.
+    """
+    status_filter = request.GET.get('status', '')
+    admin_filter = request.GET.get('admin', '')
+    window_start = _calendar_window_date(request.GET.get('start'))
+    window_end = _calendar_window_date(request.GET.get('end'))
+    # FullCalendar's end is exclusive
+    last_day = window_end - timedelta(days=1) if window_end else None
+    
+    if admin_filter:
+        incidents = Incident.objects.filter(resolved_by_id=admin_filter)
+        # Managers see all tickets, Staff see only their own tickets
+        if not roles.is_manager(request):
+            incidents = incidents.filter(it_acknowledged_by=request.user)
+        if status_filter:
+            incidents = incidents.filter(status=status_filter)
+        if window_start:
+            incidents = incidents.filter(created_at__gte=_start_of_day(window_start))
+        if window_end:
+            incidents = incidents.filter(created_at__lt=_start_of_day(window_end))
+        days = [
+            (row['day'], row['total'])
+            for row in incidents.annotate(day=TruncDate('created_at'))
+            .values('day').annotate(total=Count('id')).order_by('day')
+        ]
+    else:
+        rows = daily_stats.daily_stats(
+            window_start, last_day,
+            assignee=None if roles.is_manager(request) else request.user.pk,
+            status=status_filter or None,
+        )
+        days = daily_stats.per_day(rows)
+    
+    busiest = max((total for _day, total in days), default=0)
+    events = []
+    for day, total in days:
+        # Darker red for busier days, relative to the busiest day on screen
+        opacity = 0.15 + 0.7 * total / busiest
+        events.append({
+            'title': f"{total} incident{'s' if total != 1 else ''}",
+            'start': day.isoformat(),
+            'allDay': True,
+            'display': 'background',
+            'backgroundColor': f'rgba(220, 53, 69, {opacity:.2f})',
+        })
+    return events
+
+
+def _conditional_json(request, events):
+    """JSON response with an ETag; 304 if the client already has these events."""
+    # Conditional GET: the ETag is a hash of the events, so any change to a
+    # ticket in the window (or to the user's scope) produces a new one
+    body = json.dumps(events)
+    etag = '"' + hashlib.sha256(body.encode('utf-8')).hexdigest()[:32] + '"'
+    if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    # Let the browser keep the feed but revalidate it on every fetch
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 
 @login_required
 def incident_calendar(request):
@@ -939,11 +1092,13 @@ def incident_calendar(request):
     # Get current filter values
     status_filter = request.GET.get('status', '')
     admin_filter = request.GET.get('admin', '')
+    mode_filter = request.GET.get('mode', '')
     
     context = {
         'staff_members': all_staff_members,
         'status_filter': status_filter,
         'admin_filter': admin_filter,
+        'mode_filter': mode_filter,
     }
     
     return render(request, 'calender.html', context)
@@ -1064,6 +1219,59 @@ def n8n_webhook_new_incident(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+def n8n_webhook_new_incidents_bulk(request):
+    """
+    Bulk version of n8n_webhook_new_incident, for replaying a queue of new
+    incidents in a few requests instead of one per incident.
+    Expects JSON payload: {"incidents": [<n8n_webhook_new_incident payload>, ...]}
+    (or the bare list). Batches larger than settings.INCIDENT_INGEST_MAX_BATCH_SIZE
+    are rejected. Valid items are created in one transaction; invalid ones are
+    reported and skipped.
+    Returns: {"results": [{"index": 0, "success": true, "incident_id": ..., ...}
+                          or {"index": 1, "success": false, "error": "..."}, ...]}
+    """
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'success': False,
+            'error': 'Invalid JSON payload'
+        }, status=400)
+    
+    items = data.get('incidents') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return JsonResponse({
+            'success': False,
+            'error': "Field 'incidents' must be a non-empty list"
+        }, status=400)
+    
+    max_batch_size = getattr(settings, 'INCIDENT_INGEST_MAX_BATCH_SIZE', 5000)
+    if len(items) > max_batch_size:
+        return JsonResponse({
+            'success': False,
+            'error': f'Batch of {len(items)} incidents exceeds the maximum of {max_batch_size}'
+        }, status=400)
+    
+    try:
+        results = ingest_incidents(items)
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
+    
+    created = sum(1 for result in results if result['success'])
+    return JsonResponse({
+        'success': True,
+        'message': f'{created} incident(s) created',
+        'created_count': created,
+        'failed_count': len(results) - created,
+        'results': results,
+    }, status=201 if created else 200)
+
+@csrf_exempt
+@require_http_methods(["POST"])
+@idempotent
 def telegram_acknowledge(request, ticket_id):
     """
     Webhook endpoint for Telegram acknowledge button callback.
@@ -1199,11 +1407,7 @@ def add_comment(request, ticket_id):
                 message=message
             )
             # Mark comments as read for the user who posted (they just saw their own comment)
-            CommentRead.objects.update_or_create(
-                user=request.user,
-                incident=ticket,
-                defaults={'last_read_at': timezone.now()}
-            )
+            unread_counters.mark_comments_read(request.user, ticket)
             messages.success(request, "Comment added successfully. You can leave another comment if needed.")
     
     # Redirect back to the appropriate page
@@ -1214,6 +1418,7 @@ def add_comment(request, ticket_id):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@idempotent(dedupe_body=True)
 def add_ticket_comment_from_n8n(request):
     """
     API endpoint for n8n to add an internal system comment to a ticket.
@@ -1299,11 +1504,7 @@ def mark_comments_read(request, ticket_id):
         return JsonResponse({'success': False, 'error': 'Permission denied'}, status=403)
     
     # Mark comments as read
-    CommentRead.objects.update_or_create(
-        user=request.user,
-        incident=ticket,
-        defaults={'last_read_at': timezone.now()}
-    )
+    unread_counters.mark_comments_read(request.user, ticket)
     
     return JsonResponse({'success': True})
 
@@ -1352,11 +1553,7 @@ def ticket_detail(request, ticket_id):
         return redirect('home')
 
     # Opening the detail page means comments are read.
-    CommentRead.objects.update_or_create(
-        user=request.user,
-        incident=ticket,
-        defaults={'last_read_at': timezone.now()}
-    )
+    unread_counters.mark_comments_read(request.user, ticket)
 
     return render(request, 'ticket_detail.html', {
         'ticket': ticket,
@@ -1435,6 +1632,7 @@ def update_ticket_response(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@idempotent(dedupe_body=True)
 def telegram_leave_message(request, ticket_id):
     """
     Webhook endpoint for Telegram leave message button callback.
@@ -1515,6 +1713,7 @@ def telegram_leave_message(request, ticket_id):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@idempotent
 def update_incident_from_n8n(request):
     """
     API endpoint for n8n to update ticket acknowledgment.
@@ -1575,37 +1774,11 @@ def update_incident_from_n8n(request):
 def _delete_user_sessions(user):
     """
     Helper function to delete all active sessions for a user.
+    Uses the UserSession index, so no session has to be decoded.
     Returns tuple: (sessions_deleted, errors_list)
     """
-    sessions_deleted = 0
-    errors = []
-    
-    # Get all non-expired sessions
-    all_sessions = Session.objects.filter(expire_date__gte=timezone.now())
-    
-    for session in all_sessions:
-        try:
-            # Decode session data
-            session_data = session.get_decoded()
-            session_user_id = session_data.get('_auth_user_id')
-            
-            # Check if this session belongs to the user
-            # Compare as strings to handle both string and int IDs
-            if session_user_id:
-                # Convert both to strings for comparison
-                if str(user.pk) == str(session_user_id):
-                    session.delete()
-                    sessions_deleted += 1
-        except Exception as decode_error:
-            # Some sessions might be corrupted or use different encoding
-            # Log the error but continue processing other sessions
-            errors.append({
-                'session_key': session.session_key[:20] + '...' if session.session_key else 'unknown',
-                'error': str(decode_error)
-            })
-            continue
-    
-    return sessions_deleted, errors
+    sessions_deleted = delete_user_sessions(user.pk)[user.pk]
+    return sessions_deleted, []
 
 @csrf_exempt
 @require_http_methods(["POST"])
@@ -1676,11 +1849,9 @@ def quarantine_user_api(request):
             }, status=500)
         
         # 2. Clear all active sessions for this user
+        # (expired sessions are cleaned up by the clear_expired_sessions job)
         sessions_deleted, decode_errors = _delete_user_sessions(user)
         
-        # 3. Also clean up expired sessions (optional cleanup)
-        expired_deleted = Session.objects.filter(expire_date__lt=timezone.now()).delete()[0]
-        
         # Build response
         response_data = {
             'status': 'success', 
@@ -1689,8 +1860,7 @@ def quarantine_user_api(request):
             'username': user.username,
             'account_was_active': was_active,
             'account_now_active': user.is_active,  # Use actual value from DB
-            'sessions_deleted': sessions_deleted,
-            'expired_sessions_cleaned': expired_deleted
+            'sessions_deleted': sessions_deleted
         }
         
         if decode_errors:
@@ -1709,6 +1879,127 @@ def quarantine_user_api(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+def quarantine_users_api(request):
+    """
+    API endpoint for n8n to quarantine several users at once (e.g. a file shared
+    across a department was flagged). Accounts are deactivated with one UPDATE
+    and all their sessions are purged in one pass.
+    Expects JSON payload, one of:
+        {"user_ids": [<number>, ...]}
+        {"department": "<code or name>"}
+        {"laptop_serial": "<serial>"}
+    When N8N_API_SECRET is set the request must carry it in X-N8N-Secret.
+    Staff and superusers are never matched by department or laptop serial:
+    they are reported as skipped so admins can't be locked out in bulk.
+    Returns per-user results.
+    """
+    secret = getattr(settings, 'N8N_API_SECRET', '')
+    if secret and not hmac.compare_digest(request.headers.get('X-N8N-Secret', ''), secret):
+        return JsonResponse({
+            'status': 'error', 
+            'message': 'Missing or invalid X-N8N-Secret header'
+        }, status=403)
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'status': 'error', 
+            'message': 'Invalid JSON payload'
+        }, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({
+            'status': 'error', 
+            'message': 'JSON payload must be an object'
+        }, status=400)
+    
+    for field in ('department', 'laptop_serial'):
+        if not isinstance(data.get(field) or '', str):
+            return JsonResponse({
+                'status': 'error', 
+                'message': f"Field '{field}' must be a string"
+            }, status=400)
+    user_ids = data.get('user_ids')
+    department = (data.get('department') or '').strip()
+    laptop_serial = (data.get('laptop_serial') or '').strip()
+    
+    skipped = []
+    if user_ids is not None:
+        if not isinstance(user_ids, list) or not user_ids:
+            return JsonResponse({
+                'status': 'error', 
+                'message': "Field 'user_ids' must be a non-empty list"
+            }, status=400)
+        _min_id, max_id = connection.ops.integer_field_range(User._meta.pk.get_internal_type())
+        try:
+            user_ids = [int(str(user_id).strip()) for user_id in user_ids]
+        except (ValueError, TypeError):
+            user_ids = None
+        if user_ids is None or not all(0 < user_id <= max_id for user_id in user_ids):
+            return JsonResponse({
+                'status': 'error', 
+                'message': "Field 'user_ids' must only contain user ID numbers"
+            }, status=400)
+        selector = {'user_ids': user_ids}
+    elif department:
+        # Accept either the code ("FIN") or the display name ("Finance")
+        codes = [
+            code for code, name in EmployeeProfile.DEPARTMENT_CHOICES
+            if department.lower() in (code.lower(), name.lower())
+        ]
+        if not codes:
+            return JsonResponse({
+                'status': 'error', 
+                'message': f"Unknown department '{department}'"
+            }, status=400)
+        profiles = EmployeeProfile.objects.filter(department__in=codes)
+        selector = {'department': codes[0]}
+    elif laptop_serial:
+        profiles = EmployeeProfile.objects.filter(laptop_serial__iexact=laptop_serial)
+        selector = {'laptop_serial': laptop_serial}
+    else:
+        return JsonResponse({
+            'status': 'error', 
+            'message': "One of 'user_ids', 'department' or 'laptop_serial' is required"
+        }, status=400)
+    
+    if user_ids is None:
+        user_ids = []
+        for user_id, is_staff, is_superuser in profiles.values_list(
+            'user_id', 'user__is_staff', 'user__is_superuser'
+        ):
+            (skipped if is_staff or is_superuser else user_ids).append(user_id)
+    
+    try:
+        quarantined = quarantine_users(user_ids)
+    except Exception as e:
+        import traceback
+        return JsonResponse({
+            'status': 'error', 
+            'message': f'Error quarantining users: {str(e)}',
+            'traceback': traceback.format_exc() if settings.DEBUG else None
+        }, status=500)
+    
+    results = [{'user_id': user_id, 'status': 'skipped'} for user_id in skipped]
+    for user_id in dict.fromkeys(user_ids):
+        if user_id in quarantined:
+            results.append({'user_id': user_id, 'status': 'quarantined', **quarantined[user_id]})
+        else:
+            results.append({'user_id': user_id, 'status': 'not_found'})
+    
+    return JsonResponse({
+        'status': 'success',
+        'message': f'{len(quarantined)} user(s) quarantined',
+        **selector,
+        'quarantined_count': len(quarantined),
+        'not_found_count': len(results) - len(quarantined) - len(skipped),
+        'skipped_count': len(skipped),
+        'sessions_deleted': sum(result['sessions_deleted'] for result in quarantined.values()),
+        'results': results
+    })
+
+@csrf_exempt
+@require_http_methods(["POST"])
+@idempotent
 def update_ticket_category(request):
     """
     API endpoint for n8n to update ticket category (AI classification).
@@ -1851,7 +2142,7 @@ def classify_ticket_api(request):
         if project_root not in sys.path:
             sys.path.insert(0, project_root)
         
-        from ticket_classifier import classify_ticket, get_prediction_confidence
+        from ticket_classifier import get_prediction_confidence
     except ImportError as e:
         return JsonResponse({
             'status': 'error', 
@@ -1894,12 +2185,12 @@ def classify_ticket_api(request):
     
     # Classify the ticket
     try:
-        predicted_category = classify_ticket(title, description)
+        # One prediction gives both the category and its confidence
         confidence_data = get_prediction_confidence(title, description)
         
         return JsonResponse({
             'status': 'success',
-            'predicted_category': predicted_category,
+            'predicted_category': confidence_data['category'],
             'confidence': confidence_data['confidence'],
             'title': title,
             'description': description[:100] + '...' if len(description) > 100 else description,  # Truncate for response
@@ -1912,3 +2203,252 @@ def classify_ticket_api(request):
             'message': f'Error classifying ticket: {str(e)}',
             'traceback': traceback.format_exc() if settings.DEBUG else None
         }, status=500)
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def classify_tickets_api(request):
+    """
+    Batch version of classify_ticket_api for n8n backlog reclassification.
+    Expects JSON payload: {"tickets": [{"title": "...", "description": "..."} OR {"ticket_id": <number>}, ...]}
+    
+    The whole batch goes through one predict_proba call. Batches larger than
+    settings.CLASSIFY_MAX_BATCH_SIZE are rejected.
+    Returns: {"results": [{"index": 0, "predicted_category": "...", "confidence": 0.0-1.0, "ticket_id": ...}, ...]}
+    """
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'status': 'error', 
+            'message': 'Invalid JSON payload'
+        }, status=400)
+    
+    tickets = data.get('tickets') if isinstance(data, dict) else data
+    if not isinstance(tickets, list) or not tickets:
+        return JsonResponse({
+            'status': 'error', 
+            'message': "Field 'tickets' must be a non-empty list"
+        }, status=400)
+    
+    max_batch_size = getattr(settings, 'CLASSIFY_MAX_BATCH_SIZE', 500)
+    if len(tickets) > max_batch_size:
+        return JsonResponse({
+            'status': 'error', 
+            'message': f'Batch of {len(tickets)} tickets exceeds the maximum of {max_batch_size}'
+        }, status=400)
+    
+    # Import the classifier (lazy import to avoid loading sklearn on module load)
+    try:
+        import sys
+        import os
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        if project_root not in sys.path:
+            sys.path.insert(0, project_root)
+        
+        from ticket_classifier import classify_many, combine_text
+    except ImportError as e:
+        return JsonResponse({
+            'status': 'error', 
+            'message': f'Failed to import classifier: {str(e)}. Make sure sklearn, pandas, and numpy are installed.'
+        }, status=500)
+    
+    # Ids beyond the primary key's range can't exist (and overflow the query parameter)
+    _min_id, max_id = connection.ops.integer_field_range(Incident._meta.pk.get_internal_type())
+    
+    def parse_ticket_id(value):
+        try:
+            ticket_id = int(str(value).strip())
+        except (ValueError, TypeError):
+            return None
+        return ticket_id if 0 < ticket_id <= max_id else None
+    
+    # Look up every referenced incident in one query
+    ticket_ids = set()
+    for item in tickets:
+        if isinstance(item, dict) and item.get('ticket_id'):
+            ticket_id = parse_ticket_id(item['ticket_id'])
+            if ticket_id is not None:
+                ticket_ids.add(ticket_id)
+    incidents_by_id = Incident.objects.only('id', 'title', 'description').in_bulk(ticket_ids)
+    
+    results = []
+    texts = []
+    pending = []  # (result index, text index) for items that need classifying
+    for index, item in enumerate(tickets):
+        result = {'index': index, 'ticket_id': None}
+        results.append(result)
+        if not isinstance(item, dict):
+            result['error'] = 'Each ticket must be an object'
+            continue
+        
+        title = item.get('title') or ''
+        description = item.get('description') or ''
+        if not isinstance(title, str) or not isinstance(description, str):
+            result['error'] = "Fields 'title' and 'description' must be strings"
+            continue
+        title = title.strip()
+        description = description.strip()
+        if item.get('ticket_id'):
+            ticket_id = parse_ticket_id(item['ticket_id'])
+            if ticket_id is None:
+                result['error'] = f"Invalid ticket_id: {item['ticket_id']}"
+                continue
+            result['ticket_id'] = ticket_id
+            incident = incidents_by_id.get(ticket_id)
+            if incident is None:
+                result['error'] = f'Incident #{ticket_id} not found'
+                continue
+            title = incident.title
+            description = incident.description
+        
+        if not title and not description:
+            result['error'] = 'Either title/description or ticket_id must be provided'
+            continue
+        
+        pending.append((index, len(texts)))
+        texts.append(combine_text(title, description))
+    
+    # Classify the whole batch at once
+    try:
+        predictions = classify_many(texts)
+    except Exception as e:
+        import traceback
+        return JsonResponse({
+            'status': 'error', 
+            'message': f'Error classifying tickets: {str(e)}',
+            'traceback': traceback.format_exc() if settings.DEBUG else None
+        }, status=500)
+    
+    for result_index, text_index in pending:
+        results[result_index]['predicted_category'] = predictions[text_index]['category']
+        results[result_index]['confidence'] = predictions[text_index]['confidence']
+    
+    return JsonResponse({
+        'status': 'success',
+        'count': len(results),
+        'classified': len(pending),
+        'results': results
+    })
+
+
+@login_required
+def classifier_stats_api(request):
+    """
+    Prediction cache counters for monitoring (staff only).
+    Returns: {"status": "success", "cache": {"hits": ..., "misses": ..., "hit_rate": ..., ...}}
+    """
+    if not is_staff_member(request.user):
+        return JsonResponse({
+            'status': 'error', 
+            'message': 'Access denied. Only staff members can view classifier stats.'
+        }, status=403)
+    
+    import sys
+    import os
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    import ticket_classifier
+    
+    return JsonResponse({
+        'status': 'success',
+        'cache': ticket_classifier.cache_stats()
+    })
+
+
+@login_required
+def incidents_api(request):
+    """
+    JSON incident listing, newest first, with keyset (cursor) pagination.
+    Staff get the admin dashboard list and accept its filters (status, it_status,
+    period/from/to, priority, user, serial, view_user, view_serial,
+    my_tickets/ticket_type); other users get their own incidents with the same filters.
+
+    Query: ?limit=50&cursor=<next from the previous response>
+    Returns: {"status": "success", "incidents": [...], "next": "<cursor>" or null}
+    """
+    try:
+        limit = int(request.GET.get('limit', 50))
+    except (TypeError, ValueError):
+        limit = 50
+    limit = max(1, min(limit, getattr(settings, 'INCIDENT_API_MAX_PAGE_SIZE', 200)))
+    
+    staff = is_staff_member(request.user)
+    if staff:
+        incidents = _dashboard_incidents(
+            request, roles.can_view_all_global_tickets(request) or roles.is_manager(request)
+        )
+    else:
+        incidents = _dashboard_incidents(request, True).filter(user=request.user)
+    incidents = incidents.select_related('user', 'it_acknowledged_by')
+    
+    try:
+        page, next_cursor = keyset.paginate(incidents, request.GET.get('cursor'), limit)
+    except keyset.InvalidCursor:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Invalid cursor. Use the "next" value from the previous page.'
+        }, status=400)
+    
+    return JsonResponse({
+        'status': 'success',
+        'incidents': [
+            {
+                'id': incident.id,
+                'title': incident.title,
+                'status': incident.status,
+                'category': incident.category,
+                'department': incident.department,
+                'laptop_serial': incident.laptop_serial,
+                'reported_by': incident.user.username,
+                'it_acknowledged': incident.it_acknowledged,
+                'acknowledged_by': incident.it_acknowledged_by.username if incident.it_acknowledged_by else None,
+                'created_at': incident.created_at.isoformat(),
+                'resolved_at': incident.resolved_at.isoformat() if incident.resolved_at else None,
+                'url': reverse('manage_ticket' if staff else 'ticket_detail', args=[incident.id]),
+            }
+            for incident in page
+        ],
+        'next': next_cursor,
+    })
+
+
+async def event_stream(request):
+    """
+    Server-Sent Events stream of live incident events for the dashboard and
+    My History pages (see events.py). Staff get events on the tickets their
+    dashboard lists; other users only events on their own incidents. Needs the
+    ASGI server; under WSGI it answers 204, which tells EventSource not to reconnect.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    
+    sees_all = False
+    if user.is_staff:
+        sees_all = roles.VIEW_ALL_GLOBAL in await sync_to_async(roles.roles_for_user)(user)
+    subscription = events.subscribe(user, sees_all)
+    heartbeat = getattr(settings, 'EVENT_STREAM_HEARTBEAT', 15)
+    
+    async def stream():
+        try:
+            # Ask the browser to wait a few seconds before reconnecting
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ': keep-alive\n\n'
+                    continue
+                yield events.format_event(event)
+        finally:
+            subscription.close()
+    
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -21,6 +21,7 @@ django.setup()
 from django.contrib.auth.models import User
 from django.contrib.sessions.models import Session
 from django.utils import timezone
+from incidents.user_sessions import delete_user_sessions
 import json
 
 def test_quarantine(user_id):
@@ -62,23 +63,10 @@ def test_quarantine(user_id):
         user.save()
         print(f"✓ Account deactivated: {user.is_active}")
         
-        # 2. Delete sessions
-        sessions_deleted = 0
+        # 2. Delete sessions through the session index (same helper the API uses)
+        sessions_deleted = delete_user_sessions(user.pk)[user.pk]
         decode_errors = 0
-        
-        for session in all_sessions:
-            try:
-                session_data = session.get_decoded()
-                session_user_id = session_data.get('_auth_user_id')
-                
-                if session_user_id and str(user.pk) == str(session_user_id):
-                    session_key = session.session_key
-                    session.delete()
-                    sessions_deleted += 1
-                    print(f"✓ Deleted session: {session_key[:20]}...")
-            except Exception as e:
-                decode_errors += 1
-                print(f"✗ Error decoding session: {str(e)}")
+        print(f"✓ Deleted {sessions_deleted} session(s)")
         
         # 3. Verify
         print(f"\n{'='*60}")
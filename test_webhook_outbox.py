@@ -0,0 +1,141 @@
+"""
+Test script for the n8n webhook outbox.
+Starts a local HTTP stub in place of n8n, submits a ticket through /report/,
+then runs the dispatcher and checks delivery, retry with backoff and give-up.
+Uses a throwaway SQLite database; the project database is never touched.
+
+Usage:
+    python test_webhook_outbox.py
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Setup Django against a separate test database
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SIRTS.settings')
+
+work_dir = tempfile.mkdtemp(prefix='sirts_outbox_test_')
+
+from django.conf import settings  # noqa: E402
+
+settings.DATABASES['default'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.path.join(work_dir, 'db.sqlite3'),
+}
+settings.MEDIA_ROOT = os.path.join(work_dir, 'media')
+settings.ALLOWED_HOSTS = ['testserver']
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from incidents.models import Incident, OutboundWebhook  # noqa: E402
+from incidents.outbox import deliver_due_webhooks  # noqa: E402
+
+
+class N8nStub(BaseHTTPRequestHandler):
+    """Records every POST; answers 503 while fail_next > 0"""
+    received = []
+    fail_next = 0
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if N8nStub.fail_next > 0:
+            N8nStub.fail_next -= 1
+            self.send_response(503)
+        else:
+            N8nStub.received.append(json.loads(body))
+            self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def check(label, condition):
+    print(f"  {'✓' if condition else '✗'} {label}")
+    if not condition:
+        sys.exit(1)
+
+
+def main():
+    call_command('migrate', verbosity=0)
+    stub = ThreadingHTTPServer(('127.0.0.1', 0), N8nStub)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    settings.N8N_BASE_URL = f'http://127.0.0.1:{stub.server_port}'
+
+    print(f"\n{'='*60}\nTesting webhook outbox against stub at {settings.N8N_BASE_URL}\n{'='*60}\n")
+
+    user = User.objects.create_user('outbox_tester', password='outbox-pass-123')
+    client = Client()
+    client.force_login(user)
+
+    # 1. Submitting a ticket only queues the webhook
+    N8nStub.fail_next = 10
+    start = time.perf_counter()
+    response = client.post('/report/', {'title': 'Outbox test', 'description': 'wifi is slow', 'action_type': 'submit'})
+    elapsed = time.perf_counter() - start
+    incident = Incident.objects.get(user=user)
+    webhook = OutboundWebhook.objects.get(incident=incident)
+    print("Submit:")
+    check(f'redirected after submit ({response.status_code}, {elapsed:.2f}s)', response.status_code == 302)
+    check('webhook queued as pending', webhook.status == 'pending' and webhook.attempts == 0)
+    check('nothing sent inline', not N8nStub.received)
+
+    # 2. n8n is down: the dispatcher backs off exponentially
+    print("\nRetry while n8n is down:")
+    delays = []
+    for _ in range(3):
+        OutboundWebhook.objects.filter(pk=webhook.pk).update(next_attempt_at=timezone.now())
+        before = timezone.now()
+        deliver_due_webhooks(backoff=2, max_attempts=5)
+        webhook.refresh_from_db()
+        delays.append(round((webhook.next_attempt_at - before).total_seconds()))
+    check(f'attempts recorded ({webhook.attempts})', webhook.attempts == 3)
+    check(f'backoff doubles each attempt {delays}', delays == [2, 4, 8])
+    check('error kept for inspection', '503' in (webhook.last_error or ''))
+
+    # 3. n8n is back: the next due attempt delivers
+    print("\nDelivery once n8n recovers:")
+    N8nStub.fail_next = 0
+    OutboundWebhook.objects.filter(pk=webhook.pk).update(next_attempt_at=timezone.now())
+    delivered, _retried, _failed = deliver_due_webhooks()
+    webhook.refresh_from_db()
+    check('webhook delivered', delivered == 1 and webhook.status == 'delivered')
+    check('stub received the ticket payload', N8nStub.received and N8nStub.received[0]['ticket_id'] == incident.id)
+
+    # 4. Batches are drained by the management command
+    print("\nBatch dispatch:")
+    for i in range(25):
+        OutboundWebhook.objects.create(url=f'{settings.N8N_BASE_URL}/webhook-test/new-incident', payload={'ticket_id': i})
+    call_command('dispatch_webhooks', '--once', '--batch-size', '10', stdout=open(os.devnull, 'w'))
+    check('all queued webhooks delivered', not OutboundWebhook.objects.exclude(status='delivered').exists())
+
+    # 5. Giving up after max attempts
+    print("\nGive up after max attempts:")
+    N8nStub.fail_next = 100
+    dead = OutboundWebhook.objects.create(url=f'{settings.N8N_BASE_URL}/webhook-test/new-incident', payload={})
+    for _ in range(3):
+        OutboundWebhook.objects.filter(pk=dead.pk).update(next_attempt_at=timezone.now())
+        deliver_due_webhooks(max_attempts=3)
+    dead.refresh_from_db()
+    check('marked failed', dead.status == 'failed' and dead.attempts == 3)
+
+    stub.shutdown()
+    shutil.rmtree(work_dir, ignore_errors=True)
+    print(f"\n{'='*60}\nAll outbox checks passed\n{'='*60}")
+
+
+if __name__ == '__main__':
+    main()
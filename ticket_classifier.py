@@ -8,19 +8,138 @@ Uses machine learning to classify incident tickets into categories:
 - Other
 
 This script can be used standalone or integrated with n8n workflows.
+
+The model is fitted once by a build step and saved as a versioned, checksummed
+artifact in classifier_models/:
+    python manage.py build_classifier
+    (or: python ticket_classifier.py --build)
+Workers then only unpickle it. If the artifact is missing or stale the model is
+trained in-process as before. sklearn is only imported when a model is needed.
+
+Predictions are cached in a bounded LRU keyed by a hash of the normalized text
+and the loaded model's identity, optionally backed by a shared cache (e.g. a
+Django cache) so repeated submissions skip TF-IDF. Rebuilding the artifact
+changes the identity, so old entries are never served for the new model.
 """
 
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.pipeline import make_pipeline
+import hashlib
+import re
 import sys
 import json
 import pickle
 import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
 
 # Global model variable to avoid retraining on every call
 _model = None
+# Identity of the loaded model (artifact SHA256, or the version when trained in-process)
+_model_id = None
+# mtime of the manifest the model was loaded from, to notice a rebuilt artifact
+_artifact_mtime = None
+
+# Where the built model artifact and its manifest live
+MODEL_DIR = os.environ.get(
+    'TICKET_CLASSIFIER_MODEL_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'classifier_models'),
+)
+MODEL_FILENAME = 'ticket_classifier.pkl'
+MANIFEST_FILENAME = 'ticket_classifier.json'
+
+# Pipeline hyperparameters (part of the model version)
+MODEL_PARAMS = {
+    'tfidf': {'max_features': 1000, 'ngram_range': [1, 2], 'stop_words': 'english'},
+    'nb': {'alpha': 0.1},
+}
+
+
+# Prediction cache: size of the in-process LRU (0 disables it)
+PREDICTION_CACHE_SIZE = int(os.environ.get('TICKET_CLASSIFIER_CACHE_SIZE', 4096))
+CACHE_KEY_PREFIX = 'ticket_classifier:prediction:'
+
+
+class ModelArtifactError(Exception):
+    """Raised when the saved model artifact is missing, corrupt or out of date"""
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU of text hash -> {'category', 'confidence'}.
+    An optional shared backend (anything with get_many/set_many, such as a
+    Django cache) is consulted on local misses and filled on model predictions.
+    """
+
+    def __init__(self, maxsize=PREDICTION_CACHE_SIZE, shared=None, timeout=None):
+        self.maxsize = maxsize
+        self.shared = shared
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def get_many(self, keys):
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+        missing = [key for key in keys if key not in found]
+        if missing and self.shared is not None:
+            try:
+                from_shared = self.shared.get_many(missing)
+            except Exception:
+                # The shared cache is an optimisation; never fail a prediction over it
+                from_shared = {}
+            self._store(from_shared)
+            found.update(from_shared)
+        with self._lock:
+            self.hits += len(keys) - len(missing)
+            self.shared_hits += len(found) - (len(keys) - len(missing))
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set_many(self, entries):
+        self._store(entries)
+        if entries and self.shared is not None:
+            try:
+                self.shared.set_many(entries, self.timeout)
+            except Exception:
+                pass
+
+    def _store(self, entries):
+        if not self.maxsize:
+            return
+        with self._lock:
+            for key, value in entries.items():
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+                'shared_backend': type(self.shared).__name__ if self.shared is not None else None,
+                'model_id': _model_id,
+            }
+
+
+_prediction_cache = PredictionCache()
 
 # Expanded Training Data for better accuracy
 training_data = {
@@ -87,30 +206,221 @@ training_data = {
     ]
 }
 
-# Convert to DataFrame
-df = pd.DataFrame(training_data)
+def model_version():
+    """
+    Version of the model the current code would train: a fingerprint of the
+    training data and hyperparameters. An artifact built from anything else is stale.
+    """
+    fingerprint = json.dumps({'data': training_data, 'params': MODEL_PARAMS}, sort_keys=True)
+    return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()[:12]
 
-def get_model():
+def train_model():
+    """Fit a fresh TF-IDF + MultinomialNB pipeline on the training data."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import make_pipeline
+
+    # Build the Model Pipeline
+    # Using TfidfVectorizer for text feature extraction and MultinomialNB for classification
+    model = make_pipeline(
+        TfidfVectorizer(
+            max_features=MODEL_PARAMS['tfidf']['max_features'],
+            ngram_range=tuple(MODEL_PARAMS['tfidf']['ngram_range']),
+            stop_words=MODEL_PARAMS['tfidf']['stop_words'],
+        ),
+        MultinomialNB(alpha=MODEL_PARAMS['nb']['alpha'])
+    )
+    # Train the Model
+    if sys.stderr:
+        print("Training AI classifier model...", file=sys.stderr)
+    model.fit(training_data['text'], training_data['category'])
+    if sys.stderr:
+        print("Model training completed.", file=sys.stderr)
+    return model
+
+def build_artifact(directory=None):
     """
-    Get or create the trained model (singleton pattern).
-    This avoids retraining on every function call.
+    Train the model once and save it with a manifest (version, SHA256, sklearn version).
+
+    Returns:
+        dict: The manifest that was written
     """
-    global _model
-    if _model is None:
-        # Build the Model Pipeline
-        # Using TfidfVectorizer for text feature extraction and MultinomialNB for classification
-        _model = make_pipeline(
-            TfidfVectorizer(max_features=1000, ngram_range=(1, 2), stop_words='english'),
-            MultinomialNB(alpha=0.1)
+    import sklearn
+
+    directory = directory or MODEL_DIR
+    os.makedirs(directory, exist_ok=True)
+    model = train_model()
+    data = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+    manifest = {
+        'version': model_version(),
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'sklearn_version': sklearn.__version__,
+        'classes': list(model.classes_),
+        'size': len(data),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+    }
+
+    # Write to temporary names then rename, so a running worker never sees a half-written file
+    model_path = os.path.join(directory, MODEL_FILENAME)
+    manifest_path = os.path.join(directory, MANIFEST_FILENAME)
+    with open(model_path + '.tmp', 'wb') as f:
+        f.write(data)
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(model_path + '.tmp', model_path)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return manifest
+
+def load_artifact(directory=None):
+    """
+    Load the saved model after checking its version and checksum.
+
+    Raises:
+        ModelArtifactError: if the artifact is missing, corrupt, stale or was
+        built with a different sklearn version
+    """
+    directory = directory or MODEL_DIR
+    try:
+        with open(os.path.join(directory, MANIFEST_FILENAME)) as f:
+            manifest = json.load(f)
+        with open(os.path.join(directory, MODEL_FILENAME), 'rb') as f:
+            data = f.read()
+    except (OSError, ValueError) as e:
+        raise ModelArtifactError(f"No usable model artifact in {directory}: {e}")
+
+    if manifest.get('version') != model_version():
+        raise ModelArtifactError(
+            f"Model artifact is stale (version {manifest.get('version')}, expected {model_version()})"
         )
-        # Train the Model
-        if sys.stderr:
-            print("Training AI classifier model...", file=sys.stderr)
-        _model.fit(df['text'], df['category'])
+    if hashlib.sha256(data).hexdigest() != manifest.get('sha256'):
+        raise ModelArtifactError("Model artifact checksum does not match its manifest")
+
+    import sklearn
+    if manifest.get('sklearn_version') != sklearn.__version__:
+        raise ModelArtifactError(
+            f"Model artifact was built with sklearn {manifest.get('sklearn_version')}, "
+            f"running {sklearn.__version__}"
+        )
+    return pickle.loads(data)
+
+def _manifest_mtime():
+    try:
+        return os.stat(os.path.join(MODEL_DIR, MANIFEST_FILENAME)).st_mtime_ns
+    except OSError:
+        return None
+
+def _artifact_id():
+    with open(os.path.join(MODEL_DIR, MANIFEST_FILENAME)) as f:
+        return json.load(f)['sha256']
+
+def get_model():
+    """
+    Get the trained model (singleton pattern).
+    Loads the built artifact when possible; otherwise trains in-process once.
+    If the artifact is rebuilt while running, the new one is loaded on the next call.
+    """
+    global _model, _model_id, _artifact_mtime
+    mtime = _manifest_mtime()
+    if _model is not None and mtime == _artifact_mtime:
+        return _model
+    if _model is not None:
+        # The artifact changed on disk; switch to it if it is usable
+        try:
+            _model, _model_id = load_artifact(), _artifact_id()
+            _prediction_cache.clear()
+        except (ModelArtifactError, OSError, ValueError, KeyError) as e:
+            if sys.stderr:
+                print(f"Keeping the current model: {e}", file=sys.stderr)
+        _artifact_mtime = mtime
+        return _model
+    try:
+        _model, _model_id = load_artifact(), _artifact_id()
+    except (ModelArtifactError, OSError, ValueError, KeyError) as e:
         if sys.stderr:
-            print("Model training completed.", file=sys.stderr)
+            print(f"{e}. Run 'python manage.py build_classifier' to build it.", file=sys.stderr)
+        _model, _model_id = train_model(), f"trained-{model_version()}"
+    _artifact_mtime = mtime
     return _model
 
+def configure_cache(maxsize=None, shared=None, timeout=None):
+    """
+    Replace the prediction cache.
+    
+    Args:
+        maxsize (int): Entries kept in-process (0 disables the local LRU)
+        shared: Optional shared backend with get_many/set_many, e.g. a Django cache
+        timeout (int): Seconds entries live in the shared backend (None = backend default)
+    """
+    global _prediction_cache
+    _prediction_cache = PredictionCache(
+        PREDICTION_CACHE_SIZE if maxsize is None else maxsize, shared, timeout
+    )
+
+def cache_stats():
+    """Hit/miss counters and size of the prediction cache, for monitoring."""
+    return _prediction_cache.stats()
+
+def normalize_text(text):
+    """Lowercase and collapse whitespace; the vectorizer ignores both, so predictions are unchanged."""
+    return re.sub(r'\s+', ' ', text or '').strip().lower()
+
+def _cache_key(text):
+    digest = hashlib.sha256(f"{_model_id}\0{normalize_text(text)}".encode('utf-8')).hexdigest()
+    return CACHE_KEY_PREFIX + digest
+
+def combine_text(title="", description=""):
+    """Text the model sees for a ticket: title and description joined."""
+    return f"{title or ''} {description or ''}".strip()
+
+def classify_many(texts):
+    """
+    Classify many texts with a single predict_proba call.
+    
+    Args:
+        texts (list): Combined ticket texts (see combine_text)
+        
+    Returns:
+        list: One dict per text with 'category' and 'confidence' (0-1 score)
+    """
+    results = [{"category": "Other", "confidence": 0.0} for _ in texts]
+    # Empty texts are "Other" without asking the model
+    indexes = [i for i, text in enumerate(texts) if text]
+    if not indexes:
+        return results
+    
+    # Get the trained model
+    model = get_model()
+    
+    # Serve repeated texts from the cache
+    keys = {i: _cache_key(texts[i]) for i in indexes}
+    cached = _prediction_cache.get_many(list(set(keys.values())))
+    to_predict = {}
+    for i in indexes:
+        if keys[i] in cached:
+            results[i] = dict(cached[keys[i]])
+        else:
+            # Duplicates within the batch are predicted once
+            to_predict.setdefault(keys[i], []).append(i)
+    if not to_predict:
+        return results
+    
+    # One probability matrix for the rest of the batch; the best column is both
+    # the predicted category and its confidence
+    pending = list(to_predict.items())
+    probabilities = model.predict_proba([texts[positions[0]] for _key, positions in pending])
+    best = probabilities.argmax(axis=1)
+    categories = model.classes_
+    predicted = {}
+    for row, (key, positions) in enumerate(pending):
+        predicted[key] = {
+            "category": str(categories[best[row]]),
+            "confidence": float(probabilities[row, best[row]])
+        }
+        for i in positions:
+            results[i] = dict(predicted[key])
+    _prediction_cache.set_many(predicted)
+    return results
+
 def classify_ticket(title="", description=""):
     """
     Classify a ticket based on its title and description.
@@ -122,22 +432,11 @@ def classify_ticket(title="", description=""):
     Returns:
         str: The predicted category (Hardware, Software, Network, Account, or Other)
     """
-    # Combine title and description for classification
-    combined_text = f"{title} {description}".strip()
-    
-    if not combined_text:
-        return "Other"
-    
-    # Get the trained model
-    model = get_model()
-    
-    # Predict category
-    prediction = model.predict([combined_text])[0]
-    return prediction
+    return get_prediction_confidence(title, description)["category"]
 
 def get_prediction_confidence(title="", description=""):
     """
-    Get the prediction confidence score for a classification.
+    Get the prediction and its confidence score for a classification.
     
     Args:
         title (str): The ticket title
@@ -146,29 +445,14 @@ def get_prediction_confidence(title="", description=""):
     Returns:
         dict: Contains 'category' and 'confidence' (0-1 score)
     """
-    combined_text = f"{title} {description}".strip()
-    
-    if not combined_text:
-        return {"category": "Other", "confidence": 0.0}
-    
-    # Get the trained model
-    model = get_model()
-    
-    # Get prediction probabilities
-    probabilities = model.predict_proba([combined_text])[0]
-    categories = model.classes_
-    
-    # Find the highest probability
-    max_idx = probabilities.argmax()
-    predicted_category = categories[max_idx]
-    confidence = float(probabilities[max_idx])
-    
-    return {
-        "category": predicted_category,
-        "confidence": confidence
-    }
+    return classify_many([combine_text(title, description)])[0]
 
 if __name__ == "__main__":
+    # Build step: python ticket_classifier.py --build
+    if len(sys.argv) > 1 and sys.argv[1] == '--build':
+        print(json.dumps(build_artifact(), indent=2))
+        sys.exit(0)
+
     # Command-line usage
     if len(sys.argv) > 1:
         # If JSON input is provided
@@ -190,16 +474,15 @@ if __name__ == "__main__":
             title = ""
             description = ""
     
-    # Initialize model (will train on first call)
+    # Initialize model (loads the built artifact, or trains on first call)
     get_model()
     
-    # Classify the ticket
-    category = classify_ticket(title, description)
+    # Classify the ticket (category and confidence come from the same prediction)
     confidence_data = get_prediction_confidence(title, description)
     
     # Output as JSON for n8n or other integrations
     result = {
-        "predicted_category": category,
+        "predicted_category": confidence_data["category"],
         "confidence": confidence_data["confidence"],
         "title": title,
         "description": description